@@ -0,0 +1,31 @@
+"""
+Offline Analytics
+=================
+
+The Trends and Stats views (calculate_trend, get_stats, create_sparkline in
+code.py, on history.py's TieredHistory) and the weather station's pressure
+trend and forecast (examples/weather_station.py) re-run over months of
+logged samples on a computer, vectorized with NumPy:
+
+    python -m analytics --store clue_store --device kitchen
+    python -m analytics --log env_log.bin
+    python -m analytics --synthetic 365 --check 20000
+
+Rolling windows are strided views (no copies) for min/max and sparklines;
+means and half-window trends come from one prefix sum; the min/avg/max
+tiers fold the samples with a reshape. Results are given for every sample,
+as the device would show them right after it.
+
+The results are bit-for-bit those of the firmware code run on CPython
+(the simulator): values are stored as float32 like array('f'), tier sums
+are rounded the same way, and --check compiles the functions straight out
+of code.py and weather_station.py to compare. (On the CLUE, CircuitPython's
+30-bit floats can round the last digit differently.)
+
+Needs NumPy. Read the store with ingest, or a copied env_log.bin with
+datalog.read_records().
+"""
+
+from analytics.rolling import (Rolling, Tier, tiers, rollup, windows, trend_codes, trend_text,
+                               sparkline_levels, sparkline_text)
+from analytics.weather import PressureHistory, pressure_trend, forecast, log_points
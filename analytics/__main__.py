@@ -0,0 +1,157 @@
+"""
+Command-line analytics.
+
+    python -m analytics --store clue_store --device kitchen
+    python -m analytics --log env_log.bin --check 20000
+    python -m analytics --synthetic 365
+"""
+
+import argparse
+import math
+import sys
+import time
+
+import numpy
+
+from analytics.check import check_history, check_weather
+from analytics.rolling import (TREND_FALLING, TREND_NONE, TREND_RISING, TREND_STABLE,
+                               sparkline_levels, sparkline_text, tiers, trend_codes, trend_text)
+from analytics.weather import (FORECASTS, PRESSURE_TRENDS, PressureHistory, forecast, log_points,
+                               pressure_trend)
+
+# code.py settings
+HISTORY_SIZE = 120
+HISTORY_ROLLUPS = ((144, 10), (168, 6))
+HISTORY_TIER_NAMES = ("2hr", "24hr", "7day")
+SPARKLINE_WIDTH = 35
+CHANNEL_NAMES = ("Temp", "RH", "Pres")
+
+TREND_NAMES = {TREND_NONE: "n/a", TREND_STABLE: "Stable", TREND_RISING: "Rising",
+               TREND_FALLING: "Falling"}
+
+
+def load_store(path, device, start, end):
+    from ingest import ColumnStore
+
+    store = ColumnStore(path)
+    if device is None:
+        devices = store.devices()
+        if len(devices) != 1:
+            raise SystemExit("--device is needed; the store has: " + (", ".join(devices) or "nothing"))
+        device = devices[0]
+    columns = store.read(device, start, end, ("time", "temperature", "humidity", "pressure"))
+    return (numpy.asarray(columns["time"]), numpy.asarray(columns["temperature"]),
+            numpy.asarray(columns["humidity"]), numpy.asarray(columns["pressure"]))
+
+
+def load_log(path):
+    from datalog import read_records  # The firmware module, from the repository root
+
+    records = numpy.array([record[1:] for record in read_records(path)], dtype=numpy.float64)
+    if not len(records):
+        records = numpy.empty((0, 4))
+    return records[:, 0], records[:, 1], records[:, 2], records[:, 3]
+
+
+def synthetic(days, seed=0):
+    """One reading a minute: daily temperature and humidity cycles, drifting pressure."""
+    generator = numpy.random.default_rng(seed)
+    minutes = numpy.arange(int(days * 1440))
+    day = 2 * math.pi * minutes / 1440
+    times = 1761955200.0 + minutes * 60.0  # From 2025-11-01
+    temperature = 21.0 + 2.0 * numpy.sin(day) + generator.normal(0, 0.1, len(minutes))
+    humidity = 45.0 - 8.0 * numpy.sin(day) + generator.normal(0, 0.5, len(minutes))
+    pressure = 1013.25 + numpy.cumsum(generator.normal(0, 0.03, len(minutes)))
+    pressure = numpy.clip(pressure, 970.0, 1045.0)
+    # Readings as logged: float32
+    return (times, temperature.astype(numpy.float32), humidity.astype(numpy.float32),
+            pressure.astype(numpy.float32))
+
+
+def score(times, channels):
+    """Everything the Trends/Stats views and the weather station would show."""
+    result = {"tiers": [tiers(values, HISTORY_SIZE, HISTORY_ROLLUPS) for values in channels]}
+    result["trends"] = [[trend_codes(tier.trend) for tier in channel] for channel in result["tiers"]]
+    logged = log_points(times)
+    history = PressureHistory(channels[2][logged])
+    result["pressure_trend"], result["change_per_hour"] = pressure_trend(history)
+    result["forecast"] = forecast(history)
+    return result
+
+
+def shares(codes, names):
+    counts = numpy.bincount(codes, minlength=len(names))
+    total = max(1, len(codes))
+    return "  ".join("{} {:.0%}".format(name, count / total)
+                     for name, count in zip(names, counts) if count)
+
+
+def print_report(result):
+    for ch, channel in enumerate(result["tiers"]):
+        for t, tier in enumerate(channel):
+            if not len(tier.points):
+                continue
+            codes = result["trends"][ch][t]
+            names = [TREND_NAMES[code] for code in range(4)]
+            last = len(tier.points) - 1
+            spark = sparkline_text(sparkline_levels(tier.points, SPARKLINE_WIDTH, [last])[0])
+            print("{:4} {:4}: {}".format(CHANNEL_NAMES[ch], HISTORY_TIER_NAMES[t],
+                                         shares(codes, names)))
+            print("           now {} | {:.1f}/{:.1f}/{:.1f} | {}".format(
+                trend_text(float(tier.trend[last])), tier.minimum[last], tier.mean[last],
+                tier.maximum[last], spark))
+    trends = result["pressure_trend"]
+    forecasts = result["forecast"]
+    if len(trends):
+        print("Pressure trend: " + shares(trends, [name for name, _ in PRESSURE_TRENDS]))
+        print("Forecast: " + shares(forecasts, FORECASTS))
+        print("Now: {} ({:+.2f} hPa/h), {}".format(
+            PRESSURE_TRENDS[trends[-1]][0], result["change_per_hour"][-1], FORECASTS[forecasts[-1]]))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m analytics",
+                                     description="Re-score logged history with the on-device rules")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--store", help="ingest store directory (python -m ingest)")
+    source.add_argument("--log", help="env_log.bin copied from CIRCUITPY")
+    source.add_argument("--synthetic", type=float, metavar="DAYS", help="generated 1-minute data")
+    parser.add_argument("--device", help="device in the store")
+    parser.add_argument("--start", help="first day (YYYY-MM-DD) from the store")
+    parser.add_argument("--end", help="last day (YYYY-MM-DD) from the store")
+    parser.add_argument("--check", type=int, metavar="N",
+                        help="compare the first N samples with the firmware's scalar code")
+    args = parser.parse_args(argv)
+
+    if args.store:
+        times, *channels = load_store(args.store, args.device, args.start, args.end)
+    elif args.log:
+        times, *channels = load_log(args.log)
+    else:
+        times, *channels = synthetic(args.synthetic)
+    count = len(times)
+    if not count:
+        print("No samples")
+        return 1
+    print("{} samples, {} .. {}".format(count, *(
+        time.strftime("%Y-%m-%d %H:%M", time.gmtime(t)) for t in (times[0], times[-1]))))
+
+    started = time.perf_counter()
+    result = score(times, channels)
+    print("Scored in {:.1f} ms".format((time.perf_counter() - started) * 1000))
+    print_report(result)
+
+    if args.check:
+        n = min(args.check, count)
+        print("Checking the first {} samples against code.py and weather_station.py...".format(n))
+        mismatches = check_history([values[:n] for values in channels], HISTORY_SIZE,
+                                   HISTORY_ROLLUPS, SPARKLINE_WIDTH, print)
+        logged = log_points(times[:n])
+        mismatches += check_weather(channels[2][logged], print)
+        print("{} mismatches".format(mismatches))
+        return 1 if mismatches else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+"""
+Parity check against the firmware's own scalar code.
+
+calculate_trend(), get_stats() and create_sparkline() are compiled straight
+out of code.py, get_pressure_trend() and get_weather_forecast() out of
+examples/weather_station.py, and run sample by sample on history.py's
+TieredHistory. Every result is compared with the vectorized one.
+"""
+
+import ast
+import os
+
+import numpy
+
+from analytics.rolling import sparkline_levels, sparkline_text, tiers, trend_text
+from analytics.weather import FORECASTS, PRESSURE_TRENDS, PressureHistory, forecast, pressure_trend
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CODE_PY = os.path.join(ROOT, "code.py")
+WEATHER_PY = os.path.join(ROOT, "examples", "weather_station.py")
+
+
+def device_functions(path, names, namespace):
+    """Compile the top-level functions `names` of a firmware file into `namespace`."""
+    with open(path) as f:
+        tree = ast.parse(f.read(), path)
+    body = [node for node in tree.body if isinstance(node, ast.FunctionDef) and node.name in names]
+    missing = set(names) - {node.name for node in body}
+    if missing:
+        raise ValueError("{} has no {}".format(path, ", ".join(sorted(missing))))
+    exec(compile(ast.Module(body=body, type_ignores=[]), path, "exec"), namespace)
+    return namespace
+
+
+def _same(expected, actual):
+    """Bit-for-bit equality of a device value (None when empty) and a vectorized one."""
+    if expected is None:
+        return actual != actual  # NaN
+    return float(expected) == float(actual)
+
+
+def check_history(channels, size, rollups, width, report):
+    """Compare Trends/Stats view results for every sample; returns mismatches."""
+    from history import TieredHistory  # The firmware module, from the repository root
+
+    device = device_functions(CODE_PY, ("calculate_trend", "get_stats", "create_sparkline"), {})
+    history = TieredHistory(len(channels), size, rollups)
+    device["sensor_history"] = history
+
+    vectorized = [tiers(values, size, rollups) for values in channels]
+    count = len(channels[0])
+    sparklines = {}
+    for ch, channel_tiers in enumerate(vectorized):
+        for t, tier in enumerate(channel_tiers):
+            ends = tier.point_at(numpy.arange(count))
+            sparklines[ch, t] = sparkline_levels(tier.points, width, ends)
+
+    mismatches = 0
+    for i in range(count):
+        history.append(*(float(values[i]) for values in channels))
+        for t in range(history.tiers):
+            device["history_tier"] = t
+            for ch, channel_tiers in enumerate(vectorized):
+                tier = channel_tiers[t]
+                stats = history.stats(t, ch)
+                minimum, maximum, mean = device["get_stats"](stats)
+                expected = (minimum, maximum, mean, device["calculate_trend"](stats),
+                            device["create_sparkline"](ch, width))
+                actual = (tier.at("minimum", i), tier.at("maximum", i), tier.at("mean", i),
+                          trend_text(float(tier.at("trend", i))),
+                          sparkline_text(sparklines[ch, t][i]))
+                same = (all(_same(e, a) for e, a in zip(expected[:3], actual[:3]))
+                        and expected[3:] == actual[3:])
+                if not same:
+                    mismatches += 1
+                    if mismatches <= 10:
+                        report("sample {} tier {} channel {}: device {} vectorized {}".format(
+                            i, t, ch, expected, actual))
+    return mismatches
+
+
+def check_weather(pressure, report):
+    """Compare the weather station's trend and forecast for every logged reading."""
+    device = device_functions(WEATHER_PY, ("get_pressure_trend", "get_weather_forecast"), {})
+    device["pressure_history"] = kept = []
+    device["pressure_log_interval"] = 300
+
+    history = PressureHistory(pressure)
+    trends, _ = pressure_trend(history, 300)
+    forecasts = forecast(history)
+    mismatches = 0
+    for i, value in enumerate(pressure):
+        kept.append(float(value))
+        if len(kept) > history.size:
+            kept.pop(0)
+        expected = (device["get_pressure_trend"](), device["get_weather_forecast"]())
+        actual = (PRESSURE_TRENDS[trends[i]], FORECASTS[forecasts[i]])
+        if expected != actual:
+            mismatches += 1
+            if mismatches <= 10:
+                report("reading {}: device {} vectorized {}".format(i, expected, actual))
+    return mismatches
+
@@ -0,0 +1,212 @@
+"""
+Vectorized history.py: rolling min/avg/max/trend and min/avg/max tiers.
+
+Every function takes the whole series at once and returns one result per
+sample (or per tier point): the value the device would show right after
+that sample was appended.
+"""
+
+import numpy
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Trend codes (calculate_trend() in code.py)
+TREND_NONE = 0  # "Insufficient data"
+TREND_STABLE = 1
+TREND_RISING = 2
+TREND_FALLING = 3
+STABLE_BAND = 0.2  # abs(diff) below this is "Stable"
+
+SPARK_BARS = " .-:=+*#@"  # Low to high, as in create_sparkline()
+
+
+def windows(values, size, fill):
+    """Strided (len(values), size) view: row i holds the `size` values
+    ending at i, oldest first, with `fill` before the first value."""
+    padded = numpy.concatenate((numpy.full(size - 1, fill, values.dtype), values))
+    return sliding_window_view(padded, size)
+
+
+def rolling_extreme(values, size, accumulate, fill):
+    """Min (accumulate=numpy.minimum) or max of the `size` values ending at
+    each index, in O(n) whatever the window: the padded series is cut into
+    blocks of `size` (a reshape, no copy), and each window is one block's
+    suffix scan combined with the next block's prefix scan (van Herk/Gil-Werman)."""
+    n = len(values)
+    blocks = -(-(n + size - 1) // size)
+    padded = numpy.full(blocks * size, fill, values.dtype)
+    padded[size - 1:size - 1 + n] = values
+    grid = padded.reshape(blocks, size)
+    prefix = accumulate.accumulate(grid, axis=1).ravel()
+    suffix = accumulate.accumulate(grid[:, ::-1], axis=1)[:, ::-1].ravel()
+    return accumulate(suffix[:n], prefix[size - 1:size - 1 + n])
+
+
+def stored(values):
+    """Values as RingBuffer keeps them (array('f'), float32)."""
+    return numpy.asarray(values, dtype=numpy.float64).astype(numpy.float32)
+
+
+class Rolling:
+    """RollingStats after every append to a RingBuffer of `size` slots.
+
+    `values` are the stored float32 values. min/max are exact; the sums are
+    float64 differences of one prefix sum, which equal RollingStats' running
+    double sums as long as they are exact (they are for sensor readings:
+    float32 values of similar magnitude never need all 53 bits).
+    """
+
+    def __init__(self, values, size, track_min=True, track_max=True):
+        values = numpy.asarray(values, dtype=numpy.float32)
+        n = len(values)
+        self.size = size
+        self.values = values
+        index = numpy.arange(n)
+        self.count = numpy.minimum(index + 1, size)
+        if not n:
+            self.minimum = self.maximum = self.mean = self.trend = numpy.empty(0)
+            return
+
+        self.minimum = self.maximum = None
+        if track_min:
+            self.minimum = rolling_extreme(values, size, numpy.minimum, numpy.inf).astype(numpy.float64)
+        if track_max:
+            self.maximum = rolling_extreme(values, size, numpy.maximum, -numpy.inf).astype(numpy.float64)
+
+        # Window i is values[start:i + 1]; the older half is its first `mid`
+        prefix = numpy.zeros(n + 1)
+        numpy.cumsum(values, dtype=numpy.float64, out=prefix[1:])
+        filling = min(n, size - 1)  # Windows that are not full yet
+        start = numpy.concatenate((prefix[:1].repeat(filling), prefix[:n - filling]))
+        middle = numpy.concatenate((prefix[(index[:filling] + 1) // 2],
+                                    prefix[size // 2:size // 2 + n - filling]))
+        mid = self.count // 2
+        total = prefix[1:] - start
+        old = middle - start
+        self.mean = total / self.count
+        with numpy.errstate(divide="ignore", invalid="ignore"):
+            trend = (total - old) / (self.count - mid) - old / mid
+        self.trend = numpy.where(self.count >= 2, trend, numpy.nan)
+
+
+def trend_codes(diff):
+    """calculate_trend() as codes: TREND_NONE for NaN, else stable/rising/falling."""
+    diff = numpy.asarray(diff, dtype=numpy.float64)
+    codes = numpy.full(diff.shape, TREND_FALLING, numpy.int8)
+    codes[diff > 0] = TREND_RISING
+    codes[numpy.abs(diff) < STABLE_BAND] = TREND_STABLE
+    codes[numpy.isnan(diff)] = TREND_NONE
+    return codes
+
+
+def trend_text(diff):
+    """calculate_trend()'s text for one trend value (NaN or None: no data)."""
+    if diff is None or diff != diff:
+        return "Insufficient data"
+    if abs(diff) < STABLE_BAND:
+        return "Stable"
+    elif diff > 0:
+        return f"Rising +{diff:.1f}"
+    return f"Falling {diff:.1f}"
+
+
+def sparkline_levels(values, width=30, ends=None):
+    """create_sparkline() bar indexes for the `width` values ending at each
+    index in `ends` (default: every sample): (len(ends), width) int8, -1
+    where there is no value (leading slots of a short history, or fewer
+    than 2 points)."""
+    values = numpy.asarray(values, dtype=numpy.float32)
+    n = len(values)
+    ends = numpy.arange(n) if ends is None else numpy.asarray(ends)
+    if not n:
+        return numpy.full((len(ends), width), -1, numpy.int8)
+    window = windows(values.astype(numpy.float64), width, numpy.nan)[ends]
+    present = ~numpy.isnan(window)
+    low = numpy.fmin.reduce(window, axis=1)[:, None]
+    high = numpy.fmax.reduce(window, axis=1)[:, None]
+    with numpy.errstate(divide="ignore", invalid="ignore"):
+        normalized = (window - low) / (high - low)
+        levels = numpy.where(high == low, 4, numpy.minimum(normalized * 8, 8))
+    levels = numpy.where(present, levels, -1).astype(numpy.int8)
+    levels[ends < 1] = -1
+    return levels
+
+
+def sparkline_text(levels):
+    """create_sparkline()'s text for one row of sparkline_levels()."""
+    row = [level for level in levels if level >= 0]
+    if len(row) < 2:
+        return "insufficient data"
+    return "".join(SPARK_BARS[level] for level in row)
+
+
+def rollup(mins, avgs, maxs, factor):
+    """Fold every `factor` points into one min/avg/max point, as
+    TieredHistory._rollup() does; a trailing partial point is left out.
+
+    The running sum is kept in float32 and each addition is done in
+    float64 and rounded, exactly like `acc_sum[ch] += avgs[ch]` on an
+    array('f'). Returns (mins, avgs, maxs); the averages are the float64
+    quotients the device passes on to the next tier (it stores them
+    rounded to float32).
+    """
+    points = len(avgs) // factor
+    length = points * factor
+    mins = numpy.asarray(mins, dtype=numpy.float64)[:length].reshape(points, factor)
+    avgs = numpy.asarray(avgs, dtype=numpy.float64)[:length].reshape(points, factor)
+    maxs = numpy.asarray(maxs, dtype=numpy.float64)[:length].reshape(points, factor)
+    total = avgs[:, 0].astype(numpy.float32)
+    for k in range(1, factor):
+        total = (total.astype(numpy.float64) + avgs[:, k]).astype(numpy.float32)
+    low = mins.min(axis=1).astype(numpy.float32).astype(numpy.float64)
+    high = maxs.max(axis=1).astype(numpy.float32).astype(numpy.float64)
+    return low, total.astype(numpy.float64) / factor, high
+
+
+class Tier:
+    """One TieredHistory tier of one channel, evaluated at every point."""
+
+    def __init__(self, size, samples, mins, avgs, maxs):
+        self.size = size  # Points kept
+        self.samples = samples  # Raw samples per point
+        self.points = stored(avgs)  # What last() returns (point averages)
+        if samples == 1:
+            self.stats = Rolling(self.points, size)
+            self.minimum = self.stats.minimum
+            self.maximum = self.stats.maximum
+        else:
+            # AggregateStats: min of the mins, max of the maxes, the rest
+            # from the averages
+            self.stats = Rolling(self.points, size, track_min=False, track_max=False)
+            self.minimum = Rolling(stored(mins), size, track_max=False).minimum
+            self.maximum = Rolling(stored(maxs), size, track_min=False).maximum
+        self.count = self.stats.count
+        self.mean = self.stats.mean
+        self.trend = self.stats.trend
+
+    def point_at(self, sample):
+        """Index of the newest point after raw sample `sample` (array ok); -1 if none."""
+        return (numpy.asarray(sample) + 1) // self.samples - 1
+
+    def at(self, attribute, sample):
+        """`attribute` ("minimum", "trend", ...) as seen after raw sample(s)
+        `sample`; NaN (or 0 for count) before the first point."""
+        values = getattr(self, attribute)
+        point = self.point_at(sample)
+        empty = 0 if attribute == "count" else numpy.nan
+        if not len(values):
+            return numpy.full(numpy.shape(point), empty)
+        return numpy.where(point >= 0, values[numpy.maximum(point, 0)], empty)
+
+
+def tiers(values, size=120, rollups=((144, 10), (168, 6))):
+    """TieredHistory(1, size, rollups) fed with `values`: a list of Tier,
+    raw first."""
+    values = numpy.asarray(values, dtype=numpy.float64)
+    result = [Tier(size, 1, values, values, values)]
+    mins = avgs = maxs = values
+    samples = 1
+    for points, factor in rollups:
+        mins, avgs, maxs = rollup(mins, avgs, maxs, factor)
+        samples *= factor
+        result.append(Tier(points, samples, mins, avgs, maxs))
+    return result
@@ -0,0 +1,91 @@
+"""
+Vectorized weather_station.py: pressure trend and forecast.
+
+examples/weather_station.py keeps the last PRESSURE_HISTORY_SIZE pressure
+readings, one every `pressure_log_interval` seconds, and classifies them
+after every update. Here the same rules run over a whole series of logged
+readings at once, returning one code per reading.
+"""
+
+import numpy
+
+HISTORY_SIZE = 12  # PRESSURE_HISTORY_SIZE
+LOG_INTERVAL = 300  # pressure_log_interval (seconds)
+
+# get_pressure_trend() results by code
+PRESSURE_TRENDS = (
+    ("Insufficient data", 0xCCCCCC),
+    ("Rising rapidly", 0x00FF00),
+    ("Rising", 0x88FF88),
+    ("Steady", 0xFFFFFF),
+    ("Falling", 0xFF8888),
+    ("Falling rapidly", 0xFF0000),
+)
+
+# get_weather_forecast() results by code
+FORECASTS = (
+    "Collecting data...",
+    "Clear & stable",
+    "Clear, changing",
+    "Improving",
+    "Deteriorating",
+    "Partly cloudy",
+    "Storm warning!",
+    "Rain likely",
+    "Clearing up",
+)
+
+
+def log_points(times, interval=LOG_INTERVAL):
+    """Indexes of the readings the station logs: the first one, then each
+    one at least `interval` seconds after the last logged one."""
+    times = numpy.asarray(times, dtype=numpy.float64)
+    if not len(times):
+        return numpy.empty(0, numpy.intp)
+    steps = numpy.diff(times)
+    if len(steps) and numpy.all(steps == steps[0]) and steps[0] > 0:
+        return numpy.arange(0, len(times), int(numpy.ceil(interval / steps[0])))
+    picked = [0]
+    while True:
+        i = int(numpy.searchsorted(times, times[picked[-1]] + interval))
+        if i >= len(times):
+            return numpy.array(picked, numpy.intp)
+        picked.append(i)
+
+
+class PressureHistory:
+    """pressure_history after every logged reading."""
+
+    def __init__(self, pressure, size=HISTORY_SIZE):
+        pressure = numpy.asarray(pressure, dtype=numpy.float64)
+        index = numpy.arange(len(pressure))
+        self.size = size
+        self.count = numpy.minimum(index + 1, size)
+        self.newest = pressure  # pressure_history[-1]
+        self.oldest = pressure[index + 1 - self.count]  # pressure_history[0]
+
+
+def pressure_trend(history, interval=LOG_INTERVAL):
+    """get_pressure_trend() codes (PRESSURE_TRENDS) and hPa per hour."""
+    time_span = history.count * interval / 3600  # hours, as on the device
+    change_per_hour = (history.newest - history.oldest) / time_span
+    codes = numpy.select(
+        (history.count < 2, change_per_hour > 1.5, change_per_hour > 0.5,
+         change_per_hour > -0.5, change_per_hour > -1.5),
+        (0, 1, 2, 3, 4), 5).astype(numpy.int8)
+    return codes, change_per_hour
+
+
+def forecast(history):
+    """get_weather_forecast() codes (FORECASTS)."""
+    current = history.newest
+    trend = history.newest - history.oldest
+    high = current > 1022
+    middle = ~high & (current > 1012)
+    low = ~high & ~middle
+    return numpy.select(
+        (history.count < 3,
+         high & (trend > 0), high,
+         middle & (trend > 2), middle & (trend < -2), middle,
+         low & (trend < -2), low & (trend < 0)),
+        (0, 1, 2, 3, 4, 5, 6, 7), 8).astype(numpy.int8)
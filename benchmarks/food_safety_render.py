@@ -0,0 +1,62 @@
+"""
+Food Safety Render Benchmark
+============================
+
+Regression check for the retained-scene renderer in food_safety.py.
+
+Drives each state's update_display_* function for TICKS ticks with values
+that change every tick (the worst case) and reports the heap consumed per
+tick, measured as the gc.mem_free() drop with the garbage collector paused.
+The first tick of each state (the one that rearranges the label pool) is
+reported separately from the steady-state ticks.
+
+Usage: copy food_safety.py and the modules it imports (datalog.py,
+snapshot.py, buttons.py, power.py, sensors.py, filters.py, food_state.py,
+thermal.py and calibration.py) to CIRCUITPY, then copy this file there as
+code.py and watch the serial console.
+"""
+
+import gc
+import food_safety as fs
+
+TICKS = 50
+BUDGET_BYTES = 512  # Maximum average bytes allocated per steady-state tick
+
+CASES = (
+    ("INITIAL", lambda i: fs.update_display_initial(21.0 - i * 0.1)),
+    ("SAFE", lambda i: fs.update_display_safe(3.0 + i * 0.01, i * 3700)),
+    ("WARNING", lambda i: fs.update_display_warning(6.0 + i * 0.1, i * 61)),
+    ("DISCARD", lambda i: fs.update_display_discard(8.0 + i * 0.1, "UNSAFE")),
+    ("CHARGE", lambda i: fs.update_display_charge(21.0 + i * 0.1)),
+)
+
+def measure(render, tick):
+    """Return bytes allocated by one render call with GC paused."""
+    gc.collect()
+    gc.disable()
+    before = gc.mem_free()
+    render(tick)
+    used = before - gc.mem_free()
+    gc.enable()
+    return used
+
+print("Food safety render benchmark ({} ticks per state)".format(TICKS))
+print("-" * 50)
+
+failed = False
+for name, render in CASES:
+    first = measure(render, 0)
+    total = 0
+    worst = 0
+    for tick in range(1, TICKS + 1):
+        used = measure(render, tick)
+        total += used
+        worst = max(worst, used)
+    average = total / TICKS
+    status = "ok" if average <= BUDGET_BYTES else "REGRESSION"
+    failed = failed or average > BUDGET_BYTES
+    print("{:8s} first {:6d} B  avg {:7.1f} B/tick  max {:6d} B  {}".format(
+        name, first, average, worst, status))
+
+print("-" * 50)
+print("FAIL" if failed else "PASS", "(budget {} B/tick)".format(BUDGET_BYTES))
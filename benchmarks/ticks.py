@@ -0,0 +1,353 @@
+"""
+Per-Tick Benchmarks
+===================
+
+Cost of one code.py main-loop iteration in each display mode (0-3) and of
+food_safety.update_state() in each of its five states.
+
+Every case runs TICKS ticks on simulated time (no sleeping between ticks)
+and reports per tick:
+- time: mean and worst wall time in microseconds
+- alloc: mean and worst bytes allocated
+- gc: garbage collections during the case
+- labels: label text/color writes issued
+- stale: ticks whose label writes never reached the display (host only)
+
+On a computer the firmware runs under the simulator (sim/). Allocations are
+measured with tracemalloc in a second pass, as the peak above the tick's
+starting memory: CPython frees most temporaries at once, so this is the
+tick's high-water mark rather than its total. On the CLUE allocations are
+gc.mem_alloc() deltas, and a delta that goes down counts as one collection.
+Compare numbers only within one platform.
+
+Results are checked against benchmarks/baseline.json, which keeps one set of
+results per platform ("host", "device"). Allocations and label writes do not
+depend on the machine: growing past the baseline fails. Any stale tick fails
+too: the simulated display skips late frames like the real one, so a refresh
+that drew nothing shows up here. Timings are only
+compared when the baseline came from the same machine (host name and CPU
+model), and even then a slower time is only a warning, since load and CPU
+frequency scaling move it from run to run.
+
+Computer:
+    python3 benchmarks/ticks.py                 # compare with the baseline
+    python3 benchmarks/ticks.py --save          # record a new baseline
+    python3 benchmarks/ticks.py --results device.json --save   # store CLUE results
+
+CLUE: copy code.py to CIRCUITPY as monitor.py (with its modules and
+food_safety.py), then copy this file there as code.py. The results are
+printed as one JSON line on the serial console; save it as device.json.
+"""
+
+import gc
+import json
+import sys
+import time
+
+TICKS = 50
+WARMUP_TICKS = 5  # Untimed ticks before each case (first-draw costs)
+TICK_SECONDS = 2  # Simulated time between ticks (UPDATE_INTERVAL)
+
+# Regression thresholds
+TIME_TOLERANCE = 0.25  # Mean time may grow 25% before a warning (same machine only)...
+TIME_SLACK_US = 5  # ...plus this many microseconds (timer noise)
+ALLOC_TOLERANCE = 0.10  # Mean allocation may grow 10%...
+ALLOC_SLACK = 64  # ...plus this many bytes
+
+ON_DEVICE = sys.implementation.name == "circuitpython"
+PLATFORM = "device" if ON_DEVICE else "host"
+BASELINE = "benchmarks/baseline.json"
+
+now_ns = time.monotonic_ns if ON_DEVICE else time.perf_counter_ns
+
+
+class Meter:
+    """Platform-specific allocation, GC and label-write counters."""
+
+    def __init__(self, simulation=None):
+        self.simulation = simulation
+        self.collections = 0
+        if not ON_DEVICE:
+            gc.callbacks.append(self._on_gc)
+
+    def _on_gc(self, phase, info):
+        if phase == "start":
+            self.collections += 1
+
+    def label_writes(self, module):
+        """Label writes so far (None when the platform cannot count them)."""
+        if self.simulation is not None:
+            return self.simulation.label_writes
+        counter = getattr(module, "label_updates", None)
+        return None if counter is None else counter.total_updates + counter.updates
+
+    def frames(self, module):
+        """Frames drawn so far (None unless the module refreshes its display by hand)."""
+        display = getattr(module, "display", None)
+        if self.simulation is None or display is None or display.auto_refresh:
+            return None
+        return self.simulation.refreshes
+
+    def wait(self, seconds):
+        """Let simulated time pass between ticks (the CLUE's clock runs by itself)."""
+        if self.simulation is not None:
+            self.simulation.clock.sleep(seconds)
+
+    def close(self):
+        if not ON_DEVICE:
+            gc.callbacks.remove(self._on_gc)
+
+
+def run_case(meter, module, setup, tick):
+    """Run one case and return its result dict."""
+    setup()
+    for i in range(WARMUP_TICKS):
+        meter.wait(TICK_SECONDS)
+        tick(i)
+
+    gc.collect()
+    collections = meter.collections
+    labels_before = meter.label_writes(module)
+    times = []
+    allocs = []
+    stale = None
+    for i in range(TICKS):
+        meter.wait(TICK_SECONDS)
+        labels = meter.label_writes(module)
+        frames = meter.frames(module)
+        if ON_DEVICE:
+            before_alloc = gc.mem_alloc()
+        start = now_ns()
+        tick(WARMUP_TICKS + i)
+        times.append(now_ns() - start)
+        if ON_DEVICE:
+            used = gc.mem_alloc() - before_alloc
+            if used < 0:
+                meter.collections += 1
+            else:
+                allocs.append(used)
+        if frames is not None:
+            # Labels changed but no frame was drawn
+            changed = meter.label_writes(module) != labels
+            stale = (stale or 0) + (changed and meter.frames(module) == frames)
+    labels_after = meter.label_writes(module)
+    collections = meter.collections - collections
+
+    if not ON_DEVICE:
+        # Second pass for allocations; tracemalloc would distort the timing
+        import tracemalloc
+        setup()
+        for i in range(WARMUP_TICKS):
+            meter.wait(TICK_SECONDS)
+            tick(i)
+        tracemalloc.start()
+        for i in range(TICKS):
+            meter.wait(TICK_SECONDS)
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+            tick(WARMUP_TICKS + i)
+            allocs.append(tracemalloc.get_traced_memory()[1] - base)
+        tracemalloc.stop()
+
+    labels = None
+    if labels_before is not None:
+        labels = round((labels_after - labels_before) / TICKS, 2)
+    return {
+        "ticks": TICKS,
+        "time_us": round(sum(times) / len(times) / 1000, 1),
+        "time_max_us": round(max(times) / 1000, 1),
+        "alloc_bytes": round(sum(allocs) / len(allocs), 1) if allocs else None,
+        "alloc_max_bytes": max(allocs) if allocs else None,
+        "gc_collections": collections,
+        "label_updates": labels,
+        "stale_frames": stale,
+    }
+
+
+def monitor_cases(monitor):
+    """(name, setup, tick) for each code.py display mode."""
+    # Two hours of history so Trends and Stats have full sparklines
+    history = monitor.sensor_history
+    if history.count(0) == 0:
+        for i in range(monitor.HISTORY_SIZE):
+            phase = (i % 40) / 40
+            history.append(21.0 + phase, 43.0 - 2 * phase, 1013.0 + phase)
+
+    clock = [0.0]
+
+    def make(mode):
+        def setup():
+            monitor.show_mode(mode)
+
+        def tick(i):
+            clock[0] += TICK_SECONDS
+            monitor.update(clock[0])
+        return setup, tick
+
+    names = ("main", "trends", "stats", "food_safety")
+    return [("monitor_" + names[mode],) + make(mode) for mode in range(4)]
+
+
+def food_safety_cases(fs):
+    """(name, setup, tick) for each food_safety.py state."""
+    clock = [0.0]
+    fs.clock = lambda: clock[0]
+
+    cases = (
+        ("initial", fs.STATE_INITIAL, 15.0),
+        ("safe", fs.STATE_SAFE, 2.0),
+        ("warning", fs.STATE_WARNING, 6.0),
+        ("discard", fs.STATE_DISCARD, 8.0),
+        ("charge", fs.STATE_CHARGE, 22.0),
+    )
+
+    def make(state, temp):
+        def setup():
+            clock[0] = 3600.0
+            machine = fs.machine
+            machine.state = state
+            machine.fridge_entry_time = 0.0 if state in (fs.STATE_SAFE, fs.STATE_WARNING) else None
+            machine.danger_zone_start = clock[0] if state == fs.STATE_WARNING else None
+            machine.total_danger_time = 0
+
+        def tick(i):
+            # Temperature changes every tick (worst case for the display)
+            clock[0] += TICK_SECONDS
+            fs.update_state(temp + (i % 10) * 0.01)
+        return setup, tick
+
+    return [("food_safety_" + name,) + make(state, temp) for name, state, temp in cases]
+
+
+def run_all(load, meter):
+    """Run every case; `load(name)` imports a firmware module."""
+    results = {}
+    for module_name, make_cases in (("monitor", monitor_cases), ("food_safety", food_safety_cases)):
+        module = load(module_name)
+        for name, setup, tick in make_cases(module):
+            results[name] = run_case(meter, module, setup, tick)
+            if ON_DEVICE:
+                print(name, results[name])
+        del module
+        gc.collect()
+    return results
+
+
+def compare(results, baseline, same_machine):
+    """Print a table against the baseline; return (regressed, slower) case names."""
+    regressions = []
+    slower = []
+    print("{:24s} {:>9s} {:>9s} {:>9s} {:>4s} {:>7s}".format(
+        "case", "time us", "base", "alloc B", "gc", "labels"))
+    for name, result in results.items():
+        base = baseline.get(name)
+        problems = []
+        note = ""
+        if result.get("stale_frames"):
+            problems.append("stale frames")
+        if base is not None:
+            if same_machine and result["time_us"] > base["time_us"] * (1 + TIME_TOLERANCE) + TIME_SLACK_US:
+                slower.append(name)
+                note = "slower"
+            if (result["alloc_bytes"] is not None and base["alloc_bytes"] is not None and
+                    result["alloc_bytes"] > base["alloc_bytes"] * (1 + ALLOC_TOLERANCE) + ALLOC_SLACK):
+                problems.append("alloc")
+            if (result["label_updates"] is not None and base["label_updates"] is not None and
+                    result["label_updates"] > base["label_updates"]):
+                problems.append("labels")
+        if problems:
+            regressions.append(name)
+            note = "REGRESSION: " + ", ".join(problems) + (" (slower)" if note else "")
+        print("{:24s} {:9.1f} {:>9s} {:9.1f} {:4d} {:>7s} {}".format(
+            name, result["time_us"], "-" if base is None else "{:.1f}".format(base["time_us"]),
+            result["alloc_bytes"] or 0.0, result["gc_collections"],
+            "-" if result["label_updates"] is None else str(result["label_updates"]),
+            note))
+    return regressions, slower
+
+
+def host_machine():
+    """Host name, CPU model and Python version of this computer."""
+    import platform
+
+    cpu = platform.processor() or platform.machine()
+    try:
+        with open("/proc/cpuinfo") as f:
+            for line in f:
+                if line.startswith("model name"):
+                    cpu = line.split(":", 1)[1].strip()
+                    break
+    except OSError:
+        pass
+    return "{} / {} / Python {}".format(platform.node(), cpu, platform.python_version())
+
+
+def host_main(argv=None):
+    import argparse
+    import os
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    sys.path.insert(0, root)
+    from sim import Simulation, traces
+
+    parser = argparse.ArgumentParser(description="Per-tick benchmarks")
+    parser.add_argument("--save", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--baseline", default=os.path.join(root, BASELINE))
+    parser.add_argument("--results", help="use saved results (e.g. from the CLUE) instead of running")
+    args = parser.parse_args(argv)
+
+    machine = host_machine()
+    if args.results:
+        with open(args.results) as f:
+            report = json.load(f)
+    else:
+        # Self-heating off: the board warming up would drift the readings
+        simulation = Simulation(traces.room(), quiet=True, self_heating=False)
+        with simulation:
+            meter = Meter(simulation)
+            try:
+                results = run_all(lambda name: simulation.load(
+                    os.path.join(root, "code.py" if name == "monitor" else name + ".py")), meter)
+            finally:
+                meter.close()
+        report = {"platform": PLATFORM, "machine": machine, "results": results}
+
+    try:
+        with open(args.baseline) as f:
+            baselines = json.load(f)
+    except OSError:
+        baselines = {}
+    baseline = baselines.get(report["platform"], {})
+    same_machine = baseline.get("machine") == report["machine"]
+    regressions, slower = compare(report["results"], baseline.get("results", {}), same_machine)
+    if baseline and not same_machine:
+        print("(timings not compared: baseline is from {})".format(baseline.get("machine")))
+
+    if args.save:
+        baselines[report["platform"]] = report
+        with open(args.baseline, "w") as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print("Baseline saved to", args.baseline)
+        return 0
+    if slower:
+        print("Warning: slower than the baseline:", ", ".join(slower))
+    if regressions:
+        print("FAIL:", ", ".join(regressions))
+        return 1
+    print("PASS")
+    return 0
+
+
+def device_main():
+    meter = Meter()
+    results = run_all(__import__, meter)
+    print(json.dumps({"platform": PLATFORM, "machine": sys.implementation._machine,
+                      "results": results}))
+
+
+if __name__ == "__main__":
+    if ON_DEVICE:
+        device_main()
+    else:
+        sys.exit(host_main())
@@ -0,0 +1,28 @@
+"""
+Boot configuration for the CLUE Environmental Monitor
+
+Hold Button A while pressing reset to let code.py and food_safety.py write
+their sensor logs (datalog.py) to the CIRCUITPY drive. While logging is
+enabled the drive is read-only from the computer; reset normally to edit
+files again.
+
+It also enables the second USB serial port (usb_cdc.data) that the binary
+telemetry mode of code.py and the weather station writes to (telemetry.py).
+"""
+
+import board
+import digitalio
+import storage
+import usb_cdc
+
+button_a = digitalio.DigitalInOut(board.BUTTON_A)
+button_a.switch_to_input(pull=digitalio.Pull.UP)
+
+# Button A pulls the pin low when pressed
+logging_enabled = not button_a.value
+button_a.deinit()
+
+storage.remount("/", readonly=not logging_enabled)
+
+# REPL and print() on the console port, telemetry frames on the data port
+usb_cdc.enable(console=True, data=True)
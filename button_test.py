@@ -1,32 +1,37 @@
 """
 Simple button test for CLUE
-Tests if Button A and Button B work
+Tests Button A and Button B press, long-press and double-press events
+(uses buttons.py - copy it to CIRCUITPY too)
 """
 
 import time
+import board
 from adafruit_clue import clue
+from buttons import ButtonEvents, EVENT_NAMES, release_clue_buttons
 
 print("Button Test Starting...")
-print("Press Button A (left) or Button B (right)")
+print("Press, hold or double-press Button A (left) or Button B (right)")
 print("Press both together to exit")
 print("-" * 40)
 
 clue.pixel.brightness = 0.3
 
+release_clue_buttons(clue)
+buttons = ButtonEvents((board.BUTTON_A, board.BUTTON_B), double_press_keys=(0, 1))
+BUTTON_NAMES = ("A", "B")
+BUTTON_COLORS = ((0, 255, 0), (0, 0, 255))
+
 while True:
-    if clue.button_a and clue.button_b:
+    event = buttons.wait(time.monotonic() + 1)
+
+    if buttons.is_down(0) and buttons.is_down(1):
         print("Both buttons pressed - exiting")
         clue.pixel.fill((255, 0, 0))
         break
 
-    if clue.button_a:
-        print("Button A pressed!")
-        clue.pixel.fill((0, 255, 0))
+    if event is not None:
+        key, kind = event
+        print(f"Button {BUTTON_NAMES[key]}: {EVENT_NAMES[kind]}")
+        clue.pixel.fill(BUTTON_COLORS[key])
         time.sleep(0.2)
-
-    if clue.button_b:
-        print("Button B pressed!")
-        clue.pixel.fill((0, 0, 255))
-        time.sleep(0.2)
-
-    time.sleep(0.05)
+        clue.pixel.fill((0, 0, 0))
@@ -0,0 +1,171 @@
+"""
+Event-Driven Button Input
+=========================
+
+Press, long-press and double-press events for the CLUE buttons, built on
+keypad.Keys.
+
+keypad scans the pins in the background with hardware-timed debouncing and
+queues every transition with a timestamp, so presses shorter than the main
+loop's sleep are never missed. ButtonEvents turns those transitions into
+gestures, and wait() lets a main loop sleep until the next sensor deadline
+or the next button event, whichever comes first.
+
+While no gesture is in progress wait() light-sleeps
+(alarm.light_sleep_until_alarms) with a time alarm for the deadline and a
+pin alarm per button. keypad gives up the pins for the sleep and takes them
+back on wake, when it reports the press that woke the board; a tap released
+within the few milliseconds that takes can be missed. Only while a button
+is held or a click waits for its partner does wait() poll, every
+`poll_interval` seconds, to time long and double presses.
+
+adafruit_clue claims the button pins when `clue` is created, so call
+release_clue_buttons(clue) before creating ButtonEvents for them.
+"""
+
+import time
+import alarm
+import keypad
+import supervisor
+
+PRESS = 0
+LONG_PRESS = 1
+DOUBLE_PRESS = 2
+
+EVENT_NAMES = ("press", "long press", "double press")
+
+_TICKS_PERIOD = 1 << 29  # supervisor.ticks_ms() wraps at 2**29
+_TICKS_HALF = _TICKS_PERIOD // 2
+
+
+def _ticks_diff(end, start):
+    """Milliseconds from `start` to `end`, allowing for tick wraparound."""
+    return ((end - start + _TICKS_HALF) % _TICKS_PERIOD) - _TICKS_HALF
+
+
+def release_clue_buttons(clue):
+    """Free the button pins that adafruit_clue claimed so keypad can use them."""
+    clue._a.deinit()
+    clue._b.deinit()
+
+
+class ButtonEvents:
+    """Gesture events for a set of active-low buttons.
+
+    Events are (key_number, kind) tuples, where key_number is the pin's
+    index in `pins` and kind is PRESS, LONG_PRESS or DOUBLE_PRESS. Only keys
+    listed in `double_press_keys` wait `double_press` seconds after a release
+    to look for a second press, so the other keys report PRESS immediately.
+    """
+
+    def __init__(self, pins, long_press=0.8, double_press=0.35,
+                 double_press_keys=(), debounce=0.02, poll_interval=0.02,
+                 light_sleep=True):
+        self._pins = pins
+        self._debounce = debounce
+        self._keys = self._make_keys()
+        self._event = keypad.Event()
+        self.long_press_ms = int(long_press * 1000)
+        self.double_press_ms = int(double_press * 1000)
+        self.poll_interval = poll_interval
+        self.light_sleep = light_sleep
+
+        count = len(pins)
+        self._double_keys = tuple(key in double_press_keys for key in range(count))
+        self._down_at = [None] * count  # Tick of the current press
+        self._long_sent = [False] * count
+        self._pending_at = [None] * count  # Release tick of a possible first click
+        self._second = [False] * count  # Current press is a second click
+        self._queue = []
+
+    def _make_keys(self):
+        return keypad.Keys(self._pins, value_when_pressed=False, pull=True,
+                           interval=self._debounce)
+
+    def is_down(self, key):
+        """True while `key` is held down."""
+        return self._down_at[key] is not None
+
+    def _transition(self, key, pressed, timestamp):
+        """Update gesture state for one debounced key transition."""
+        if pressed:
+            pending = self._pending_at[key]
+            self._second[key] = (pending is not None and
+                                 _ticks_diff(timestamp, pending) <= self.double_press_ms)
+            self._down_at[key] = timestamp
+            self._long_sent[key] = False
+            return
+
+        self._down_at[key] = None
+        if self._long_sent[key]:
+            return
+        if self._second[key]:
+            self._second[key] = False
+            self._pending_at[key] = None
+            self._queue.append((key, DOUBLE_PRESS))
+        elif self._double_keys[key]:
+            self._pending_at[key] = timestamp
+        else:
+            self._queue.append((key, PRESS))
+
+    def poll(self):
+        """Return the next event, or None if there is none yet."""
+        event = self._event
+        while self._keys.events.get_into(event):
+            self._transition(event.key_number, event.pressed, event.timestamp)
+
+        now = supervisor.ticks_ms()
+        for key in range(len(self._down_at)):
+            down_at = self._down_at[key]
+            if down_at is not None:
+                if not self._long_sent[key] and _ticks_diff(now, down_at) >= self.long_press_ms:
+                    # A long hold overrides any click waiting for its partner
+                    self._long_sent[key] = True
+                    self._second[key] = False
+                    self._pending_at[key] = None
+                    self._queue.append((key, LONG_PRESS))
+            elif (self._pending_at[key] is not None and
+                  _ticks_diff(now, self._pending_at[key]) > self.double_press_ms):
+                self._pending_at[key] = None
+                self._queue.append((key, PRESS))
+
+        if self._queue:
+            return self._queue.pop(0)
+        return None
+
+    def in_gesture(self):
+        """True while a button is held or a click waits for its partner."""
+        for key in range(len(self._down_at)):
+            if self._down_at[key] is not None or self._pending_at[key] is not None:
+                return True
+        return False
+
+    def _sleep_until(self, deadline):
+        """Light-sleep until `deadline` or a button press."""
+        self._keys.deinit()  # PinAlarm needs the pins
+        alarms = [alarm.pin.PinAlarm(pin, value=False, pull=True) for pin in self._pins]
+        alarm.light_sleep_until_alarms(alarm.time.TimeAlarm(monotonic_time=deadline), *alarms)
+        # The alarms release the pins on wake; a held button shows up as a
+        # press at keypad's first scan
+        self._keys = self._make_keys()
+
+    def wait(self, deadline):
+        """Sleep until the next event or `deadline` (a time.monotonic() value).
+
+        Returns the event, or None if the deadline passed first.
+        """
+        while True:
+            event = self.poll()
+            if event is not None:
+                return event
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            if not self.light_sleep or self.in_gesture() or self._keys.events:
+                time.sleep(min(remaining, self.poll_interval))
+            else:
+                self._sleep_until(deadline)
+
+    def deinit(self):
+        """Release the button pins."""
+        self._keys.deinit()
@@ -2,8 +2,15 @@
 Interactive Temperature Calibration for CLUE
 ==============================================
 
-This script reads the RAW temperature from the sensor and helps you
-calculate the exact offset needed.
+This script reads the RAW temperature and humidity from the sensors until
+both have settled (no drift, small standard error), lets you dial in your
+reference readings with the buttons, and stores them as
+calibration points in /calibration.json (see calibration.py). code.py and
+food_safety.py pick them up at the next start; no code edits needed.
+
+Calibrate at two temperatures (e.g. in the fridge near 4C and in the room)
+and both readings become accurate. Hold Button A at reset so the script
+can write to CIRCUITPY (see boot.py).
 """
 
 import time
@@ -12,6 +19,22 @@ import displayio
 import terminalio
 from adafruit_clue import clue
 from adafruit_display_text import label
+from buttons import ButtonEvents, PRESS, LONG_PRESS, release_clue_buttons
+from calibration import add_point, Settling, CALIBRATION_FILE
+
+# Starting reference values; adjust them on the CLUE with the buttons
+TARGET_TEMP = 27.5
+TARGET_HUMIDITY = 43.3
+
+# Capture: sample until the last SETTLE_WINDOW samples are steady (drift and
+# standard error below these limits, see calibration.Settling)
+SAMPLE_INTERVAL = 2  # Seconds
+SETTLE_WINDOW = 30  # Samples (1 minute)
+TEMP_MAX_STDERR = 0.02  # C
+TEMP_MAX_DRIFT = 0.05  # C per minute
+HUMIDITY_MAX_STDERR = 0.1  # %RH
+HUMIDITY_MAX_DRIFT = 0.2  # %RH per minute
+MAX_MINUTES = 30  # Give up waiting and use the current averages
 
 # Setup display
 display = board.DISPLAY
@@ -52,28 +75,43 @@ print("=" * 60)
 print("CLUE TEMPERATURE CALIBRATION")
 print("=" * 60)
 print()
-print("Your reference thermometer shows: 27.5°C")
-print("Reading CLUE raw sensor value...")
+print("Reading CLUE raw sensor values...")
 print()
-print("Waiting 5 seconds for sensor to stabilize...")
-time.sleep(5)
+print("Sampling until temperature and humidity settle...")
 
-# Target reference temperature
-TARGET_TEMP = 27.5
 
-# Take multiple readings and average them
-readings = []
-print("Taking 10 readings over 20 seconds...")
-for i in range(10):
+def describe(settling, unit):
+    """Mean, 95% interval and drift of a capture for the console."""
+    interval = settling.interval()
+    if interval is None:
+        return f"{settling.mean:.2f}{unit}"
+    return f"{settling.mean:.2f} +/-{interval:.3f}{unit} drift {settling.slope * 60:+.3f}{unit}/min"
+
+
+temp_settling = Settling(SETTLE_WINDOW, TEMP_MAX_STDERR, TEMP_MAX_DRIFT)
+humidity_settling = Settling(SETTLE_WINDOW, HUMIDITY_MAX_STDERR, HUMIDITY_MAX_DRIFT)
+start = time.monotonic()
+i = 0
+while True:
+    now = time.monotonic()
     raw_temp = clue.temperature
-    readings.append(raw_temp)
+    temp_ready = temp_settling.update(now, raw_temp)
+    humidity_ready = humidity_settling.update(now, clue.humidity)
 
     # Update display
     raw_label.text = f"Raw: {raw_temp:.1f}C"
-    offset = TARGET_TEMP - raw_temp
-    offset_label.text = f"Offset: {offset:.1f}C"
-
-    print(f"Reading {i+1}/10: {raw_temp:.1f}C  (Offset would be: {offset:.1f}C)")
+    offset_label.text = f"Drift: {temp_settling.slope * 60:+.2f}C/m"
+    inst_label.text = f"Settling... {now - start:.0f}s"
+
+    if i % 5 == 0:
+        print(f"[{now - start:5.0f}s] T {describe(temp_settling, 'C')}  "
+              f"RH {describe(humidity_settling, '%')}")
+    if temp_ready and humidity_ready:
+        print(f"Settled after {now - start:.0f}s")
+        break
+    if now - start >= MAX_MINUTES * 60:
+        print(f"Not settled after {MAX_MINUTES} minutes; using the current averages")
+        break
 
     # Flash LED
     if i % 2 == 0:
@@ -81,31 +119,80 @@ for i in range(10):
     else:
         clue.pixel.fill((0, 100, 0))
 
-    time.sleep(2)
-
-# Calculate average
-avg_raw = sum(readings) / len(readings)
-calculated_offset = TARGET_TEMP - avg_raw
+    i += 1
+    time.sleep(SAMPLE_INTERVAL)
 
 print()
 print("=" * 60)
-print("CALIBRATION RESULTS")
+print("AVERAGE RAW READINGS")
 print("=" * 60)
-print(f"Average RAW reading:  {avg_raw:.2f}°C")
-print(f"Target temperature:   {TARGET_TEMP:.2f}°C")
-print(f"Calculated offset:    {calculated_offset:.2f}°C")
+print(f"Temperature: {describe(temp_settling, '°C')}")
+print(f"Humidity:    {describe(humidity_settling, '%')}")
 print("=" * 60)
 print()
-print("UPDATE YOUR CODE:")
-print(f"Set TEMP_OFFSET = {calculated_offset:.1f}")
+
+# Reference values are entered with the buttons
+release_clue_buttons(clue)
+buttons = ButtonEvents((board.BUTTON_A, board.BUTTON_B))
+
+
+def enter_reference(name, unit, raw, reference):
+    """Let the user set the reference with the buttons; None to skip."""
+    raw_label.text = f"Raw: {raw:.1f}{unit}"
+    inst_label.text = "A:-0.1 B:+0.1 Hold B:save\nHold A: skip"
+    print(f"Set the {name} reference: A = -0.1, B = +0.1, hold B to save, hold A to skip")
+    while True:
+        target_label.text = f"Ref: {reference:.1f}{unit}"
+        offset_label.text = f"Offset: {reference - raw:+.1f}{unit}"
+        event = buttons.wait(time.monotonic() + 1)
+        if event is None:
+            continue
+        key, kind = event
+        if kind == PRESS:
+            reference += 0.1 if key == 1 else -0.1
+        elif kind == LONG_PRESS:
+            return reference if key == 1 else None
+
+
+def save(quantity, unit, raw, interval, reference):
+    """Store one calibration point and show the resulting table."""
+    try:
+        points = add_point(quantity, raw, reference)
+    except OSError as e:
+        print(f"Could not write {CALIBRATION_FILE}: {e}")
+        print("Hold Button A at reset to make CIRCUITPY writable, then run again.")
+        print(f"(Offset for manual use: {reference - raw:+.2f}{unit})")
+        inst_label.text = "Read-only! Hold A\nat reset, run again"
+        clue.pixel.fill((255, 0, 0))
+        return False
+    print(f"Saved {quantity} point: raw {raw:.2f} -> {reference:.2f}{unit}, "
+          f"offset {reference - raw:+.2f} +/-{interval:.3f}{unit} (95%)")
+    print(f"{quantity.capitalize()} table (raw, reference): {points}")
+    return True
+
+
+saved = []
+for quantity, unit, settling, reference in (("temperature", "C", temp_settling, TARGET_TEMP),
+                                             ("humidity", "%", humidity_settling, TARGET_HUMIDITY)):
+    raw = settling.mean
+    title.text = quantity.capitalize()[:11]
+    clue.pixel.fill((255, 165, 0))
+    reference = enter_reference(quantity, unit, raw, reference)
+    if reference is None:
+        print(f"Skipped {quantity}")
+        continue
+    if not save(quantity, unit, raw, settling.interval(), reference):
+        break
+    saved.append(quantity)
+
 print()
 print("=" * 60)
-
-# Update display with final results
-raw_label.text = f"Raw: {avg_raw:.1f}C"
-offset_label.text = f"Set: {calculated_offset:.1f}C"
-inst_label.text = f"TEMP_OFFSET = {calculated_offset:.1f}"
-clue.pixel.fill((0, 0, 255))
+if saved:
+    print(f"Calibration saved to {CALIBRATION_FILE}: {', '.join(saved)}")
+    print("Restart code.py or food_safety.py to use it.")
+    inst_label.text = "Saved. Restart the\nmonitor to use it"
+    clue.pixel.fill((0, 0, 255))
+print("=" * 60)
 
 # Keep displaying results
 while True:
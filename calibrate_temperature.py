@@ -6,12 +6,15 @@ This interactive script helps you calibrate your CLUE's temperature sensor.
 
 Instructions:
 1. Place CLUE and a reference thermometer side-by-side
-2. Wait 10-15 minutes for thermal stabilization
-3. Run this script
-4. Enter the reference temperature when prompted
-5. The script will calculate and display the calibration offset
+2. Run this script; it samples until the reading has settled (no drift and a
+   small standard error, see calibration.Settling), however long the
+   thermal equilibrium takes. Ctrl-C stops waiting early.
+3. Enter the reference temperature when prompted; the point is saved to
+   /calibration.json (see calibration.py) and used by code.py and
+   food_safety.py at their next start
 
 Note: This requires serial console connection (screen, picocom, or Mu editor)
+and a writable CIRCUITPY to save (hold Button A at reset, see boot.py)
 """
 
 import time
@@ -21,6 +24,12 @@ import terminalio
 from adafruit_clue import clue
 from adafruit_display_text import label
 import supervisor
+from calibration import add_point, Settling, CALIBRATION_FILE
+
+SAMPLE_INTERVAL = 2  # Seconds
+SETTLE_WINDOW = 30  # Samples the settling checks look at (1 minute)
+MAX_STDERR = 0.02  # C, standard error of the window's mean
+MAX_DRIFT = 0.05  # C per minute
 
 print("=" * 60)
 print("ADAFRUIT CLUE - TEMPERATURE CALIBRATION HELPER")
@@ -57,109 +66,83 @@ screen.append(instruction_label)
 clue.pixel.brightness = 0.2
 clue.pixel.fill((255, 100, 0))
 
-print("Step 1: Stabilization Period")
+print("Step 1: Settling")
 print("-" * 60)
-print("Letting the sensor stabilize for 15 seconds...")
-print("(In real calibration, wait 10-15 minutes)")
+print(f"Sampling every {SAMPLE_INTERVAL}s until the last {SETTLE_WINDOW} readings")
+print(f"drift less than {MAX_DRIFT}°C/min with a standard error below {MAX_STDERR}°C.")
+print("Press Ctrl-C to stop waiting and use the current average.")
 print()
 
-# Take some initial readings
-readings = []
-for i in range(15):
-    temp = clue.temperature
-    readings.append(temp)
-    temp_label.text = f"{temp:.1f}C"
-
-    if i < 5:
-        status_label.text = "Warming up..."
-    elif i < 10:
-        status_label.text = "Stabilizing..."
-    else:
-        status_label.text = "Almost ready..."
-
-    print(f"  Reading {i+1}/15: {temp:.1f}°C")
-    time.sleep(1)
-
-print()
-print("Stabilization complete!")
-print()
-
-# Calculate current average
-clue_temp = sum(readings[-5:]) / 5  # Average of last 5 readings
-
-print("=" * 60)
-print("Step 2: Reference Measurement")
-print("-" * 60)
-print()
-print(f"CLUE Temperature: {clue_temp:.2f}°C")
-print()
-print("Now, please:")
-print("1. Read your reference thermometer")
-print("2. Wait for this temperature to stabilize")
-print("3. Note the reference temperature")
-print()
-
-status_label.text = "Ready!"
-temp_label.text = f"{clue_temp:.1f}C"
-temp_label.color = 0x00FF00
-clue.pixel.fill((0, 255, 0))
-
-# Continuously display current temperature
-print("Current CLUE readings (updates every 5 seconds):")
-print("-" * 60)
-
-measurement_count = 0
-sum_measurements = 0
-
+settling = Settling(SETTLE_WINDOW, MAX_STDERR, MAX_DRIFT)
+start = time.monotonic()
+settled = False
 try:
     while True:
+        now = time.monotonic()
         current_temp = clue.temperature
+        settled = settling.update(now, current_temp)
         temp_label.text = f"{current_temp:.1f}C"
 
-        measurement_count += 1
-        sum_measurements += current_temp
-        avg_temp = sum_measurements / measurement_count
-
-        print(f"[{measurement_count:3d}] Current: {current_temp:.2f}°C  |  "
-              f"Average: {avg_temp:.2f}°C")
-
-        # Update display
-        status_label.text = f"Avg: {avg_temp:.1f}C"
-
-        # Check if user input is available (won't work in CircuitPython serial console)
-        # This is more for documentation - actual offset calculation needs to be done manually
-
-        time.sleep(5)
+        interval = settling.interval()
+        if settling.count < SETTLE_WINDOW:
+            status_label.text = "Warming up..."
+        else:
+            status_label.text = f"{settling.slope * 60:+.2f}C/min"
+
+        if settling.total % 5 == 1 or settled:
+            print(f"[{now - start:5.0f}s] Current: {current_temp:.2f}°C  |  "
+                  f"Average: {settling.mean:.2f}°C"
+                  + (f" +/-{interval:.3f}  drift {settling.slope * 60:+.3f}°C/min"
+                     if interval is not None else ""))
+        if settled:
+            break
+        time.sleep(SAMPLE_INTERVAL)
+except KeyboardInterrupt:
+    pass
 
-        # Provide periodic instructions
-        if measurement_count % 6 == 0:  # Every 30 seconds
-            print()
-            print("To calculate calibration offset:")
-            print(f"  OFFSET = (Your Reference Temperature) - {avg_temp:.2f}")
-            print(f"  Example: If reference shows 22.0°C: OFFSET = 22.0 - {avg_temp:.2f} = {22.0 - avg_temp:.2f}°C")
-            print()
-            print("Then edit code.py and set:")
-            print(f"  TEMP_OFFSET = {22.0 - avg_temp:.2f}  # Replace 22.0 with your actual reference")
-            print()
-            print("-" * 60)
+avg_temp = settling.mean
+interval = settling.interval()
 
-except KeyboardInterrupt:
-    print()
-    print("=" * 60)
-    print("Calibration Helper Stopped")
-    print("=" * 60)
-    print()
-    print(f"Final average CLUE temperature: {avg_temp:.2f}°C")
-    print()
-    print("To complete calibration:")
-    print("1. Note your reference thermometer reading")
-    print(f"2. Calculate: OFFSET = (Reference Temp) - {avg_temp:.2f}")
-    print("3. Edit code.py and update TEMP_OFFSET with your calculated value")
-    print()
-    status_label.text = "Stopped"
+print()
+print("=" * 60)
+if settled:
+    print(f"Settled after {time.monotonic() - start:.0f}s")
+    status_label.text = "Settled!"
+    temp_label.color = 0x00FF00
+    clue.pixel.fill((0, 255, 0))
+else:
+    print("Stopped before the reading settled; the offset may be off")
+    status_label.text = "Not settled"
     temp_label.color = 0xFF0000
     clue.pixel.fill((255, 0, 0))
+print("=" * 60)
+print()
+print(f"CLUE Temperature: {avg_temp:.2f}°C"
+      + (f" +/-{interval:.3f}°C (95%)" if interval is not None else ""))
+temp_label.text = f"{avg_temp:.1f}C"
+print()
 
+print("Step 2: Reference Measurement")
+print("-" * 60)
+try:
+    entry = input("Reference thermometer reading in °C (Enter to skip): ")
+except (EOFError, KeyboardInterrupt):
+    entry = ""
+if entry.strip():
+    try:
+        reference = float(entry)
+        points = add_point("temperature", avg_temp, reference)
+        print(f"Saved to {CALIBRATION_FILE}: raw {avg_temp:.2f} -> {reference:.2f}°C")
+        if interval is not None:
+            print(f"Offset: {reference - avg_temp:+.2f} +/-{interval:.3f}°C (95%, CLUE side only)")
+        print(f"Temperature table (raw, reference): {points}")
+        status_label.text = "Saved"
+        clue.pixel.fill((0, 0, 255))
+    except ValueError:
+        print(f"Not a number: {entry}")
+    except OSError as e:
+        print(f"Could not write {CALIBRATION_FILE}: {e}")
+        print("Hold Button A at reset to make CIRCUITPY writable, then run again.")
 print()
 print("Calibration examples:")
 print("-" * 60)
@@ -0,0 +1,296 @@
+"""
+Sensor Calibration Tables
+=========================
+
+Per-device correction curves for temperature and humidity, kept in
+/calibration.json on CIRCUITPY instead of offsets in the source.
+
+Each curve is a list of (raw reading, reference reading) points. Between
+points the correction is interpolated linearly; outside them the offset of
+the nearest point is kept, so a single point behaves like the old fixed
+offset. Segment slopes are computed once when the file is loaded, so a
+correction costs a short scan and one multiply-add.
+
+    {"device": "<cpu uid>",
+     "temperature": [[6.1, 4.0], [31.0, 27.5]],
+     "humidity": [[38.1, 43.3]]}
+
+The calibration scripts add points with add_point() (CIRCUITPY must be
+writable: hold Button A at reset, see boot.py). A point within
+MERGE_DISTANCE of an existing one replaces it. The file is only used on
+the board it was made on; a file copied from another CLUE is ignored.
+add_point() writes a temporary file and renames it over the old one, so a
+reset during a write leaves the old or the new tables. A file that still
+cannot be read (e.g. edited by hand) is ignored with a warning, and the
+built-in offsets are used.
+
+    calibration = load_calibration(CALIBRATION_FILE, TEMP_OFFSET, HUMIDITY_OFFSET)
+    temperature = calibration.temperature(sampler.temperature)
+
+Settling decides when a reading is steady enough to calibrate against.
+It fits a line through the last `window` samples with Welford-style running
+sums (updated as samples enter and leave the window) and reports the mean,
+the drift (slope) and the standard error of the mean. It has converged once
+the window is full, the drift is below `max_drift` per minute and the
+standard error below `max_stderr`.
+
+    settling = Settling(window=60, max_stderr=0.02, max_drift=0.05)
+    while not settling.update(time.monotonic(), clue.temperature):
+        time.sleep(2)
+    print(settling.mean, "+/-", settling.interval())
+"""
+
+import json
+import math
+import os
+from array import array
+
+CALIBRATION_FILE = "/calibration.json"
+QUANTITIES = ("temperature", "humidity")
+MERGE_DISTANCE = {"temperature": 2.0, "humidity": 5.0}  # Raw units
+
+
+def device_id():
+    """This board's unique ID as hex, or None where there is none."""
+    try:
+        import microcontroller
+        return "".join("{:02x}".format(b) for b in microcontroller.cpu.uid)
+    except (ImportError, AttributeError):
+        return None
+
+
+class Curve:
+    """Piecewise-linear correction through (raw, reference) points."""
+
+    def __init__(self, points=(), default_offset=0.0):
+        points = sorted((float(raw), float(reference)) for raw, reference in points)
+        self.points = points
+        self.default_offset = default_offset  # Used when there are no points
+        count = len(points)
+        self._raw = array("f", [raw for raw, _ in points])
+        self._offset = array("f", [reference - raw for raw, reference in points])
+        self._slope = array("f", [0.0] * max(0, count - 1))
+        for i in range(count - 1):
+            span = points[i + 1][0] - points[i][0]
+            if span > 0:
+                self._slope[i] = (self._offset[i + 1] - self._offset[i]) / span
+
+    def offset(self, raw):
+        """Correction to add to `raw`."""
+        table = self._raw
+        count = len(table)
+        if not count:
+            return self.default_offset
+        if raw <= table[0]:
+            return self._offset[0]
+        i = 1
+        while i < count and raw > table[i]:
+            i += 1
+        if i == count:
+            return self._offset[count - 1]
+        return self._offset[i - 1] + self._slope[i - 1] * (raw - table[i - 1])
+
+    def __call__(self, raw):
+        """Corrected value for `raw`."""
+        return raw + self.offset(raw)
+
+    def summary(self, unit):
+        """Short description for a status line, e.g. '+3.5C' or '3 pts'."""
+        if len(self.points) > 1:
+            return "{} pts".format(len(self.points))
+        return "{:+.1f}{}".format(self.offset(0.0), unit)
+
+
+class Calibration:
+    """Temperature and humidity curves for one device."""
+
+    def __init__(self, temperature=None, humidity=None, source=None):
+        self.temperature = temperature or Curve()
+        self.humidity = humidity or Curve()
+        self.source = source  # File the tables came from, None for defaults
+
+
+def read_tables(path):
+    """The tables in `path` as a dict; empty if there is no file or it is damaged."""
+    for name in (path, path + ".tmp"):  # The new file if a reset hit the rename
+        try:
+            with open(name) as f:
+                tables = json.load(f)
+        except OSError:
+            continue
+        except ValueError:
+            tables = None
+        if not isinstance(tables, dict):
+            print("Calibration in {} is damaged, using the built-in offsets".format(name))
+            return {}
+        return tables
+    return {}
+
+
+def load_calibration(path=CALIBRATION_FILE, temp_offset=0.0, humidity_offset=0.0):
+    """Calibration from `path`; the offsets apply where it has no points."""
+    tables = read_tables(path)
+    source = path
+    if tables.get("device") not in (None, device_id()):
+        print("Calibration in {} is from another board, ignored".format(path))
+        tables = {}
+    if not tables:
+        source = None
+    try:
+        return Calibration(Curve(tables.get("temperature", ()), temp_offset),
+                           Curve(tables.get("humidity", ()), humidity_offset), source)
+    except (TypeError, ValueError):
+        print("Calibration in {} is damaged, using the built-in offsets".format(path))
+        return Calibration(Curve((), temp_offset), Curve((), humidity_offset))
+
+
+def add_point(quantity, raw, reference, path=CALIBRATION_FILE):
+    """Store a (raw, reference) point for `quantity`; returns the new table.
+
+    Raises OSError if CIRCUITPY is read-only.
+    """
+    if quantity not in QUANTITIES:
+        raise ValueError("unknown quantity: " + quantity)
+    tables = read_tables(path)
+    device = device_id()
+    if tables.get("device") not in (None, device):
+        tables = {}  # Start over rather than mix in another board's points
+    distance = MERGE_DISTANCE[quantity]
+    points = [point for point in tables.get(quantity, ()) if abs(point[0] - raw) >= distance]
+    points.append([round(raw, 3), round(reference, 3)])
+    points.sort()
+    tables[quantity] = points
+    if device is not None:
+        tables["device"] = device
+    temporary = path + ".tmp"
+    with open(temporary, "w") as f:
+        json.dump(tables, f)
+    try:
+        os.rename(temporary, path)
+    except OSError:
+        # CircuitPython does not rename over an existing file
+        os.remove(path)
+        os.rename(temporary, path)
+    return points
+
+
+def t95(dof):
+    """Approximate two-sided 95% Student t value for `dof` degrees of freedom."""
+    if dof < 1:
+        return float("inf")
+    return 1.96 + 2.5 / dof + 3.0 / (dof * dof)  # Within 0.02 of the table from 4 up
+
+
+class Settling:
+    """Rolling mean, drift and standard error of a stream of readings."""
+
+    def __init__(self, window=60, max_stderr=0.02, max_drift=0.05):
+        self.window = max(3, window)
+        self.max_stderr = max_stderr  # Reading units
+        self.max_drift = max_drift  # Reading units per minute
+        self._times = array("f", [0.0] * self.window)
+        self._values = array("f", [0.0] * self.window)
+        self.reset()
+
+    def reset(self):
+        """Start again with no samples."""
+        self.count = 0  # Samples in the window
+        self.total = 0  # Samples seen since reset()
+        self.start = None  # Time of the first sample (times are kept relative to it)
+        self._next = 0
+        self._mean_t = 0.0
+        self._mean_v = 0.0
+        self._m2_t = 0.0  # Sum of squared time deviations
+        self._m2_v = 0.0  # Sum of squared value deviations
+        self._c_tv = 0.0  # Sum of time x value co-deviations
+
+    def _add(self, t, v):
+        """Welford update for a sample entering the window."""
+        self.count += 1
+        dt = t - self._mean_t
+        dv = v - self._mean_v
+        self._mean_t += dt / self.count
+        self._mean_v += dv / self.count
+        self._m2_t += dt * (t - self._mean_t)
+        self._m2_v += dv * (v - self._mean_v)
+        self._c_tv += dt * (v - self._mean_v)
+
+    def _remove(self, t, v):
+        """Reverse Welford update for a sample leaving the window."""
+        if self.count <= 1:
+            self.count = 0
+            self._mean_t = self._mean_v = 0.0
+            self._m2_t = self._m2_v = self._c_tv = 0.0
+            return
+        self.count -= 1
+        dt = t - self._mean_t
+        dv = v - self._mean_v
+        self._mean_t -= dt / self.count
+        self._mean_v -= dv / self.count
+        self._m2_t -= dt * (t - self._mean_t)
+        self._m2_v -= dv * (v - self._mean_v)
+        self._c_tv -= dt * (v - self._mean_v)
+
+    def _recompute(self):
+        """Rebuild the sums from the window to drop accumulated rounding."""
+        samples = [(self._times[i], self._values[i]) for i in range(self.count)]
+        self.count = 0
+        self._mean_t = self._mean_v = 0.0
+        self._m2_t = self._m2_v = self._c_tv = 0.0
+        for t, v in samples:
+            self._add(t, v)
+
+    def update(self, now, value):
+        """Add a reading taken at `now`; True once the readings have settled."""
+        if self.start is None:
+            self.start = now
+        t = now - self.start
+        if self.count == self.window:
+            slot = self._next
+            self._remove(self._times[slot], self._values[slot])
+        else:
+            slot = self.count
+        self._times[slot] = t
+        self._values[slot] = value
+        self._add(t, value)
+        self._next = (slot + 1) % self.window
+        self.total += 1
+        if self.total % self.window == 0:
+            self._recompute()
+        return self.converged
+
+    @property
+    def mean(self):
+        """Mean of the readings in the window."""
+        return self._mean_v if self.count else None
+
+    @property
+    def slope(self):
+        """Drift in reading units per second (0 until there are two samples)."""
+        if self._m2_t <= 0:
+            return 0.0
+        return self._c_tv / self._m2_t
+
+    @property
+    def stderr(self):
+        """Standard error of the mean around the fitted drift, or None."""
+        if self.count < 3:
+            return None
+        residual = self._m2_v
+        if self._m2_t > 0:
+            residual -= self._c_tv * self._c_tv / self._m2_t
+        return math.sqrt(max(0.0, residual) / (self.count - 2) / self.count)
+
+    @property
+    def converged(self):
+        """True when the window is full, steady and quiet enough."""
+        stderr = self.stderr
+        return (self.count == self.window and stderr is not None
+                and stderr <= self.max_stderr and abs(self.slope) * 60 <= self.max_drift)
+
+    def interval(self):
+        """Half-width of the 95% confidence interval of the mean, or None."""
+        stderr = self.stderr
+        if stderr is None:
+            return None
+        return t95(self.count - 2) * stderr
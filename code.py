@@ -3,16 +3,21 @@ Adafruit CLUE - Calibrated Environmental Monitor
 =================================================
 
 Features:
-- Temperature with calibration offset
+- Temperature and humidity calibrated from /calibration.json (see calibration.py)
 - Humidity monitoring
 - Pressure and altitude
-- Historical trending (2 hours)
+- Historical trending (2 hours, 24 hours, 7 days)
+- Persistent log on CIRCUITPY (hold Button A at reset, see boot.py)
+- Optional binary telemetry over USB serial (telemetry.py)
 - Visual feedback with color-coded warnings
 - Button controls for display modes
 
 Buttons:
 - Button A: Cycle through display modes
 - Button B: Toggle between Celsius and Fahrenheit
+            (in Trends view: cycle history range 2hr/24hr/7day)
+- Hold Button B: Cycle history range in any view
+- Hold Button A: Print main-loop timing profile to serial
 
 Author: Created for CLUE sensor project
 Date: November 2025
@@ -24,11 +29,23 @@ import displayio
 import terminalio
 from adafruit_clue import clue
 from adafruit_display_text import label
+from buttons import ButtonEvents, PRESS, LONG_PRESS, release_clue_buttons
+from history import TieredHistory
+from datalog import DataLog
+from views import GroupView, UpdateCounter
+from profiler import Profiler
+from sensors import Sampler
+from filters import Smoother, Dwell
+from calibration import load_calibration, CALIBRATION_FILE
 
 # ============================================
 # CONFIGURATION - ADJUST THESE VALUES
 # ============================================
 
+# Calibration: run calibrate_interactive.py or calibrate_temperature.py to
+# store correction points in /calibration.json (see calibration.py). These
+# offsets are only used while the file has no points for a sensor.
+
 # Temperature calibration offset (in Celsius)
 # Calibrated: 2025-11-01 - Reference 27.5C
 # Fine-tuned to match reference exactly
@@ -38,6 +55,14 @@ TEMP_OFFSET = -3.5  # Adjusted for 27.5°C display
 # Calibrated: 2025-11-01 - Reference 43.3%, CLUE reading 38.1%
 HUMIDITY_OFFSET = 5.2  # Humidity correction
 
+# Reference for altitude: today's sea-level pressure (hPa) from a local
+# weather report gives the true altitude; 1013.25 is the standard atmosphere
+SEA_LEVEL_PRESSURE = 1013.25
+
+# Sensor acquisition profile per display mode (Main, Trends, Stats, Food
+# Safety), see sensors.py: "fridge-lowpower", "room" or "weather-precision"
+MODE_PROFILES = ("room", "weather-precision", "room", "fridge-lowpower")
+
 # Update interval in seconds
 UPDATE_INTERVAL = 2  # Display updates every 2 seconds
 
@@ -47,6 +72,31 @@ LOG_INTERVAL = 60  # Log data point every minute
 # Historical data size (number of readings to keep)
 HISTORY_SIZE = 120  # 120 readings = 2 hours at 1-minute intervals
 
+# Downsampled history tiers: (points kept, previous-tier points per point)
+# 144 x 10-minute min/avg/max = 24 hours, 168 x hourly min/avg/max = 7 days
+HISTORY_ROLLUPS = ((144, 10), (168, 6))
+HISTORY_TIER_NAMES = ("2hr", "24hr", "7day")
+
+# Persistent sensor log (needs write access: hold Button A at reset)
+LOG_FILE = "/env_log.bin"
+LOG_CAPACITY = 10080  # 7 days at 1-minute intervals (~240 KB)
+LOG_BATCH = 10  # Records buffered in RAM per flash write
+
+# Binary telemetry: send each logged reading as a compact, CRC-checked frame
+# on the USB data port (enabled by boot.py) instead of printing a text line.
+# Decode on a computer with: python3 telemetry.py /dev/ttyACM1
+TELEMETRY = False
+
+# Buttons (debounced by keypad in the background)
+LONG_PRESS_TIME = 0.8  # Seconds held to count as a long press
+
+# Display refresh: label changes are batched into one refresh per tick
+MODE_SWITCH_BUDGET_MS = 250  # Max time from Button A press to new screen
+DEBUG_RENDER = False  # Print label writes and frame timing for every tick
+
+# Profiling: time main-loop sections; hold Button A to print p50/p95/max
+PROFILE = True
+
 # Comfort zone thresholds
 TEMP_MIN_COMFORT = 20.0  # Celsius
 TEMP_MAX_COMFORT = 24.0  # Celsius
@@ -57,14 +107,22 @@ HUMIDITY_MAX_COMFORT = 60.0  # Percentage
 # GLOBAL VARIABLES
 # ============================================
 
-# Historical data storage
-temp_history = [None] * HISTORY_SIZE
-humidity_history = [None] * HISTORY_SIZE
-pressure_history = [None] * HISTORY_SIZE
+# Historical data storage (raw minutes plus downsampled tiers, with
+# rolling statistics updated on every append)
+TEMP_CHANNEL = 0
+HUMIDITY_CHANNEL = 1
+PRESSURE_CHANNEL = 2
+sensor_history = TieredHistory(3, HISTORY_SIZE, HISTORY_ROLLUPS)
+history_tier = 0  # Tier shown by Trends and Stats views
+
+# One BMP280 and one SHT3x read per sample; altitude is derived from it.
+# The display mode's profile sets the sensor settings and sample interval.
+sampler = Sampler(clue._pressure, clue._humidity, SEA_LEVEL_PRESSURE)
+calibration = load_calibration(CALIBRATION_FILE, TEMP_OFFSET, HUMIDITY_OFFSET)
 
 # Tracking variables
-history_index = 0
 last_log_time = 0
+start_time = 0
 uptime_seconds = 0
 use_fahrenheit = False
 display_mode = 0  # 0: Main, 1: Trends, 2: Stats, 3: Food Safety
@@ -76,10 +134,28 @@ food_safety_state = 0  # 0: READY, 1: SAFE, 2: WARNING/CHECK
 fridge_entry_time = None
 FOOD_SAFE_TEMP = 4.0  # Celsius - FDA guideline
 ROOM_TEMP = 21.0  # Celsius - reset threshold
-
-# Button state tracking
-button_a_pressed = False
-button_b_pressed = False
+# State changes use the median of the last 5 samples, a 0.3C band below
+# FOOD_SAFE_TEMP to count as safe again, and must hold for 30 s (filters.py)
+FOOD_TEMP_MEDIAN = 5
+FOOD_TEMP_HYSTERESIS = 0.3
+FOOD_TRANSITION_DWELL = 30
+food_temp_filter = Smoother(FOOD_TEMP_MEDIAN)
+food_warming = Dwell(FOOD_TRANSITION_DWELL)
+food_cooling = Dwell(FOOD_TRANSITION_DWELL)
+food_at_room = Dwell(FOOD_TRANSITION_DWELL)
+
+# Main-loop profiling (see profiler.py)
+profiler = Profiler(("tick", "sensors", "log", "render", "refresh", "buttons"), PROFILE)
+PROFILE_TICK = profiler.section("tick")
+PROFILE_SENSORS = profiler.section("sensors")
+PROFILE_LOG = profiler.section("log")
+PROFILE_RENDER = profiler.section("render")
+PROFILE_REFRESH = profiler.section("refresh")
+PROFILE_BUTTONS = profiler.section("buttons")
+
+# Frame tracking (manual refresh)
+frame_dirty = True  # Root group changed - next tick must refresh
+mode_switch_ns = None  # When the pending mode switch was pressed
 
 # ============================================
 # DISPLAY SETUP
@@ -87,6 +163,17 @@ button_b_pressed = False
 
 display = board.DISPLAY
 display.brightness = 0.7  # Adjust brightness (0.0 to 1.0)
+display.auto_refresh = False  # Refresh once per tick in commit_frame()
+
+# ============================================
+# BUTTON SETUP
+# ============================================
+
+# Hand the button pins from adafruit_clue to keypad for event scanning
+BUTTON_A = 0
+BUTTON_B = 1
+release_clue_buttons(clue)
+buttons = ButtonEvents((board.BUTTON_A, board.BUTTON_B), long_press=LONG_PRESS_TIME)
 
 # Create display groups for different modes
 main_group = displayio.Group()
@@ -96,6 +183,7 @@ stats_group = displayio.Group()
 
 # Start with main display
 display.root_group = main_group
+sampler.use(MODE_PROFILES[0])
 
 # ============================================
 # HELPER FUNCTIONS
@@ -106,15 +194,12 @@ def celsius_to_fahrenheit(celsius):
     return celsius * 9/5 + 32
 
 def get_calibrated_temperature():
-    """Get temperature with calibration offset applied."""
-    raw_temp = clue.temperature
-    calibrated_temp = raw_temp + TEMP_OFFSET
-    return calibrated_temp
+    """Get the latest sample's temperature with calibration applied."""
+    return calibration.temperature(sampler.temperature)
 
 def get_calibrated_humidity():
-    """Get humidity with calibration offset applied."""
-    raw_humidity = clue.humidity
-    calibrated_humidity = raw_humidity + HUMIDITY_OFFSET
+    """Get the latest sample's humidity with calibration applied."""
+    calibrated_humidity = calibration.humidity(sampler.humidity)
     # Clamp to valid range 0-100%
     return max(0, min(100, calibrated_humidity))
 
@@ -136,19 +221,13 @@ def get_humidity_color(humidity):
     else:
         return 0x00FF00  # Green - comfortable
 
-def calculate_trend(data):
-    """Calculate trend from historical data."""
-    valid_data = [d for d in data if d is not None]
-    if len(valid_data) < 2:
+def calculate_trend(stats):
+    """Calculate trend from rolling statistics."""
+    # Recent half average minus older half average
+    diff = stats.trend()
+    if diff is None:
         return "Insufficient data"
 
-    # Compare recent average to older average
-    mid_point = len(valid_data) // 2
-    old_avg = sum(valid_data[:mid_point]) / mid_point
-    new_avg = sum(valid_data[mid_point:]) / len(valid_data[mid_point:])
-
-    diff = new_avg - old_avg
-
     if abs(diff) < 0.2:  # Within 0.2 units - stable
         return "Stable"
     elif diff > 0:
@@ -156,13 +235,9 @@ def calculate_trend(data):
     else:
         return f"Falling {diff:.1f}"
 
-def get_stats(data):
-    """Calculate min, max, and average from historical data."""
-    valid_data = [d for d in data if d is not None]
-    if not valid_data:
-        return None, None, None
-
-    return min(valid_data), max(valid_data), sum(valid_data) / len(valid_data)
+def get_stats(stats):
+    """Return min, max, and average from rolling statistics."""
+    return stats.minimum, stats.maximum, stats.mean
 
 def format_uptime(seconds):
     """Format uptime as human-readable string."""
@@ -177,60 +252,115 @@ def format_uptime(seconds):
     else:
         return f"{secs}s"
 
+def flash_pixel(color):
+    """Briefly flash the NeoPixel to acknowledge a button press."""
+    clue.pixel.fill(color)
+    time.sleep(0.1)
+    clue.pixel.fill((0, 255, 0))
+
+def show_mode(mode):
+    """Show display mode `mode` (0-3) on the next frame."""
+    global display_mode, frame_dirty
+
+    frame_dirty = True
+    display_mode = mode
+    sampler.use(MODE_PROFILES[mode])
+
+    # Set the appropriate display group
+    if display_mode == 0:
+        display.root_group = main_group
+        print("Display mode: Main")
+    elif display_mode == 1:
+        display.root_group = trends_group
+        print("Display mode: Trends")
+    elif display_mode == 2:
+        display.root_group = stats_group
+        print("Display mode: Statistics")
+    elif display_mode == 3:
+        display.root_group = main_group
+        print("Display mode: Food Safety")
+        # Samples were not filtered while another mode was shown
+        food_temp_filter.reset()
+        food_warming.reset()
+        food_cooling.reset()
+        food_at_room.reset()
+
 def handle_mode_switch():
-    """Handle display mode cycling - eliminates code duplication."""
-    global display_mode, button_a_pressed
-
-    if clue.button_a and not button_a_pressed:
-        button_a_pressed = True
-        display_mode = (display_mode + 1) % 4  # 4 modes: Main, Trends, Stats, Food Safety
-        print(f"Mode switch: {display_mode}")
-
-        # Set the appropriate display group
-        if display_mode == 0:
-            display.root_group = main_group
-            print("Display mode: Main")
-        elif display_mode == 1:
-            display.root_group = trends_group
-            print("Display mode: Trends")
-        elif display_mode == 2:
-            display.root_group = stats_group
-            print("Display mode: Statistics")
-        elif display_mode == 3:
-            display.root_group = main_group
-            print("Display mode: Food Safety")
-
-        # Brief flash to acknowledge button press
-        clue.pixel.fill((255, 255, 0))
-        time.sleep(0.1)
-        clue.pixel.fill((0, 255, 0))
-        return True
-
-    if not clue.button_a:
-        button_a_pressed = False
-
-    return False
+    """Cycle to the next display mode (Button A)."""
+    global mode_switch_ns
+
+    mode_switch_ns = time.monotonic_ns()
+    mode = (display_mode + 1) % 4  # 4 modes: Main, Trends, Stats, Food Safety
+    print(f"Mode switch: {mode}")
+    show_mode(mode)
+    flash_pixel((255, 255, 0))
+
+def cycle_history_range():
+    """Show the next history tier in the Trends and Stats views."""
+    global history_tier
+
+    history_tier = (history_tier + 1) % sensor_history.tiers
+    print(f"History range: {HISTORY_TIER_NAMES[history_tier]}")
 
 def handle_unit_toggle():
-    """Handle C/F unit toggling - eliminates code duplication."""
-    global use_fahrenheit, button_b_pressed
+    """Handle C/F unit toggling (history range in Trends view)."""
+    global use_fahrenheit
 
-    if clue.button_b and not button_b_pressed:
-        button_b_pressed = True
+    if display_mode == 1:
+        # Trends are unitless deltas, so B picks the history range instead
+        cycle_history_range()
+    else:
         use_fahrenheit = not use_fahrenheit
         unit = "Fahrenheit" if use_fahrenheit else "Celsius"
         print(f"Temperature unit: {unit}")
 
-        # Brief flash to acknowledge button press
-        clue.pixel.fill((255, 0, 255))
-        time.sleep(0.1)
-        clue.pixel.fill((0, 255, 0))
-        return True
-
-    if not clue.button_b:
-        button_b_pressed = False
+    flash_pixel((255, 0, 255))
 
-    return False
+def handle_button_event(event):
+    """Dispatch a button event to its action."""
+    key, kind = event
+    if key == BUTTON_A and kind == PRESS:
+        handle_mode_switch()
+    elif key == BUTTON_B and kind == PRESS:
+        handle_unit_toggle()
+    elif key == BUTTON_B and kind == LONG_PRESS:
+        cycle_history_range()
+        flash_pixel((255, 0, 255))
+    elif key == BUTTON_A and kind == LONG_PRESS:
+        # Timing since the last dump
+        profiler.report()
+        profiler.reset()
+        flash_pixel((0, 255, 255))
+
+def commit_frame(render_start_ns):
+    """Push this tick's label changes to the display in a single refresh."""
+    global frame_dirty, mode_switch_ns
+
+    if not (frame_dirty or label_updates.updates):
+        return  # Nothing changed - skip the frame
+
+    profiler.start(PROFILE_REFRESH)
+    refresh_start_ns = time.monotonic_ns()
+    # No target frame rate: called once per tick, refresh() would find every
+    # frame late and skip it
+    drawn = display.refresh()
+    done_ns = time.monotonic_ns()
+    profiler.stop(PROFILE_REFRESH)
+    if not drawn:
+        return  # Keep frame_dirty set so the next tick draws it
+    frame_dirty = False
+
+    if DEBUG_RENDER:
+        render_ms = (refresh_start_ns - render_start_ns) // 1000000
+        refresh_ms = (done_ns - refresh_start_ns) // 1000000
+        print(f"Frame: {label_updates.updates} labels ({label_updates.skipped} skipped), "
+              f"render {render_ms} ms, refresh {refresh_ms} ms")
+
+    if mode_switch_ns is not None:
+        latency_ms = (done_ns - mode_switch_ns) // 1000000
+        over = " OVER BUDGET" if latency_ms > MODE_SWITCH_BUDGET_MS else ""
+        print(f"Mode switch redraw: {latency_ms} ms (budget {MODE_SWITCH_BUDGET_MS} ms){over}")
+        mode_switch_ns = None
 
 # ============================================
 # DISPLAY MODE: MAIN VIEW
@@ -281,28 +411,27 @@ def setup_main_display():
 
 def update_main_display(temp, humidity, pressure, altitude):
     """Update the main display with current readings."""
+    # Title (index 0) - food safety mode shares this group
+    main_view.set(0, "CLUE Monitor")
+
     # Temperature (index 1)
     temp_str = f"{temp:.1f}"
     unit = "F" if use_fahrenheit else "C"
-    main_group[1].text = f"Temp: {temp_str} {unit}"
     # Always use Celsius for color thresholds regardless of display unit
     celsius_for_color = temp if not use_fahrenheit else (temp - 32) * 5/9
-    main_group[1].color = get_temp_color(celsius_for_color)
+    main_view.set(1, f"Temp: {temp_str} {unit}", get_temp_color(celsius_for_color))
 
     # Humidity (index 2)
-    main_group[2].text = f"RH: {humidity:.1f}%"
-    main_group[2].color = get_humidity_color(humidity)
+    main_view.set(2, f"RH: {humidity:.1f}%", get_humidity_color(humidity))
 
     # Pressure (index 3)
-    main_group[3].text = f"P: {pressure:.0f} hPa"
-    main_group[3].color = 0xFFFFFF
+    main_view.set(3, f"P: {pressure:.0f} hPa", 0xFFFFFF)
 
     # Altitude (index 4)
-    main_group[4].text = f"Alt: {altitude:.0f} m"
-    main_group[4].color = 0xFFFFFF
+    main_view.set(4, f"Alt: {altitude:.0f} m", 0xFFFFFF)
 
     # Status (index 5)
-    main_group[5].text = f"Uptime: {format_uptime(uptime_seconds)}"
+    main_view.set(5, f"Uptime: {format_uptime(uptime_seconds)}")
 
 # ============================================
 # DISPLAY MODE: TRENDS VIEW
@@ -354,33 +483,30 @@ def setup_trends_display():
     trends_group.append(info_label)
 
     # Help text
-    help_label = label.Label(terminalio.FONT, text="A:Mode B:C/F", color=0x666666,
+    help_label = label.Label(terminalio.FONT, text="A:Mode B:Range", color=0x666666,
                             x=5, y=225, scale=1)
     trends_group.append(help_label)
 
     return trends_group
 
-def create_sparkline(data, width=30):
-    """Create a text-based sparkline from data array using ASCII."""
+def create_sparkline(channel, width=30):
+    """Create a text-based sparkline from a history channel using ASCII."""
     # Use simple ASCII characters that terminalio.FONT supports
     bars = " .-:=+*#@"  # Low to high
 
-    valid_data = [d for d in data if d is not None]
-    if len(valid_data) < 2:
+    points = min(width, sensor_history.count(history_tier))
+    if points < 2:
         return "insufficient data"
 
-    # Take last 'width' points
-    recent_data = valid_data[-width:]
-
-    # Normalize to 0-8 range for bar characters
-    min_val = min(recent_data)
-    max_val = max(recent_data)
+    # Normalize to 0-8 range for bar characters (last 'width' points)
+    min_val = min(sensor_history.last(width, history_tier, channel))
+    max_val = max(sensor_history.last(width, history_tier, channel))
 
     if max_val == min_val:
-        return bars[4] * len(recent_data)  # Middle bar if flat
+        return bars[4] * points  # Middle bar if flat
 
     sparkline = ""
-    for value in recent_data:
+    for value in sensor_history.last(width, history_tier, channel):
         normalized = (value - min_val) / (max_val - min_val)
         bar_index = int(normalized * 8)
         if bar_index >= len(bars):
@@ -391,23 +517,23 @@ def create_sparkline(data, width=30):
 
 def update_trends_display():
     """Update the trends display with sparklines."""
-    temp_trend = calculate_trend(temp_history)
-    humidity_trend = calculate_trend(humidity_history)
-    pressure_trend = calculate_trend(pressure_history)
+    temp_trend = calculate_trend(sensor_history.stats(history_tier, TEMP_CHANNEL))
+    humidity_trend = calculate_trend(sensor_history.stats(history_tier, HUMIDITY_CHANNEL))
+    pressure_trend = calculate_trend(sensor_history.stats(history_tier, PRESSURE_CHANNEL))
 
-    valid_points = sum(1 for x in temp_history if x is not None)
+    valid_points = sensor_history.count(history_tier)
 
     # Update trend text
-    trends_group[1].text = f"Temp: {temp_trend}"
-    trends_group[2].text = create_sparkline(temp_history, 35)  # Sparkline
+    trends_view.set(1, f"Temp: {temp_trend}")
+    trends_view.set(2, create_sparkline(TEMP_CHANNEL, 35))  # Sparkline
 
-    trends_group[3].text = f"RH: {humidity_trend}"
-    trends_group[4].text = create_sparkline(humidity_history, 35)  # Sparkline
+    trends_view.set(3, f"RH: {humidity_trend}")
+    trends_view.set(4, create_sparkline(HUMIDITY_CHANNEL, 35))  # Sparkline
 
-    trends_group[5].text = f"Pres: {pressure_trend}"
-    trends_group[6].text = create_sparkline(pressure_history, 35)  # Sparkline
+    trends_view.set(5, f"Pres: {pressure_trend}")
+    trends_view.set(6, create_sparkline(PRESSURE_CHANNEL, 35))  # Sparkline
 
-    trends_group[7].text = f"2hr history ({valid_points} pts)"
+    trends_view.set(7, f"{HISTORY_TIER_NAMES[history_tier]} history ({valid_points} pts)")
 
 # ============================================
 # DISPLAY MODE: STATISTICS VIEW
@@ -444,12 +570,12 @@ def setup_stats_display():
     stats_group.append(legend_label)
 
     # Calibration info - temperature
-    cal_temp_label = label.Label(terminalio.FONT, text=f"T: {TEMP_OFFSET:+.1f}C",
+    cal_temp_label = label.Label(terminalio.FONT, text=f"T: {calibration.temperature.summary('C')}",
                            color=0x888888, x=5, y=155, scale=1)
     stats_group.append(cal_temp_label)
 
     # Calibration info - humidity
-    cal_hum_label = label.Label(terminalio.FONT, text=f"RH: {HUMIDITY_OFFSET:+.1f}%",
+    cal_hum_label = label.Label(terminalio.FONT, text=f"RH: {calibration.humidity.summary('%')}",
                            color=0x888888, x=90, y=155, scale=1)
     stats_group.append(cal_hum_label)
 
@@ -462,9 +588,9 @@ def setup_stats_display():
 
 def update_stats_display():
     """Update the statistics display."""
-    temp_min, temp_max, temp_avg = get_stats(temp_history)
-    humidity_min, humidity_max, humidity_avg = get_stats(humidity_history)
-    pressure_min, pressure_max, pressure_avg = get_stats(pressure_history)
+    temp_min, temp_max, temp_avg = get_stats(sensor_history.stats(history_tier, TEMP_CHANNEL))
+    humidity_min, humidity_max, humidity_avg = get_stats(sensor_history.stats(history_tier, HUMIDITY_CHANNEL))
+    pressure_min, pressure_max, pressure_avg = get_stats(sensor_history.stats(history_tier, PRESSURE_CHANNEL))
 
     if temp_min is not None:
         unit = "F" if use_fahrenheit else "C"
@@ -473,65 +599,57 @@ def update_stats_display():
             temp_max = celsius_to_fahrenheit(temp_max)
             temp_avg = celsius_to_fahrenheit(temp_avg)
 
-        stats_group[1].text = f"Temp: {temp_min:.1f}/{temp_avg:.1f}/{temp_max:.1f}{unit}"
-        stats_group[2].text = f"RH: {humidity_min:.0f}/{humidity_avg:.0f}/{humidity_max:.0f}%"
-        stats_group[3].text = f"P: {pressure_min:.0f}/{pressure_avg:.0f}/{pressure_max:.0f}hPa"
+        stats_view.set(1, f"Temp: {temp_min:.1f}/{temp_avg:.1f}/{temp_max:.1f}{unit}")
+        stats_view.set(2, f"RH: {humidity_min:.0f}/{humidity_avg:.0f}/{humidity_max:.0f}%")
+        stats_view.set(3, f"P: {pressure_min:.0f}/{pressure_avg:.0f}/{pressure_max:.0f}hPa")
+        stats_view.set(4, f"(min/avg/max) {HISTORY_TIER_NAMES[history_tier]}")
 
-def update_food_safety_display(temp_celsius):
+def update_food_safety_display(temp_celsius, current_time):
     """Simple food safety mode - reuses main display to avoid memory issues."""
     global food_safety_state, fridge_entry_time
 
+    # Threshold crossings of the filtered temperature that lasted the dwell time
+    warm = food_warming.check(current_time, temp_celsius > FOOD_SAFE_TEMP)
+    cold = food_cooling.check(current_time, temp_celsius <= FOOD_SAFE_TEMP - FOOD_TEMP_HYSTERESIS)
+    room = food_at_room.check(current_time, temp_celsius >= ROOM_TEMP)
+
     # Determine state based on temperature
     if food_safety_state == 0:  # READY
-        if temp_celsius <= FOOD_SAFE_TEMP:
+        if cold:
             food_safety_state = 1
             fridge_entry_time = time.monotonic()
-        main_group[0].text = "FOOD SAFETY"
-        main_group[1].text = "READY"
-        main_group[1].color = 0x00FF00
-        main_group[2].text = f"Temp: {temp_celsius:.1f}C"
-        main_group[2].color = 0xFFFFFF
-        main_group[3].text = "Place in fridge"
-        main_group[3].color = 0xFFFFFF
-        main_group[4].text = "Starts at 4C"
-        main_group[4].color = 0xFFFFFF
-        main_group[5].text = ""
+        main_view.set(0, "FOOD SAFETY")
+        main_view.set(1, "READY", 0x00FF00)
+        main_view.set(2, f"Temp: {temp_celsius:.1f}C", 0xFFFFFF)
+        main_view.set(3, "Place in fridge", 0xFFFFFF)
+        main_view.set(4, "Starts at 4C", 0xFFFFFF)
+        main_view.set(5, "")
         clue.pixel.fill((255, 255, 255))  # White LED
 
     elif food_safety_state == 1:  # SAFE
-        if temp_celsius > FOOD_SAFE_TEMP:
+        if warm or room:
             food_safety_state = 2
-        elif temp_celsius >= ROOM_TEMP:
-            food_safety_state = 2
-        main_group[0].text = "FOOD SAFETY"
-        main_group[1].text = "SAFE"
-        main_group[1].color = 0x00FF00
-        main_group[2].text = f"Temp: {temp_celsius:.1f}C"
-        main_group[2].color = 0xFFFFFF
-        main_group[3].text = "Food is safe"
-        main_group[3].color = 0xFFFFFF
-        main_group[4].text = "OK to eat"
-        main_group[4].color = 0xFFFFFF
-        main_group[5].text = ""
+        main_view.set(0, "FOOD SAFETY")
+        main_view.set(1, "SAFE", 0x00FF00)
+        main_view.set(2, f"Temp: {temp_celsius:.1f}C", 0xFFFFFF)
+        main_view.set(3, "Food is safe", 0xFFFFFF)
+        main_view.set(4, "OK to eat", 0xFFFFFF)
+        main_view.set(5, "")
         clue.pixel.fill((0, 255, 0))  # Green LED
 
     elif food_safety_state == 2:  # WARNING/RESET
-        if temp_celsius <= FOOD_SAFE_TEMP:
+        if cold:
             food_safety_state = 1
-        elif temp_celsius >= ROOM_TEMP:
+        elif room:
             # Reset at room temp
             food_safety_state = 0
             fridge_entry_time = None
-        main_group[0].text = "FOOD SAFETY"
-        main_group[1].text = "CHECK TEMP"
-        main_group[1].color = 0xFFFF00
-        main_group[2].text = f"Temp: {temp_celsius:.1f}C"
-        main_group[2].color = 0xFFFFFF
-        main_group[3].text = "Monitor closely"
-        main_group[3].color = 0xFFFFFF
-        main_group[4].text = ""
-        main_group[4].color = 0xFFFFFF
-        main_group[5].text = ""
+        main_view.set(0, "FOOD SAFETY")
+        main_view.set(1, "CHECK TEMP", 0xFFFF00)
+        main_view.set(2, f"Temp: {temp_celsius:.1f}C", 0xFFFFFF)
+        main_view.set(3, "Monitor closely", 0xFFFFFF)
+        main_view.set(4, "", 0xFFFFFF)
+        main_view.set(5, "")
         clue.pixel.fill((255, 255, 0))  # Yellow LED
 
 # ============================================
@@ -544,90 +662,149 @@ setup_trends_display()
 setup_stats_display()
 # Food safety reuses main_group, no separate setup needed
 
-# Set NeoPixel to indicate startup
-clue.pixel.brightness = 0.1
-clue.pixel.fill((0, 0, 255))  # Blue during startup
-
-print("=" * 50)
-print("Adafruit CLUE - Calibrated Environmental Monitor")
-print("WITH FOOD SAFETY MODE - Mode 3")
-print("=" * 50)
-print(f"Temperature offset: {TEMP_OFFSET:+.1f}C")
-print(f"Humidity offset: {HUMIDITY_OFFSET:+.1f}%")
-print(f"Update interval: {UPDATE_INTERVAL}s")
-print(f"Log interval: {LOG_INTERVAL}s")
-print(f"History size: {HISTORY_SIZE} readings")
-print("=" * 50)
-print("Press Button A to cycle modes: Main->Trends->Stats->Food Safety")
-print("Press Button B to toggle Celsius/Fahrenheit")
-print("=" * 50)
-
-# Warm-up period
-print("Warming up sensors (5 seconds)...")
-time.sleep(5)
-
-clue.pixel.fill((0, 255, 0))  # Green when ready
-print("Ready! Starting measurements...")
-print("Current mode: Main Display")
-print("")
+# Dirty-checked views: labels are only touched when text/color changes
+label_updates = UpdateCounter()
+main_view = GroupView(main_group, label_updates)
+trends_view = GroupView(trends_group, label_updates)
+stats_view = GroupView(stats_group, label_updates)
+
+# Persistent log, opened at startup (None while logging is disabled)
+data_log = None
+
+# telemetry.TelemetryWriter, opened at startup (None: print text lines)
+telemetry = None
 
 # ============================================
 # MAIN LOOP
 # ============================================
 
-start_time = time.monotonic()
-
-while True:
-    try:
-        current_time = time.monotonic()
-        uptime_seconds = int(current_time - start_time)
-
-        # Read sensors
-        calibrated_temp = get_calibrated_temperature()
-        humidity = get_calibrated_humidity()
-        pressure = clue.pressure
-        altitude = clue.altitude
-
-        # Convert temperature if needed
-        display_temp = celsius_to_fahrenheit(calibrated_temp) if use_fahrenheit else calibrated_temp
-
-        # Log data at specified interval
-        if current_time - last_log_time >= LOG_INTERVAL:
-            temp_history[history_index] = calibrated_temp
-            humidity_history[history_index] = humidity
-            pressure_history[history_index] = pressure
-
-            history_index = (history_index + 1) % HISTORY_SIZE
-            last_log_time = current_time
-
-            # Print to serial console
+def update(current_time):
+    """One main-loop iteration: read sensors, log, and draw the current mode."""
+    global uptime_seconds, last_log_time
+
+    profiler.start(PROFILE_TICK)
+    uptime_seconds = int(current_time - start_time)
+
+    # Read sensors
+    profiler.start(PROFILE_SENSORS)
+    new_sample = sampler.update(current_time)
+    calibrated_temp = get_calibrated_temperature()
+    humidity = get_calibrated_humidity()
+    pressure = sampler.pressure
+    altitude = sampler.altitude
+    profiler.stop(PROFILE_SENSORS)
+
+    # Convert temperature if needed
+    display_temp = celsius_to_fahrenheit(calibrated_temp) if use_fahrenheit else calibrated_temp
+
+    # Log data at specified interval
+    if current_time - last_log_time >= LOG_INTERVAL:
+        profiler.start(PROFILE_LOG)
+        sensor_history.append(calibrated_temp, humidity, pressure)
+        if data_log is not None:
+            data_log.append(time.time(), calibrated_temp, humidity, pressure)
+        last_log_time = current_time
+
+        # Send to the computer
+        if telemetry is not None:
+            telemetry.send_env(uptime_seconds, calibrated_temp, humidity, pressure)
+        else:
             print(f"[{format_uptime(uptime_seconds)}] T: {calibrated_temp:.1f}C, RH: {humidity:.1f}%, P: {pressure:.0f}hPa, Alt: {altitude:.0f}m")
-
-        # Update current display mode
-        if display_mode == 0:
-            update_main_display(display_temp, humidity, pressure, altitude)
-        elif display_mode == 1:
-            update_trends_display()
-        elif display_mode == 2:
-            update_stats_display()
-        elif display_mode == 3:
-            # Food safety mode using simplified main display
-            update_food_safety_display(calibrated_temp)
-
-        # Handle buttons using extracted functions (eliminates duplication)
-        handle_mode_switch()
-        handle_unit_toggle()
-
-        # Sleep in small increments to check buttons more frequently
-        for _ in range(int(UPDATE_INTERVAL * 10)):
-            time.sleep(0.1)
-
-            # Quick button checks during sleep (using extracted functions)
-            if handle_mode_switch() or handle_unit_toggle():
-                break  # Exit sleep early if button pressed
-
-    except Exception as e:
-        print(f"ERROR in main loop: {e}")
-        print("Continuing...")
-        time.sleep(1)
-
+        profiler.stop(PROFILE_LOG)
+
+    # Update current display mode
+    render_start_ns = time.monotonic_ns()
+    profiler.start(PROFILE_RENDER)
+    label_updates.start_tick()
+    if display_mode == 0:
+        update_main_display(display_temp, humidity, pressure, altitude)
+    elif display_mode == 1:
+        update_trends_display()
+    elif display_mode == 2:
+        update_stats_display()
+    elif display_mode == 3:
+        # Food safety mode using simplified main display (filtered temperature)
+        if new_sample or food_temp_filter.value is None:
+            food_temp_filter.update(current_time, calibrated_temp)
+        update_food_safety_display(food_temp_filter.value, current_time)
+    profiler.stop(PROFILE_RENDER)
+    commit_frame(render_start_ns)
+    profiler.stop(PROFILE_TICK)
+
+# Skipped when imported, e.g. by benchmarks/ticks.py
+if __name__ == "__main__":
+    # Open the persistent log and restore recent history from it
+    data_log = DataLog(LOG_FILE, LOG_CAPACITY, LOG_BATCH)
+    try:
+        data_log.open()
+        if data_log.last is not None:
+            print(f"Log recovered: record #{data_log.last[0]}")
+            for record in data_log.tail(HISTORY_SIZE):
+                sensor_history.append(record[2], record[3], record[4])
+    except OSError as e:
+        print(f"Data log disabled: {e}")
+        data_log = None
+
+    # Binary telemetry on the USB data port
+    if TELEMETRY:
+        from telemetry import TelemetryWriter, open_port
+        port = open_port()
+        if port is None:
+            print("Telemetry disabled: no USB data port (see boot.py)")
+        else:
+            telemetry = TelemetryWriter(port)
+
+    # Show the placeholder screen during warm-up
+    display.refresh()
+
+    # Set NeoPixel to indicate startup
+    clue.pixel.brightness = 0.1
+    clue.pixel.fill((0, 0, 255))  # Blue during startup
+
+    print("=" * 50)
+    print("Adafruit CLUE - Calibrated Environmental Monitor")
+    print("WITH FOOD SAFETY MODE - Mode 3")
+    print("=" * 50)
+    print(f"Calibration: {calibration.source or 'built-in offsets'}")
+    print(f"Temperature: {calibration.temperature.summary('C')}")
+    print(f"Humidity: {calibration.humidity.summary('%')}")
+    print(f"Update interval: {UPDATE_INTERVAL}s")
+    print(f"Sensor profile: {sampler.profile.name} (up to {sampler.measurement_ms():.0f} ms per sample)")
+    print(f"Log interval: {LOG_INTERVAL}s")
+    if telemetry is not None:
+        print("Readings: binary telemetry on the USB data port")
+    print(f"History size: {HISTORY_SIZE} readings + {len(HISTORY_ROLLUPS)} rollup tiers")
+    print("=" * 50)
+    print("Press Button A to cycle modes: Main->Trends->Stats->Food Safety")
+    print("Press Button B to toggle Celsius/Fahrenheit")
+    print("Hold Button A to print the timing profile")
+    print("=" * 50)
+
+    # Warm-up period
+    print("Warming up sensors (5 seconds)...")
+    time.sleep(5)
+
+    clue.pixel.fill((0, 255, 0))  # Green when ready
+    print("Ready! Starting measurements...")
+    print("Current mode: Main Display")
+    print("")
+
+    start_time = time.monotonic()
+
+    while True:
+        try:
+            current_time = time.monotonic()
+            update(current_time)
+
+            # Sleep until the next update or a button event, whichever comes
+            # first; after an event the loop redraws right away
+            event = buttons.wait(current_time + UPDATE_INTERVAL)
+            if event is not None:
+                profiler.start(PROFILE_BUTTONS)
+                handle_button_event(event)
+                profiler.stop(PROFILE_BUTTONS)
+
+        except Exception as e:
+            print(f"ERROR in main loop: {e}")
+            print("Continuing...")
+            time.sleep(1)
@@ -0,0 +1,246 @@
+"""
+Persistent Sensor Log
+=====================
+
+Append-only binary log of sensor readings on the CIRCUITPY flash drive.
+
+Each record is a fixed-size struct (sequence, timestamp, temperature,
+humidity, pressure, checksum). The log file is preallocated once and used
+as a ring, so it never grows. Records are buffered in RAM and flushed in a
+single write every `batch` records to keep flash wear and write latency low.
+On open, the last valid record is recovered so sequence numbers continue
+after a reset.
+
+RAM is lost in a deep sleep. Rather than flushing a part batch before
+every deep sleep, park() keeps the buffered records in alarm.sleep_memory
+(as fixed-point values at the sensors' resolution: 0.01C, 0.01 %RH, 1 Pa)
+and unpark() takes them back after the wake.
+
+CircuitPython can only write to CIRCUITPY when boot.py has remounted it
+(see boot.py: hold Button A while resetting to enable logging). When the
+drive is read-only, DataLog.open() raises OSError and the caller should
+carry on without logging.
+
+The module only needs `struct`, so read_records() also works on a computer
+to decode a copied log file.
+"""
+
+import struct
+
+RECORD_FORMAT = "<IIfffH2x"  # seq, timestamp, temp C, RH %, pressure hPa, checksum
+RECORD_SIZE = struct.calcsize(RECORD_FORMAT)
+PARKED_FORMAT = "<IhHI"  # timestamp, temp 0.01C, RH 0.01 %, pressure Pa
+PARKED_SIZE = struct.calcsize(PARKED_FORMAT)
+PARKED_HEADER = 3  # Record count (1 byte) and checksum (2 bytes)
+ERASED = 0xFF  # Fill byte for preallocated, never-written slots
+
+
+def checksum16(buf, start, end):
+    """16-bit rotate-xor checksum of buf[start:end] (never 0xFFFF for erased data)."""
+    total = 0x5A5A
+    for i in range(start, end):
+        total = ((total << 1) | (total >> 15)) & 0xFFFF
+        total ^= buf[i]
+    return total
+
+
+def _checksum(buf, offset):
+    """Checksum over the payload of the record at `offset`."""
+    return checksum16(buf, offset, offset + RECORD_SIZE - 4)
+
+
+def _unpack(buf, offset=0):
+    """Return (seq, timestamp, temp, humidity, pressure), or None if invalid."""
+    seq, timestamp, temp, humidity, pressure, check = struct.unpack_from(
+        RECORD_FORMAT, buf, offset)
+    if check != _checksum(buf, offset):
+        return None
+    return seq, timestamp, temp, humidity, pressure
+
+
+class DataLog:
+    """Preallocated ring of fixed-size records with batched writes."""
+
+    def __init__(self, path, capacity=4096, batch=8):
+        self.path = path
+        self.capacity = capacity
+        self.batch = batch
+        self.last = None  # Last record written or recovered
+        self._file = None
+        self._next_seq = 0
+        self._position = 0  # Slot the next flushed record goes to
+        self._buffer = bytearray(RECORD_SIZE * batch)
+        self._pending = 0
+
+    def open(self):
+        """Open (or create) the log file and recover the last valid record."""
+        try:
+            self._file = open(self.path, "r+b")
+            self._file.seek(0, 2)
+            if self._file.tell() != self.capacity * RECORD_SIZE:
+                self._file.close()
+                self._file = None
+        except OSError:
+            self._file = None
+
+        if self._file is None:
+            self._preallocate()
+            self._file = open(self.path, "r+b")
+        else:
+            self._recover()
+        return self
+
+    def _preallocate(self):
+        """Create the log file filled with erased records."""
+        chunk = bytes([ERASED]) * (RECORD_SIZE * 32)
+        remaining = self.capacity * RECORD_SIZE
+        with open(self.path, "wb") as f:
+            while remaining > 0:
+                f.write(chunk[:remaining] if remaining < len(chunk) else chunk)
+                remaining -= len(chunk)
+
+    def _read_slot(self, slot, buf):
+        """Read one slot into `buf` and decode it."""
+        self._file.seek(slot * RECORD_SIZE)
+        self._file.readinto(buf)
+        return _unpack(buf)
+
+    def _recover(self):
+        """Find the newest valid record so appends continue after it."""
+        buf = bytearray(RECORD_SIZE)
+        first = self._read_slot(0, buf)
+        if first is None:
+            last_slot = self._recover_scan(buf)
+        else:
+            # Slots written in the current lap hold consecutive sequence
+            # numbers starting at slot 0, so binary search for the end.
+            lo, hi = 0, self.capacity - 1
+            while lo < hi:
+                mid = (lo + hi + 1) // 2
+                record = self._read_slot(mid, buf)
+                if record is not None and record[0] == first[0] + mid:
+                    lo = mid
+                else:
+                    hi = mid - 1
+            last_slot = lo
+
+        if last_slot is None:
+            return
+        self.last = self._read_slot(last_slot, buf)
+        self._next_seq = self.last[0] + 1
+        self._position = (last_slot + 1) % self.capacity
+
+    def _recover_scan(self, buf):
+        """Linear scan for the highest sequence number (slot 0 is unusable)."""
+        best_slot = None
+        best_seq = -1
+        for slot in range(1, self.capacity):
+            record = self._read_slot(slot, buf)
+            if record is not None and record[0] > best_seq:
+                best_seq = record[0]
+                best_slot = slot
+        return best_slot
+
+    def append(self, timestamp, temp, humidity, pressure):
+        """Buffer one record, flushing when the batch is full."""
+        offset = self._pending * RECORD_SIZE
+        buf = self._buffer
+        struct.pack_into(RECORD_FORMAT, buf, offset, self._next_seq,
+                         int(timestamp), temp, humidity, pressure, 0)
+        struct.pack_into("<H", buf, offset + RECORD_SIZE - 4, _checksum(buf, offset))
+        self.last = (self._next_seq, int(timestamp), temp, humidity, pressure)
+        self._next_seq += 1
+        self._pending += 1
+        if self._pending >= self.batch:
+            self.flush()
+
+    def flush(self):
+        """Write all buffered records to flash."""
+        if not self._pending or self._file is None:
+            return
+        view = memoryview(self._buffer)
+        written = 0
+        while written < self._pending:
+            # Split the batch where it wraps past the end of the file
+            count = min(self._pending - written, self.capacity - self._position)
+            self._file.seek(self._position * RECORD_SIZE)
+            self._file.write(view[written * RECORD_SIZE:(written + count) * RECORD_SIZE])
+            self._position = (self._position + count) % self.capacity
+            written += count
+        self._file.flush()
+        self._pending = 0
+
+    def park(self, storage, offset, length):
+        """Move the buffered records into storage[offset:offset + length].
+
+        Flushes them to flash instead if they do not fit.
+        """
+        if self._pending * PARKED_SIZE + PARKED_HEADER > length:
+            self.flush()
+        count = self._pending
+        buf = self._buffer
+        position = offset + 1
+        for i in range(count):
+            _, timestamp, temp, humidity, pressure, _ = struct.unpack_from(
+                RECORD_FORMAT, buf, i * RECORD_SIZE)
+            struct.pack_into(PARKED_FORMAT, storage, position, timestamp,
+                             _fixed(temp, -32768, 32767), _fixed(humidity, 0, 65535),
+                             _fixed(pressure, 0, 0xFFFFFFFF))
+            position += PARKED_SIZE
+        storage[offset] = count
+        struct.pack_into("<H", storage, position, checksum16(storage, offset, position))
+        # Parked records are written with the next batch; appending them
+        # again after the wake gives them the same sequence numbers
+        self._next_seq -= count
+        self._pending = 0
+
+    def unpark(self, storage, offset, length):
+        """Buffer the records park() left in storage again; returns how many."""
+        count = storage[offset]
+        end = offset + 1 + count * PARKED_SIZE
+        if end + 2 > offset + length:
+            return 0
+        if struct.unpack_from("<H", storage, end)[0] != checksum16(storage, offset, end):
+            return 0
+        for i in range(count):
+            timestamp, temp, humidity, pressure = struct.unpack_from(
+                PARKED_FORMAT, storage, offset + 1 + i * PARKED_SIZE)
+            self.append(timestamp, temp / 100, humidity / 100, pressure / 100)
+        return count
+
+    def tail(self, n):
+        """Iterate the newest `n` flushed records, oldest first."""
+        buf = bytearray(RECORD_SIZE)
+        if self.last is None:
+            return
+        for i in range(n, 0, -1):
+            slot = (self._position - i) % self.capacity
+            record = self._read_slot(slot, buf)
+            if record is not None and record[0] + i == self._next_seq - self._pending:
+                yield record
+
+    def close(self):
+        """Flush buffered records and close the file."""
+        if self._file is not None:
+            self.flush()
+            self._file.close()
+            self._file = None
+
+
+def _fixed(value, low, high):
+    """value * 100 as an integer, clamped to the field's range."""
+    value = int(round(value * 100))
+    return low if value < low else high if value > high else value
+
+
+def read_records(path):
+    """Iterate every valid record in a log file, oldest first."""
+    with open(path, "rb") as f:
+        data = f.read()
+    records = []
+    for offset in range(0, len(data) - RECORD_SIZE + 1, RECORD_SIZE):
+        record = _unpack(data, offset)
+        if record is not None:
+            records.append(record)
+    records.sort()
+    return iter(records)
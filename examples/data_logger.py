@@ -11,21 +11,29 @@ On Linux/Mac:
   picocom /dev/ttyACM0 -b 115200 | tee data_log.csv
 
 The data can then be imported into Excel, Google Sheets, or analyzed with Python/R.
+To collect it on a computer in a per-day columnar store instead:
+  python3 -m ingest /dev/ttyACM0 --store clue_store --follow
+Needs sensors.py on CIRCUITPY.
 """
 
 import time
 import board
+import microcontroller
 from adafruit_clue import clue
+from sensors import Sampler
 
 # Configuration
 LOG_INTERVAL = 60  # Log every 60 seconds (1 minute)
 TEMP_OFFSET = -1.0  # Your calibration offset
+SEA_LEVEL_PRESSURE = 1013.25  # Local sea-level pressure (hPa) for altitude
 
-# Print CSV header
+# Print the board ID (names the device in the ingest store) and CSV header
+print("# device: " + "".join("{:02x}".format(b) for b in microcontroller.cpu.uid))
 print("timestamp,uptime_sec,temperature_c,humidity_pct,pressure_hpa,altitude_m")
 
 start_time = time.monotonic()
 log_count = 0
+sampler = Sampler(clue._pressure, clue._humidity, SEA_LEVEL_PRESSURE)
 
 # Set NeoPixel to indicate logging
 clue.pixel.brightness = 0.05
@@ -37,10 +45,11 @@ try:
         uptime = int(current_time - start_time)
 
         # Read sensors
-        temp = clue.temperature + TEMP_OFFSET
-        humidity = clue.humidity
-        pressure = clue.pressure
-        altitude = clue.altitude
+        sampler.read()
+        temp = sampler.temperature + TEMP_OFFSET
+        humidity = sampler.humidity
+        pressure = sampler.pressure
+        altitude = sampler.altitude
 
         # Log in CSV format: timestamp, uptime, temp, humidity, pressure, altitude
         import rtc
@@ -5,12 +5,13 @@ Simple Sensor Test - Read all CLUE sensors
 This script reads and displays all available sensors on the CLUE.
 Useful for verifying sensors are working and exploring capabilities.
 
-Output is sent to serial console.
+Output is sent to serial console. Needs sensors.py on CIRCUITPY.
 """
 
 import time
 import board
 from adafruit_clue import clue
+from sensors import Sampler
 
 print("=" * 70)
 print("ADAFRUIT CLUE - COMPLETE SENSOR TEST")
@@ -26,6 +27,7 @@ print("Press Ctrl+C to stop")
 print()
 
 count = 0
+sampler = Sampler(clue._pressure, clue._humidity)
 
 try:
     while True:
@@ -35,11 +37,14 @@ try:
         print(f"{'='*70}")
 
         # Environmental Sensors
+        # One sample: altitude and sea-level pressure are derived from it
+        sampler.read()
+        altitude = sampler.altitude
         print("\n[ENVIRONMENTAL SENSORS]")
-        print(f"  Temperature:  {clue.temperature:.2f} °C")
-        print(f"  Humidity:     {clue.humidity:.1f} %")
-        print(f"  Pressure:     {clue.pressure:.2f} hPa")
-        print(f"  Altitude:     {clue.altitude:.1f} m")
+        print(f"  Temperature:  {sampler.temperature:.2f} °C")
+        print(f"  Humidity:     {sampler.humidity:.1f} %")
+        print(f"  Pressure:     {sampler.pressure:.2f} hPa")
+        print(f"  Altitude:     {altitude:.1f} m")
 
         # Motion Sensors
         print("\n[MOTION SENSORS]")
@@ -104,7 +109,7 @@ try:
         print(f"  Heading:      {heading:.1f}° (approximate)")
 
         # Sea level pressure (estimated from altitude)
-        sea_level_pressure = clue.pressure / ((1 - (clue.altitude / 44330)) ** 5.255)
+        sea_level_pressure = sampler.sea_level_pressure(altitude)
         print(f"  Sea Level P:  {sea_level_pressure:.2f} hPa (estimated)")
 
         # Blink NeoPixel
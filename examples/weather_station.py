@@ -10,7 +10,8 @@ A comprehensive weather station that displays:
 - Compass heading
 - Weather forecast based on pressure trends
 
-Uses the full capabilities of the CLUE sensor suite.
+Uses the full capabilities of the CLUE sensor suite. Needs sensors.py
+on CIRCUITPY (and telemetry.py with TELEMETRY = True).
 """
 
 import time
@@ -20,11 +21,21 @@ import displayio
 import terminalio
 from adafruit_clue import clue
 from adafruit_display_text import label
+from sensors import Sampler
 
 # Configuration
 TEMP_OFFSET = -1.0  # Calibration offset in Celsius
 UPDATE_INTERVAL = 5  # Update display every 5 seconds
+SEA_LEVEL_PRESSURE = 1013.25  # Local sea-level pressure (hPa) for altitude
+SENSOR_PROFILE = "weather-precision"  # 16x oversampled, IIR-filtered pressure (sensors.py)
 PRESSURE_HISTORY_SIZE = 12  # Keep 1 hour of pressure data (at 5-min intervals)
+# Send binary frames on the USB data port (boot.py) instead of text lines;
+# decode with: python3 telemetry.py /dev/ttyACM1
+TELEMETRY = False
+
+# One read per chip per update; altitude is derived from the pressure
+sampler = Sampler(clue._pressure, clue._humidity, SEA_LEVEL_PRESSURE)
+sampler.use(SENSOR_PROFILE)
 
 # Pressure trend tracking
 pressure_history = []
@@ -159,6 +170,16 @@ time.sleep(3)
 clue.pixel.fill((0, 255, 0))  # Green when ready
 print("Ready!")
 
+# Binary telemetry (None: print text lines)
+telemetry = None
+if TELEMETRY:
+    from telemetry import TelemetryWriter, FORECASTS, open_port
+    port = open_port()
+    if port is None:
+        print("Telemetry disabled: no USB data port (see boot.py)")
+    else:
+        telemetry = TelemetryWriter(port)
+
 start_time = time.monotonic()
 
 # Main loop
@@ -167,10 +188,11 @@ while True:
     uptime = int(current_time - start_time)
 
     # Read sensors
-    temperature = clue.temperature + TEMP_OFFSET
-    humidity = clue.humidity
-    pressure = clue.pressure
-    altitude = clue.altitude
+    sampler.update(current_time)
+    temperature = sampler.temperature + TEMP_OFFSET
+    humidity = sampler.humidity
+    pressure = sampler.pressure
+    altitude = sampler.altitude
 
     # Calculate compass heading
     mag_x, mag_y, mag_z = clue.magnetic
@@ -223,10 +245,14 @@ while True:
     # Update status
     status_label.text = f"Up: {uptime}s | Pts: {len(pressure_history)}"
 
-    # Print to serial
-    print(f"[{uptime:5d}s] T:{temperature:5.1f}C RH:{humidity:4.1f}% "
-          f"P:{pressure:7.1f}hPa Alt:{altitude:5.0f}m "
-          f"Head:{heading:3.0f}° {forecast_text}")
+    # Send to the computer
+    if telemetry is not None:
+        telemetry.send_weather(uptime, temperature, humidity, pressure, heading,
+                               FORECASTS.index(forecast_text))
+    else:
+        print(f"[{uptime:5d}s] T:{temperature:5.1f}C RH:{humidity:4.1f}% "
+              f"P:{pressure:7.1f}hPa Alt:{altitude:5.0f}m "
+              f"Head:{heading:3.0f}° {forecast_text}")
 
     # Animate NeoPixel based on weather forecast
     if "Clear" in forecast_text:
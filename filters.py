@@ -0,0 +1,89 @@
+"""
+Threshold Filtering
+===================
+
+Noise filtering and dwell times for the food-safety state machines.
+
+A single noisy sample near 4C used to flip SAFE and WARNING back and forth,
+restarting the danger-zone timer and redrawing the whole screen each time.
+Now a state change needs three things:
+
+- Smoother: the temperature is the median of the last few samples (a single
+  spike cannot cross a threshold), optionally followed by exponential
+  smoothing with a time constant in seconds, which works with any sample rate.
+- Hysteresis: the callers use a lower threshold to go back to a safe state
+  than to leave it.
+- Dwell: the condition must hold on every sample for a minimum time.
+
+    smoother = Smoother(median=5)
+    warming = Dwell(30)
+    temp = smoother.update(now, raw_temp)
+    if warming.check(now, temp > 4.0):
+        print("above 4C since", warming.since)
+"""
+
+
+class Smoother:
+    """Median of the last `median` samples, then optional exponential smoothing."""
+
+    def __init__(self, median=5, time_constant=0.0):
+        self.median = max(1, median)
+        self.time_constant = time_constant  # Seconds, 0 = no exponential smoothing
+        self.value = None  # Latest filtered value
+        self.time = None  # Time of the latest sample
+        self._window = []
+        self._next = 0  # Oldest sample once the window is full
+
+    def samples(self):
+        """The samples in the median window, oldest first."""
+        window = self._window
+        return window[self._next:] + window[:self._next]
+
+    def reset(self, samples=()):
+        """Forget the history, or start again from `samples` (oldest first)."""
+        self._window = list(samples)[-self.median:]
+        self._next = 0
+        self.value = None
+        self.time = None
+
+    def update(self, now, value):
+        """Add the sample `value` taken at `now` and return the filtered value."""
+        window = self._window
+        if len(window) < self.median:
+            window.append(value)
+        else:
+            window[self._next] = value
+            self._next = (self._next + 1) % self.median
+        ordered = sorted(window)
+        value = ordered[len(ordered) // 2]
+
+        if self.time_constant > 0 and self.value is not None and now > self.time:
+            elapsed = now - self.time
+            value = self.value + elapsed / (elapsed + self.time_constant) * (value - self.value)
+        self.value = value
+        self.time = now
+        return value
+
+
+class Dwell:
+    """Confirms a condition once it has held for `dwell` seconds."""
+
+    def __init__(self, dwell):
+        self.dwell = dwell
+        self.since = None  # First check of the current run where the condition held
+        self.last_clear = None  # Last check where it did not hold
+
+    def check(self, now, condition):
+        """True once `condition` has held on every check for `dwell` seconds."""
+        if not condition:
+            self.since = None
+            self.last_clear = now
+            return False
+        if self.since is None:
+            self.since = now
+        return now - self.since >= self.dwell
+
+    def reset(self):
+        """Forget the current run (e.g. after checks were paused)."""
+        self.since = None
+        self.last_clear = None
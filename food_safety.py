@@ -8,19 +8,38 @@ Features:
 - Time tracking in danger zone
 - 4-day maximum storage monitoring
 - Visual alerts and status display
+- Persistent log on CIRCUITPY (hold Button A at reset, see boot.py)
+- Resumes state and danger-zone time after a reset or brown-out
+- Sleeps between samples and blanks the display until someone looks
 
 Author: jeremycohoe
 License: MIT
 """
 
 import time
+import struct
+import alarm
 import board
 import displayio
 import terminalio
 from adafruit_display_text import label
 from adafruit_clue import clue
-
-# Calibration offsets
+from datalog import DataLog, PARKED_HEADER
+from snapshot import Snapshot, TRAILER_FORMAT
+from buttons import release_clue_buttons
+from sensors import Sampler
+from filters import Smoother
+from food_state import (FoodSafetyMachine, EVENT_MESSAGES, EVENT_STORAGE_LIMIT,
+                        EVENT_DANGER_LIMIT, STATE_INITIAL, STATE_SAFE, STATE_WARNING,
+                        STATE_DISCARD, STATE_CHARGE)
+from thermal import ThermalModel
+from calibration import load_calibration, CALIBRATION_FILE
+from power import (PowerScheduler, AdaptiveInterval, CLOCK_MEMORY_SIZE,
+                   ACTIVE_SECONDS, BOOT_SECONDS,
+                   enable_proximity_wake, print_battery_estimates)
+
+# Calibration offsets, used while /calibration.json (see calibration.py)
+# has no points for a sensor
 TEMP_OFFSET = -3.5  # Calibrated temperature offset
 HUMIDITY_OFFSET = 5.2  # Calibrated humidity offset
 
@@ -30,12 +49,78 @@ ROOM_TEMP = 21.0  # Degrees Celsius - defined room temperature
 DANGER_ZONE_LIMIT = 7200  # 2 hours in seconds
 MAX_STORAGE_DAYS = 4  # Maximum days in refrigerator
 
-# State definitions
-STATE_INITIAL = 0  # At room temperature, ready to start
-STATE_SAFE = 1  # Below 4°C, food is safe
-STATE_WARNING = 2  # Above 4°C but below 2 hour limit
-STATE_DISCARD = 3  # Exceeded safety limits
-STATE_CHARGE = 4  # Returned to room temp, needs charging
+# Noise filtering: a state change needs the median of TEMP_MEDIAN samples to
+# stay past its threshold for TRANSITION_DWELL seconds. Food leaves SAFE as
+# soon as it is above FOOD_SAFE_TEMP but only counts as safe again (or starts
+# monitoring) at TEMP_HYSTERESIS below it.
+TEMP_MEDIAN = 5  # Samples (1 = no median filter)
+TEMP_SMOOTHING = 0  # Exponential smoothing time constant in seconds (0 = off)
+TEMP_HYSTERESIS = 0.3  # Degrees Celsius
+TRANSITION_DWELL = 30  # Seconds
+
+# Thermal lag (see thermal.py): decide on an estimate of the food's core
+# temperature rather than the air around the CLUE, so opening the fridge door
+# does not count as danger-zone time. Calibration is done with the display on
+# and the CPU awake; the model swaps that self-heating for a correction that
+# follows the actual display and sleep duty cycles.
+# Fit FOOD_TIME_CONSTANT for your containers with thermal.py; a longer time
+# constant delays every warning by about as long.
+THERMAL_MODEL = False
+FOOD_TIME_CONSTANT = 1200  # Seconds (short, i.e. conservative, until fitted)
+
+# Persistent sensor log (needs write access: hold Button A at reset)
+LOG_FILE = "/food_log.bin"
+LOG_INTERVAL = 60  # Seconds between logged readings
+LOG_CAPACITY = 8640  # 6 days at 1-minute intervals (~200 KB)
+LOG_BATCH = 10  # Records buffered in RAM per flash write
+
+# State snapshots in microcontroller.nvm, saved on every state change and
+# periodically. Every save erases a 4 KB flash page on the nRF52840 (rated for
+# about 10,000 erases; the two slots alternate between two pages), so the
+# periodic save is rare while SAFE. In WARNING it is frequent, since danger-zone
+# time after the last snapshot is lost on a reset, but WARNING lasts at most
+# DANGER_ZONE_LIMIT. With a few door-opening excursions a day that is about 20
+# saves a day, 10 erases per page: about 2.5 years. Time while the board is off
+# cannot be measured and is not counted; after a reset up to
+# SNAPSHOT_INTERVAL of fridge time can be missing.
+SNAPSHOT_INTERVAL = 4 * 3600  # Seconds between periodic snapshots while not in WARNING
+WARNING_SNAPSHOT_INTERVAL = 300  # Seconds between periodic snapshots in WARNING
+SNAPSHOT_FORMAT = "<Bfff"  # state, time in fridge, danger total, danger span
+
+# Sensor acquisition profile (see sensors.py): forced-mode, 1x oversampled
+# readings; the BMP280 sleeps between samples
+SENSOR_PROFILE = "fridge-lowpower"
+
+# Adaptive sampling: slow while the temperature is steady and well away from
+# FOOD_SAFE_TEMP; fast near it, while it changes, in WARNING and while the
+# display is on. A crossing is noticed at most SLOW_SAMPLE_INTERVAL (plus
+# TRANSITION_DWELL) late, and the danger zone is counted from the last sample
+# before it.
+FAST_SAMPLE_INTERVAL = 2  # Seconds
+SLOW_SAMPLE_INTERVAL = 60  # Seconds (maximum detection latency)
+NEAR_SAFE_TEMP = 1.0  # Degrees C from FOOD_SAFE_TEMP that count as near
+FAST_RATE = 0.5 / 60  # Degrees C per second that count as changing (0.5C/min)
+
+# Power management (battery use inside the fridge)
+DEEP_SLEEP = False  # True: restart between samples (lowest current, slower wake)
+DISPLAY_TIMEOUT = 30  # Seconds the display stays on after a button or proximity
+DISPLAY_BRIGHTNESS = 1.0
+IDLE_BRIGHTNESS = 0.0  # Backlight when nobody is looking (0 = off)
+PROXIMITY_WAKE = 20  # Proximity reading (0-255) that counts as someone looking
+# Kept in alarm.sleep_memory across deep sleeps (times on the scheduler clock):
+# state, fridge entry, danger start, danger total, last snapshot, last log,
+# last sample time, temperature and rate of change, filtered temperature, dwell
+# timers (warming since/last clear, cooling since, room since), thermal model
+# self-heating and food temperature, then the median window (oldest first, NaN
+# where not filled yet), in one snapshot slot. The log records waiting for a
+# full LOG_BATCH are parked in the rest (see datalog.py), so a deep sleep does
+# not cost a flash write; if they do not all fit, the log is flushed sooner.
+SLEEP_STATE_FORMAT = "<Bfffffffffffffff" + "f" * TEMP_MEDIAN
+SLEEP_STATE_SIZE = struct.calcsize(SLEEP_STATE_FORMAT) + struct.calcsize(TRAILER_FORMAT)
+LOG_PARK_OFFSET = CLOCK_MEMORY_SIZE + SLEEP_STATE_SIZE
+LOG_PARK_SIZE = len(alarm.sleep_memory) - LOG_PARK_OFFSET
+if LOG_PARK_SIZE < PARKED_HEADER:
+    raise ValueError("TEMP_MEDIAN too large for alarm.sleep_memory")
 
 # Colors for safety zones
 COLOR_GREEN = 0x00FF00
@@ -45,22 +130,50 @@ COLOR_BLUE = 0x0000FF
 COLOR_WHITE = 0xFFFFFF
 COLOR_BLACK = 0x000000
 
-# Global state tracking
-current_state = STATE_INITIAL
-fridge_entry_time = None
-danger_zone_start = None
-total_danger_time = 0
-previous_temp = None
+# Global state tracking (the state machine itself is in food_state.py)
+machine = FoodSafetyMachine(FOOD_SAFE_TEMP, ROOM_TEMP, DANGER_ZONE_LIMIT,
+                            MAX_STORAGE_DAYS, TEMP_HYSTERESIS, TRANSITION_DWELL)
+last_log_time = None
+last_snapshot_time = None
+snapshot_state = None
+data_log = None  # DataLog, opened at startup (None while logging is disabled)
+sampler = Sampler(clue._pressure, clue._humidity)
+calibration = load_calibration(CALIBRATION_FILE, TEMP_OFFSET, HUMIDITY_OFFSET)
+sample_rate = AdaptiveInterval(FAST_SAMPLE_INTERVAL, SLOW_SAMPLE_INTERVAL,
+                               FOOD_SAFE_TEMP, NEAR_SAFE_TEMP, FAST_RATE)
+temp_filter = Smoother(TEMP_MEDIAN, TEMP_SMOOTHING)
+thermal = ThermalModel(FOOD_TIME_CONSTANT) if THERMAL_MODEL else None
+power = None  # PowerScheduler, created at startup
 
 def get_calibrated_temperature():
-    """Get calibrated temperature reading in Celsius"""
-    raw_temp = clue.temperature
-    return raw_temp + TEMP_OFFSET
+    """Get calibrated temperature of the latest sample in Celsius"""
+    return calibration.temperature(sampler.temperature)
+
+def read_temperatures(now):
+    """Take a sample; return the (air, food) temperatures in Celsius"""
+    sampler.read()
+    if thermal is None:
+        temp = get_calibrated_temperature()
+        return temp, temp
+
+    # Self-heating follows what the board did since the last sample
+    if power.display_awake:
+        display_level = DISPLAY_BRIGHTNESS
+        awake_duty = 1.0
+    else:
+        display_level = IDLE_BRIGHTNESS
+        awake_duty = 0.0
+        if thermal.time is not None and now > thermal.time:
+            active = ACTIVE_SECONDS + (BOOT_SECONDS if DEEP_SLEEP else 0.0)
+            awake_duty = min(1.0, active / (now - thermal.time))
+    # Undo the self-heating the calibration was made with
+    sensor_temp = get_calibrated_temperature() + thermal.steady_heating(1.0, 1.0)
+    thermal.update(now, sensor_temp, display_level, awake_duty)
+    return thermal.air, thermal.food
 
 def get_calibrated_humidity():
-    """Get calibrated humidity reading"""
-    raw_humidity = clue.humidity
-    return raw_humidity + HUMIDITY_OFFSET
+    """Get calibrated humidity of the latest sample"""
+    return calibration.humidity(sampler.humidity)
 
 def format_time_duration(seconds):
     """Convert seconds to human readable format"""
@@ -84,401 +197,396 @@ def format_days_hours(seconds):
     else:
         return "{:d}h".format(hours)
 
-def create_display_group(bg_color):
-    """Create a new display group with background color"""
+# Retained scene: one background and a fixed pool of labels, built once.
+# Each state only rearranges the pool when it is first shown; after that a
+# tick just rewrites the labels whose text actually changed.
+LABEL_POOL_SIZE = 8
+DEGREE = chr(176)
+
+# Per-state layouts: (background, text color, ((text, x, y, scale), ...))
+# Empty text marks a slot the update functions fill in every tick.
+LAYOUTS = {
+    STATE_INITIAL: (COLOR_WHITE, COLOR_BLACK, (
+        ("FOOD SAFETY", 60, 15, 1),
+        ("READY", 40, 60, 3),
+        ("", 20, 120, 2),  # Temperature
+        ("Place in fridge", 50, 170, 1),
+        ("Monitoring starts", 40, 190, 1),
+        ("at 4{}C".format(DEGREE), 80, 210, 1),
+    )),
+    STATE_SAFE: (COLOR_GREEN, COLOR_BLACK, (
+        ("FOOD SAFETY", 60, 15, 1),
+        ("SAFE", 60, 50, 3),
+        ("OK", 170, 50, 2),
+        ("", 20, 100, 2),  # Temperature
+        ("In Fridge:", 60, 140, 1),
+        ("", 70, 160, 2),  # Time in fridge
+        ("", 60, 200, 1),  # Days remaining
+    )),
+    STATE_WARNING: (COLOR_YELLOW, COLOR_BLACK, (
+        ("FOOD SAFETY", 60, 15, 1),
+        ("WARNING", 30, 50, 2),
+        ("!", 210, 50, 3),
+        ("", 20, 100, 2),  # Temperature
+        ("Above 4{}C:".format(DEGREE), 60, 140, 1),
+        ("", 70, 160, 2),  # Time in danger zone
+        ("", 40, 200, 1),  # Limit warning
+        ("Return to fridge", 40, 220, 1),
+    )),
+    STATE_DISCARD: (COLOR_RED, COLOR_WHITE, (
+        ("FOOD SAFETY", 60, 15, 1),
+        ("DISCARD", 30, 50, 2),
+        ("X", 200, 50, 3),
+        ("", 20, 100, 2),  # Temperature
+        ("", 10, 140, 1),  # Reason
+        ("NOT SAFE TO EAT", 10, 170, 2),
+        ("DISPOSE OF FOOD", 20, 210, 1),
+    )),
+    STATE_CHARGE: (COLOR_BLUE, COLOR_WHITE, (
+        ("FOOD SAFETY", 60, 15, 1),
+        ("CHARGE ME", 20, 50, 2),
+        ("", 20, 100, 2),  # Temperature
+        ("(Room Temperature)", 30, 130, 1),
+        ("Ready to reset", 50, 170, 1),
+        ("Connect USB", 60, 190, 1),
+        ("to charge", 70, 210, 1),
+    )),
+}
+
+# Index of the temperature label in each layout
+TEMP_SLOT = {
+    STATE_INITIAL: 2,
+    STATE_SAFE: 3,
+    STATE_WARNING: 3,
+    STATE_DISCARD: 3,
+    STATE_CHARGE: 2,
+}
+
+def create_scene():
+    """Create the retained display group, background palette and label pool"""
     group = displayio.Group()
 
-    # Create background
-    color_bitmap = displayio.Bitmap(240, 240, 1)
-    color_palette = displayio.Palette(1)
-    color_palette[0] = bg_color
-    bg_sprite = displayio.TileGrid(color_bitmap, pixel_shader=color_palette, x=0, y=0)
-    group.append(bg_sprite)
+    # 1-color background; only the palette entry changes between states
+    bg_bitmap = displayio.Bitmap(240, 240, 1)
+    bg_palette = displayio.Palette(1)
+    bg_palette[0] = COLOR_WHITE
+    group.append(displayio.TileGrid(bg_bitmap, pixel_shader=bg_palette, x=0, y=0))
 
-    return group
+    labels = []
+    for _ in range(LABEL_POOL_SIZE):
+        text_label = label.Label(terminalio.FONT, text="", color=COLOR_BLACK)
+        text_label.hidden = True
+        group.append(text_label)
+        labels.append(text_label)
 
-def update_display_safe(temp, days_in_fridge):
-    """Update display for SAFE state (GREEN)"""
-    group = create_display_group(COLOR_GREEN)
-
-    # Title
-    title = label.Label(terminalio.FONT, text="FOOD SAFETY", color=COLOR_BLACK)
-    title.x = 60
-    title.y = 15
-    group.append(title)
-
-    # Status
-    status = label.Label(terminalio.FONT, text="SAFE", color=COLOR_BLACK, scale=3)
-    status.x = 60
-    status.y = 50
-    group.append(status)
-
-    checkmark = label.Label(terminalio.FONT, text="OK", color=COLOR_BLACK, scale=2)
-    checkmark.x = 170
-    checkmark.y = 50
-    group.append(checkmark)
-
-    # Temperature
-    temp_text = "Temp: {:.1f}{}C".format(temp, chr(176))
-    temp_label = label.Label(terminalio.FONT, text=temp_text, color=COLOR_BLACK, scale=2)
-    temp_label.x = 20
-    temp_label.y = 100
-    group.append(temp_label)
-
-    # Time in fridge
-    if days_in_fridge is not None:
-        time_text = "In Fridge:"
-        time_label = label.Label(terminalio.FONT, text=time_text, color=COLOR_BLACK)
-        time_label.x = 60
-        time_label.y = 140
-        group.append(time_label)
-
-        days_text = format_days_hours(days_in_fridge)
-        days_label = label.Label(terminalio.FONT, text=days_text, color=COLOR_BLACK, scale=2)
-        days_label.x = 70
-        days_label.y = 160
-        group.append(days_label)
-
-        # Days remaining
-        days_elapsed = int(days_in_fridge / 86400)
-        days_left = MAX_STORAGE_DAYS - days_elapsed
-        if days_left >= 0:
-            left_text = "Safe for: {}d".format(days_left)
+    clue.display.root_group = group
+    return group, bg_palette, labels
+
+scene_group, scene_palette, scene_labels = create_scene()
+scene_state = None  # Layout currently arranged in the label pool
+
+def set_text(index, text):
+    """Set a pooled label's text, skipping the relayout if it is unchanged"""
+    text_label = scene_labels[index]
+    if text_label.text != text:
+        text_label.text = text
+
+def show_layout(state):
+    """Arrange the label pool for `state`; no-op if it is already shown"""
+    global scene_state
+
+    if scene_state == state:
+        return
+    bg_color, fg_color, slots = LAYOUTS[state]
+    scene_palette[0] = bg_color
+    for index, text_label in enumerate(scene_labels):
+        if index < len(slots):
+            text, x, y, scale = slots[index]
+            text_label.scale = scale
+            text_label.x = x
+            text_label.y = y
+            text_label.color = fg_color
+            text_label.text = text
+            text_label.hidden = False
         else:
-            left_text = "OVER 4 DAYS!"
+            text_label.hidden = True
+    scene_state = state
 
-        left_label = label.Label(terminalio.FONT, text=left_text, color=COLOR_BLACK)
-        left_label.x = 60
-        left_label.y = 200
-        group.append(left_label)
+def show_temperature(state, temp):
+    """Show the current temperature in the layout for `state`"""
+    show_layout(state)
+    set_text(TEMP_SLOT[state], "Temp: {:.1f}{}C".format(temp, DEGREE))
 
-    clue.display.root_group = group
+def update_display_safe(temp, days_in_fridge):
+    """Update display for SAFE state (GREEN)"""
+    show_temperature(STATE_SAFE, temp)
+
+    # Time in fridge and days remaining
+    days_elapsed = int(days_in_fridge / 86400)
+    days_left = MAX_STORAGE_DAYS - days_elapsed
+    if days_left >= 0:
+        left_text = "Safe for: {}d".format(days_left)
+    else:
+        left_text = "OVER 4 DAYS!"
+    set_text(5, format_days_hours(days_in_fridge))
+    set_text(6, left_text)
 
 def update_display_warning(temp, danger_time):
     """Update display for WARNING state (YELLOW)"""
-    group = create_display_group(COLOR_YELLOW)
-
-    # Title
-    title = label.Label(terminalio.FONT, text="FOOD SAFETY", color=COLOR_BLACK)
-    title.x = 60
-    title.y = 15
-    group.append(title)
-
-    # Status
-    status = label.Label(terminalio.FONT, text="WARNING", color=COLOR_BLACK, scale=2)
-    status.x = 30
-    status.y = 50
-    group.append(status)
-
-    warning_symbol = label.Label(terminalio.FONT, text="!", color=COLOR_BLACK, scale=3)
-    warning_symbol.x = 210
-    warning_symbol.y = 50
-    group.append(warning_symbol)
-
-    # Temperature
-    temp_text = "Temp: {:.1f}{}C".format(temp, chr(176))
-    temp_label = label.Label(terminalio.FONT, text=temp_text, color=COLOR_BLACK, scale=2)
-    temp_label.x = 20
-    temp_label.y = 100
-    group.append(temp_label)
-
-    # Time in danger zone
-    time_text = "Above 4{}C:".format(chr(176))
-    time_label = label.Label(terminalio.FONT, text=time_text, color=COLOR_BLACK)
-    time_label.x = 60
-    time_label.y = 140
-    group.append(time_label)
-
-    danger_text = format_time_duration(danger_time)
-    danger_label = label.Label(terminalio.FONT, text=danger_text, color=COLOR_BLACK, scale=2)
-    danger_label.x = 70
-    danger_label.y = 160
-    group.append(danger_label)
-
-    # Limit warning
+    show_temperature(STATE_WARNING, temp)
+
+    # Time in danger zone and limit warning
     remaining = DANGER_ZONE_LIMIT - danger_time
     limit_text = "Limit: 2 hours"
     if remaining < 600:  # Less than 10 minutes
         limit_text = "TIME CRITICAL!"
-
-    limit_label = label.Label(terminalio.FONT, text=limit_text, color=COLOR_BLACK, scale=1)
-    limit_label.x = 40
-    limit_label.y = 200
-    group.append(limit_label)
-
-    # Action
-    action = label.Label(terminalio.FONT, text="Return to fridge", color=COLOR_BLACK)
-    action.x = 40
-    action.y = 220
-    group.append(action)
-
-    clue.display.root_group = group
+    set_text(5, format_time_duration(danger_time))
+    set_text(6, limit_text)
 
 def update_display_discard(temp, reason):
     """Update display for DISCARD state (RED)"""
-    group = create_display_group(COLOR_RED)
-
-    # Title
-    title = label.Label(terminalio.FONT, text="FOOD SAFETY", color=COLOR_WHITE)
-    title.x = 60
-    title.y = 15
-    group.append(title)
-
-    # Status
-    status = label.Label(terminalio.FONT, text="DISCARD", color=COLOR_WHITE, scale=2)
-    status.x = 30
-    status.y = 50
-    group.append(status)
-
-    x_symbol = label.Label(terminalio.FONT, text="X", color=COLOR_WHITE, scale=3)
-    x_symbol.x = 200
-    x_symbol.y = 50
-    group.append(x_symbol)
-
-    # Temperature
-    temp_text = "Temp: {:.1f}{}C".format(temp, chr(176))
-    temp_label = label.Label(terminalio.FONT, text=temp_text, color=COLOR_WHITE, scale=2)
-    temp_label.x = 20
-    temp_label.y = 100
-    group.append(temp_label)
-
-    # Reason
-    reason_label = label.Label(terminalio.FONT, text=reason, color=COLOR_WHITE)
-    reason_label.x = 10
-    reason_label.y = 140
-    group.append(reason_label)
-
-    # Warning messages
-    warning1 = label.Label(terminalio.FONT, text="NOT SAFE TO EAT", color=COLOR_WHITE, scale=2)
-    warning1.x = 10
-    warning1.y = 170
-    group.append(warning1)
-
-    warning2 = label.Label(terminalio.FONT, text="DISPOSE OF FOOD", color=COLOR_WHITE, scale=1)
-    warning2.x = 20
-    warning2.y = 210
-    group.append(warning2)
-
-    clue.display.root_group = group
+    show_temperature(STATE_DISCARD, temp)
+    set_text(4, reason)
 
 def update_display_charge(temp):
     """Update display for CHARGE state (BLUE)"""
-    group = create_display_group(COLOR_BLUE)
-
-    # Title
-    title = label.Label(terminalio.FONT, text="FOOD SAFETY", color=COLOR_WHITE)
-    title.x = 60
-    title.y = 15
-    group.append(title)
-
-    # Status
-    status = label.Label(terminalio.FONT, text="CHARGE ME", color=COLOR_WHITE, scale=2)
-    status.x = 20
-    status.y = 50
-    group.append(status)
-
-    # Temperature
-    temp_text = "Temp: {:.1f}{}C".format(temp, chr(176))
-    temp_label = label.Label(terminalio.FONT, text=temp_text, color=COLOR_WHITE, scale=2)
-    temp_label.x = 20
-    temp_label.y = 100
-    group.append(temp_label)
-
-    room_temp_label = label.Label(terminalio.FONT, text="(Room Temperature)", color=COLOR_WHITE)
-    room_temp_label.x = 30
-    room_temp_label.y = 130
-    group.append(room_temp_label)
-
-    # Instructions
-    instr1 = label.Label(terminalio.FONT, text="Ready to reset", color=COLOR_WHITE)
-    instr1.x = 50
-    instr1.y = 170
-    group.append(instr1)
-
-    instr2 = label.Label(terminalio.FONT, text="Connect USB", color=COLOR_WHITE)
-    instr2.x = 60
-    instr2.y = 190
-    group.append(instr2)
-
-    instr3 = label.Label(terminalio.FONT, text="to charge", color=COLOR_WHITE)
-    instr3.x = 70
-    instr3.y = 210
-    group.append(instr3)
-
-    clue.display.root_group = group
+    show_temperature(STATE_CHARGE, temp)
 
 def update_display_initial(temp):
     """Update display for INITIAL state (waiting to enter fridge)"""
-    group = create_display_group(COLOR_WHITE)
-
-    # Title
-    title = label.Label(terminalio.FONT, text="FOOD SAFETY", color=COLOR_BLACK)
-    title.x = 60
-    title.y = 15
-    group.append(title)
-
-    # Status
-    status = label.Label(terminalio.FONT, text="READY", color=COLOR_BLACK, scale=3)
-    status.x = 40
-    status.y = 60
-    group.append(status)
-
-    # Temperature
-    temp_text = "Temp: {:.1f}{}C".format(temp, chr(176))
-    temp_label = label.Label(terminalio.FONT, text=temp_text, color=COLOR_BLACK, scale=2)
-    temp_label.x = 20
-    temp_label.y = 120
-    group.append(temp_label)
-
-    # Instructions
-    instr1 = label.Label(terminalio.FONT, text="Place in fridge", color=COLOR_BLACK)
-    instr1.x = 50
-    instr1.y = 170
-    group.append(instr1)
-
-    instr2 = label.Label(terminalio.FONT, text="Monitoring starts", color=COLOR_BLACK)
-    instr2.x = 40
-    instr2.y = 190
-    group.append(instr2)
-
-    instr3 = label.Label(terminalio.FONT, text="at 4{}C".format(chr(176)), color=COLOR_BLACK)
-    instr3.x = 80
-    instr3.y = 210
-    group.append(instr3)
-
-    clue.display.root_group = group
+    show_temperature(STATE_INITIAL, temp)
+
+def clock():
+    """Seconds on the power scheduler's clock (keeps counting in deep sleep)"""
+    if power is None:
+        return time.monotonic()  # Imported without starting the scheduler
+    return power.monotonic()
+
+def save_snapshot():
+    """Persist the state machine as elapsed times (-1 = not running)"""
+    global last_snapshot_time, snapshot_state
+
+    now = clock()
+    fridge_entry_time = machine.fridge_entry_time
+    danger_zone_start = machine.danger_zone_start
+    fridge_elapsed = now - fridge_entry_time if fridge_entry_time is not None else -1.0
+    danger_span = now - danger_zone_start if danger_zone_start is not None else -1.0
+    state_snapshot.save(machine.state, fridge_elapsed, machine.total_danger_time, danger_span)
+    last_snapshot_time = now
+    snapshot_state = machine.state
+
+def restore_snapshot():
+    """Resume the state machine from the last snapshot, if any"""
+    global snapshot_state
+
+    saved = state_snapshot.load()
+    if saved is None:
+        return False
+
+    state, fridge_elapsed, danger_total, danger_span = saved
+    if not STATE_INITIAL <= state <= STATE_CHARGE:
+        return False
+
+    now = clock()
+    machine.state = state
+    machine.fridge_entry_time = now - fridge_elapsed if fridge_elapsed >= 0 else None
+    machine.danger_zone_start = now - danger_span if danger_span >= 0 else None
+    machine.total_danger_time = danger_total
+    snapshot_state = state
+    return True
+
+def none_to_float(value):
+    """Encode an optional time for struct packing (-1 = None)"""
+    return -1.0 if value is None else value
+
+def float_to_none(value):
+    """Decode an optional time packed by none_to_float()"""
+    return None if value < 0 else value
+
+def save_sleep_state():
+    """Keep the state machine and timers in sleep memory for the next wake"""
+    window = temp_filter.samples()
+    window = [float("nan")] * (TEMP_MEDIAN - len(window)) + window
+    heating = food = 0.0
+    if thermal is not None and thermal.time is not None:
+        heating = thermal.heating
+        food = thermal.food
+    warming, cooling, at_room = machine.warming, machine.cooling, machine.at_room
+    sleep_state.save(machine.state, none_to_float(machine.fridge_entry_time),
+                     none_to_float(machine.danger_zone_start), machine.total_danger_time,
+                     none_to_float(last_snapshot_time), none_to_float(last_log_time),
+                     none_to_float(sample_rate.time), sample_rate.value or 0.0,
+                     sample_rate.rate, temp_filter.value or 0.0,
+                     none_to_float(warming.since), none_to_float(warming.last_clear),
+                     none_to_float(cooling.since), none_to_float(at_room.since),
+                     heating, food, *window)
+
+def restore_sleep_state():
+    """Pick up exactly where the last deep sleep left off"""
+    global last_snapshot_time, last_log_time, snapshot_state
+
+    saved = sleep_state.load()
+    if saved is None:
+        return False
+    machine.state = saved[0]
+    machine.fridge_entry_time = float_to_none(saved[1])
+    machine.danger_zone_start = float_to_none(saved[2])
+    machine.total_danger_time = saved[3]
+    last_snapshot_time = float_to_none(saved[4])
+    last_log_time = float_to_none(saved[5])
+    sample_rate.time = float_to_none(saved[6])
+    if sample_rate.time is not None:
+        sample_rate.value = saved[7]
+        sample_rate.rate = saved[8]
+        temp_filter.reset([value for value in saved[16:] if value == value])  # Skip NaN
+        temp_filter.value = saved[9]
+        temp_filter.time = sample_rate.time
+        if thermal is not None:
+            thermal.time = sample_rate.time
+            thermal.heating = saved[14]
+            thermal.food = saved[15]
+    machine.warming.since = float_to_none(saved[10])
+    machine.warming.last_clear = float_to_none(saved[11])
+    machine.cooling.since = float_to_none(saved[12])
+    machine.at_room.since = float_to_none(saved[13])
+    snapshot_state = machine.state
+    return True
+
+def prepare_for_deep_sleep():
+    """Park the unwritten log records and save state; RAM is lost in deep sleep"""
+    if data_log is not None:
+        data_log.park(alarm.sleep_memory, LOG_PARK_OFFSET, LOG_PARK_SIZE)
+    save_sleep_state()
+    clue.pixel.fill(COLOR_BLACK)
 
 def update_state(temp):
-    """Update state machine based on temperature and time"""
-    global current_state, fridge_entry_time, danger_zone_start, total_danger_time
-
-    current_time = time.monotonic()
-
-    if current_state == STATE_INITIAL:
-        # Waiting to enter fridge
-        if temp <= FOOD_SAFE_TEMP:
-            current_state = STATE_SAFE
-            fridge_entry_time = current_time
-            danger_zone_start = None
-            total_danger_time = 0
-            print("Entered fridge - monitoring started")
+    """Advance the state machine with the filtered temperature and redraw"""
+    current_time = clock()
+    event = machine.update(current_time, temp)
+    if event is not None:
+        print(EVENT_MESSAGES[event])
+
+    state = machine.state
+    if state == STATE_INITIAL:
         update_display_initial(temp)
-
-    elif current_state == STATE_SAFE:
-        # Food is safe in fridge
-        time_in_fridge = current_time - fridge_entry_time
-        days_in_fridge_seconds = int(time_in_fridge)
-
-        # Check if exceeded maximum storage
-        if time_in_fridge > (MAX_STORAGE_DAYS * 86400):
-            current_state = STATE_DISCARD
+    elif state == STATE_SAFE:
+        update_display_safe(temp, int(current_time - machine.fridge_entry_time))
+    elif state == STATE_WARNING:
+        update_display_warning(temp, machine.danger_time(current_time))
+    elif state == STATE_DISCARD:
+        if event == EVENT_STORAGE_LIMIT:
             reason = "Stored > 4 days"
-            update_display_discard(temp, reason)
-            print("DISCARD: Exceeded 4 day storage limit")
-
-        # Check if temperature rose above safe
-        elif temp > FOOD_SAFE_TEMP:
-            current_state = STATE_WARNING
-            danger_zone_start = current_time
-            print("WARNING: Temperature above 4C")
-            update_display_warning(temp, 0)
-
-        # Check if returned to room temperature
-        elif temp >= ROOM_TEMP:
-            current_state = STATE_CHARGE
-            print("Returned to room temperature - charge mode")
-            update_display_charge(temp)
-
-        else:
-            update_display_safe(temp, days_in_fridge_seconds)
-
-    elif current_state == STATE_WARNING:
-        # Temperature above safe but monitoring
-        danger_time = current_time - danger_zone_start + total_danger_time
-
-        # Check if exceeded 2 hour limit
-        if danger_time >= DANGER_ZONE_LIMIT:
-            current_state = STATE_DISCARD
-            reason_text = "Above 4{}C > 2hrs".format(chr(176))
-            update_display_discard(temp, reason_text)
-            print("DISCARD: Exceeded 2 hour danger zone")
-
-        # Check if returned to safe temperature
-        elif temp <= FOOD_SAFE_TEMP:
-            total_danger_time = danger_time
-            danger_zone_start = None
-            current_state = STATE_SAFE
-            print("Returned to safe temperature")
-            time_in_fridge = current_time - fridge_entry_time
-            update_display_safe(temp, int(time_in_fridge))
-
-        # Check if returned to room temperature
-        elif temp >= ROOM_TEMP:
-            current_state = STATE_CHARGE
-            print("Returned to room temperature - charge mode")
-            update_display_charge(temp)
-
-        else:
-            update_display_warning(temp, danger_time)
-
-    elif current_state == STATE_DISCARD:
-        # Food must be discarded
-        if temp >= ROOM_TEMP:
-            current_state = STATE_CHARGE
-            print("Returned to room temperature - charge mode")
-            update_display_charge(temp)
+        elif event == EVENT_DANGER_LIMIT:
+            reason = "Above 4{}C > 2hrs".format(DEGREE)
         else:
-            # Stay in discard state
-            reason_text = "UNSAFE"
-            update_display_discard(temp, reason_text)
-
-    elif current_state == STATE_CHARGE:
-        # Waiting to be recharged and reset
-        if temp <= FOOD_SAFE_TEMP:
-            # Reset to initial state
-            current_state = STATE_INITIAL
-            fridge_entry_time = None
-            danger_zone_start = None
-            total_danger_time = 0
-            print("Reset - ready for new monitoring")
-            update_display_initial(temp)
-        else:
-            update_display_charge(temp)
-
-# Main loop
-print("Food Safety Monitor Starting...")
-print("FDA Compliant Leftover Monitoring")
-print("Safe Temp: <= 4C, Danger Zone Limit: 2 hours")
-print("Max Storage: 4 days")
-print("-" * 40)
-
-# Initial display
-temp = get_calibrated_temperature()
-update_display_initial(temp)
-
-while True:
+            reason = "UNSAFE"
+        update_display_discard(temp, reason)
+    else:
+        update_display_charge(temp)
+
+# Main loop (skipped when imported, e.g. by benchmarks/food_safety_render.py)
+if __name__ == "__main__":
+    # Power scheduler: buttons and the proximity sensor wake the display
+    release_clue_buttons(clue)
+    enable_proximity_wake(clue._sensor, PROXIMITY_WAKE)
+    power = PowerScheduler(clue.display, deep_sleep=DEEP_SLEEP,
+                           display_timeout=DISPLAY_TIMEOUT,
+                           brightness=DISPLAY_BRIGHTNESS,
+                           idle_brightness=IDLE_BRIGHTNESS,
+                           proximity=clue._sensor,
+                           proximity_pin=board.PROXIMITY_LIGHT_INTERRUPT)
+    power.before_deep_sleep = prepare_for_deep_sleep
+    sleep_state = Snapshot(SLEEP_STATE_FORMAT, alarm.sleep_memory,
+                           CLOCK_MEMORY_SIZE, SLEEP_STATE_SIZE, slots=1)
+
+    if not power.woke_from_deep_sleep:
+        print("Food Safety Monitor Starting...")
+        print("FDA Compliant Leftover Monitoring")
+        print("Safe Temp: <= 4C, Danger Zone Limit: 2 hours")
+        print("Max Storage: 4 days")
+        print("Sensor profile: {}".format(SENSOR_PROFILE))
+        print("Calibration: {}".format(calibration.source or "built-in offsets"))
+        print("-" * 40)
+        print_battery_estimates()
+        print("-" * 40)
+
+    # Open the persistent log
+    data_log = DataLog(LOG_FILE, LOG_CAPACITY, LOG_BATCH)
     try:
-        # Get current temperature
-        temp = get_calibrated_temperature()
-
-        # Update state machine
-        update_state(temp)
-
-        # Update NeoPixel based on state
-        if current_state == STATE_SAFE:
-            clue.pixel.fill(COLOR_GREEN)
-        elif current_state == STATE_WARNING:
-            clue.pixel.fill(COLOR_YELLOW)
-        elif current_state == STATE_DISCARD:
-            clue.pixel.fill(COLOR_RED)
-        elif current_state == STATE_CHARGE:
-            clue.pixel.fill(COLOR_BLUE)
+        data_log.open()
+        if power.woke_from_deep_sleep:
+            data_log.unpark(alarm.sleep_memory, LOG_PARK_OFFSET, LOG_PARK_SIZE)
+        elif data_log.last is not None:
+            print("Log recovered: record #{}".format(data_log.last[0]))
+    except OSError as e:
+        print("Data log disabled:", e)
+        data_log = None
+
+    # Resume from sleep memory after a deep sleep, else from the last
+    # nvm snapshot, or start fresh. After a deep sleep the loop below takes
+    # the first sample.
+    state_snapshot = Snapshot(SNAPSHOT_FORMAT)
+    sampler.use(SENSOR_PROFILE)
+    if not (power.woke_from_deep_sleep and restore_sleep_state()):
+        now = clock()
+        temp = temp_filter.update(now, read_temperatures(now)[1])
+        if restore_snapshot():
+            print("Resumed from snapshot: state {}".format(machine.state))
+            update_state(temp)
         else:
-            clue.pixel.fill(COLOR_WHITE)
-
-        # Wait before next update
-        time.sleep(2)
+            update_display_initial(temp)
 
-    except Exception as e:
-        print("Error:", e)
-        time.sleep(2)
+    while True:
+        try:
+            # Get current temperature
+            tick_start = clock()
+            air_temp, food_temp = read_temperatures(tick_start)
+            temp = temp_filter.update(tick_start, food_temp)
+
+            # Update state machine (filtered food temperature); the sample
+            # rate follows the air reading so a real change speeds it up
+            # right away
+            update_state(temp)
+            sample_rate.update(tick_start, air_temp)
+
+            # Snapshot on state changes and every SNAPSHOT_INTERVAL seconds
+            # (WARNING_SNAPSHOT_INTERVAL in WARNING)
+            now = clock()
+            if machine.state == STATE_WARNING:
+                snapshot_interval = WARNING_SNAPSHOT_INTERVAL
+            else:
+                snapshot_interval = SNAPSHOT_INTERVAL
+            if (machine.state != snapshot_state or last_snapshot_time is None
+                    or now - last_snapshot_time >= snapshot_interval):
+                save_snapshot()
+
+            # Log a reading every LOG_INTERVAL seconds
+            if data_log is not None and (last_log_time is None or now - last_log_time >= LOG_INTERVAL):
+                data_log.append(time.time(), air_temp, get_calibrated_humidity(), sampler.pressure)
+                last_log_time = now
+
+            # Someone looking at the CLUE keeps the display on
+            if clue.proximity >= PROXIMITY_WAKE:
+                power.note_activity()
+
+            # Update NeoPixel based on state (off while nobody is looking)
+            if not power.display_awake:
+                clue.pixel.fill(COLOR_BLACK)
+            elif machine.state == STATE_SAFE:
+                clue.pixel.fill(COLOR_GREEN)
+            elif machine.state == STATE_WARNING:
+                clue.pixel.fill(COLOR_YELLOW)
+            elif machine.state == STATE_DISCARD:
+                clue.pixel.fill(COLOR_RED)
+            elif machine.state == STATE_CHARGE:
+                clue.pixel.fill(COLOR_BLUE)
+            else:
+                clue.pixel.fill(COLOR_WHITE)
+
+            # Sleep until the next sample (the program restarts after a deep sleep)
+            interval = sample_rate.interval(machine.state == STATE_WARNING or power.display_awake)
+            power.sleep_until(tick_start + interval)
+
+        except Exception as e:
+            print("Error:", e)
+            time.sleep(2)
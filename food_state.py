@@ -0,0 +1,142 @@
+"""
+Food Safety State Machine
+=========================
+
+The INITIAL/SAFE/WARNING/DISCARD/CHARGE logic of food_safety.py with the
+clock passed in and no display or console output, so the firmware and the
+host-side replay tool (python -m replay) run exactly the same decisions.
+
+    machine = FoodSafetyMachine(safe_temp=4.0, danger_limit=7200)
+    event = machine.update(now, filtered_temp)
+    if event is not None:
+        print(EVENT_MESSAGES[event])
+    if machine.state == STATE_WARNING:
+        show(machine.danger_time(now))
+
+`now` is any monotonic clock in seconds (the power scheduler's on the CLUE,
+log timestamps in a replay). The temperature should already be filtered
+(filters.Smoother); the machine applies the hysteresis and dwell times.
+"""
+
+from filters import Dwell
+
+# States
+STATE_INITIAL = 0  # At room temperature, ready to start
+STATE_SAFE = 1  # Below 4°C, food is safe
+STATE_WARNING = 2  # Above 4°C but below 2 hour limit
+STATE_DISCARD = 3  # Exceeded safety limits
+STATE_CHARGE = 4  # Returned to room temp, needs charging
+STATE_NAMES = ("INITIAL", "SAFE", "WARNING", "DISCARD", "CHARGE")
+
+# Events returned by update() when the state changes
+EVENT_ENTERED = 0  # INITIAL -> SAFE
+EVENT_WARNING = 1  # SAFE -> WARNING
+EVENT_SAFE_AGAIN = 2  # WARNING -> SAFE
+EVENT_STORAGE_LIMIT = 3  # SAFE -> DISCARD
+EVENT_DANGER_LIMIT = 4  # WARNING -> DISCARD
+EVENT_ROOM = 5  # SAFE, WARNING or DISCARD -> CHARGE
+EVENT_RESET = 6  # CHARGE -> INITIAL
+EVENT_MESSAGES = (
+    "Entered fridge - monitoring started",
+    "WARNING: Temperature above 4C",
+    "Returned to safe temperature",
+    "DISCARD: Exceeded 4 day storage limit",
+    "DISCARD: Exceeded 2 hour danger zone",
+    "Returned to room temperature - charge mode",
+    "Reset - ready for new monitoring",
+)
+
+
+class FoodSafetyMachine:
+    """Food safety state and timers, advanced by update(now, temp)."""
+
+    def __init__(self, safe_temp=4.0, room_temp=21.0, danger_limit=7200,
+                 max_storage_days=4, hysteresis=0.3, dwell=30):
+        self.safe_temp = safe_temp  # C
+        self.room_temp = room_temp  # C
+        self.danger_limit = danger_limit  # Seconds above safe_temp before DISCARD
+        self.max_storage_days = max_storage_days
+        self.hysteresis = hysteresis  # C below safe_temp to count as safe again
+        self.warming = Dwell(dwell)  # Above safe_temp
+        self.cooling = Dwell(dwell)  # At or below safe_temp - hysteresis
+        self.at_room = Dwell(dwell)  # At or above room_temp
+        self.state = STATE_INITIAL
+        self.fridge_entry_time = None
+        self.danger_zone_start = None  # Start of the current danger-zone span
+        self.total_danger_time = 0  # Danger-zone seconds of earlier spans
+
+    def reset_dwell(self):
+        """Forget threshold runs in progress (e.g. after a restart)."""
+        self.warming.reset()
+        self.cooling.reset()
+        self.at_room.reset()
+
+    def danger_time(self, now):
+        """Danger-zone seconds so far, including the current span."""
+        if self.danger_zone_start is None:
+            return self.total_danger_time
+        return now - self.danger_zone_start + self.total_danger_time
+
+    def update(self, now, temp):
+        """Advance with the filtered temperature `temp` at `now`.
+
+        Returns the EVENT_* of a state change, or None.
+        """
+        # Threshold crossings that have lasted the dwell time
+        warm = self.warming.check(now, temp > self.safe_temp)
+        cold = self.cooling.check(now, temp <= self.safe_temp - self.hysteresis)
+        room = self.at_room.check(now, temp >= self.room_temp)
+        state = self.state
+
+        if state == STATE_INITIAL:
+            # Waiting to enter fridge
+            if cold:
+                self.state = STATE_SAFE
+                self.fridge_entry_time = now
+                self.danger_zone_start = None
+                self.total_danger_time = 0
+                return EVENT_ENTERED
+
+        elif state == STATE_SAFE:
+            if now - self.fridge_entry_time > self.max_storage_days * 86400:
+                self.state = STATE_DISCARD
+                return EVENT_STORAGE_LIMIT
+            if warm:
+                self.state = STATE_WARNING
+                # It crossed some time after the last safe sample: count from there
+                warming = self.warming
+                self.danger_zone_start = warming.since if warming.last_clear is None else warming.last_clear
+                return EVENT_WARNING
+            if room:
+                self.state = STATE_CHARGE
+                return EVENT_ROOM
+
+        elif state == STATE_WARNING:
+            danger_time = self.danger_time(now)
+            if danger_time >= self.danger_limit:
+                self.state = STATE_DISCARD
+                return EVENT_DANGER_LIMIT
+            if cold:
+                self.total_danger_time = danger_time
+                self.danger_zone_start = None
+                self.state = STATE_SAFE
+                return EVENT_SAFE_AGAIN
+            if room:
+                self.state = STATE_CHARGE
+                return EVENT_ROOM
+
+        elif state == STATE_DISCARD:
+            if room:
+                self.state = STATE_CHARGE
+                return EVENT_ROOM
+
+        elif state == STATE_CHARGE:
+            # Waiting to be recharged and reset
+            if cold:
+                self.state = STATE_INITIAL
+                self.fridge_entry_time = None
+                self.danger_zone_start = None
+                self.total_danger_time = 0
+                return EVENT_RESET
+
+        return None
@@ -0,0 +1,356 @@
+"""
+Sensor History Helpers
+======================
+
+Fixed-size, allocation-free storage and statistics for logged readings.
+
+RingBuffer stores every channel (temperature, humidity, pressure) in its
+own array('f') behind one shared write index, and iterates oldest->newest
+so trends and sparklines see the data in time order even after wrapping.
+Empty slots hold NaN instead of None, so each entry costs 4 bytes.
+
+RollingStats is attached to one channel of a RingBuffer and is updated on
+every append (once per LOG_INTERVAL). It answers min/avg/max and the
+old-half vs new-half trend in O(1), so the Trends and Stats views no
+longer rescan the history on every 2-second tick.
+
+TieredHistory keeps the raw samples plus downsampled min/avg/max tiers
+(10-minute points for a day, hourly points for a week by default), so
+week-long history costs a few KB of fixed memory instead of one float
+object per minute.
+
+Copy this file to the CIRCUITPY drive next to code.py.
+"""
+
+from array import array
+
+EMPTY = float("nan")  # Sentinel for slots that have never been written
+
+
+class RingBuffer:
+    """Chronologically ordered multi-channel ring buffer of floats."""
+
+    def __init__(self, size, channels=1):
+        self.size = size
+        self.channels = channels
+        self._data = tuple(array("f", [EMPTY] * size) for _ in range(channels))
+        self._seq = 0  # Total appends; next slot is _seq % size for every channel
+        self._count = 0
+        self._stats = []
+
+    def __len__(self):
+        return self._count
+
+    def attach(self, stats):
+        """Register RollingStats to be updated on every append."""
+        self._stats.append(stats)
+
+    def append(self, *values):
+        """Store one reading per channel, overwriting the oldest when full."""
+        size = self.size
+        slot = self._seq % size
+        full = self._count == size
+
+        for stats in self._stats:
+            stats._evict(self._data[stats.channel][slot] if full else None)
+
+        for channel, value in enumerate(values):
+            self._data[channel][slot] = value
+        self._seq += 1
+        if not full:
+            self._count += 1
+
+        for stats in self._stats:
+            stats._add()
+
+    def get(self, index, channel=0):
+        """Return a value by chronological index (0 = oldest, -1 = newest)."""
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("history index out of range")
+        return self._data[channel][(self._seq - self._count + index) % self.size]
+
+    def values(self, channel=0):
+        """Iterate one channel from oldest to newest without copying."""
+        return self.last(self._count, channel)
+
+    def last(self, n, channel=0):
+        """Iterate the newest `n` values of one channel, oldest first."""
+        data = self._data[channel]
+        size = self.size
+        n = min(n, self._count)
+        start = self._seq - n
+        for i in range(n):
+            yield data[(start + i) % size]
+
+
+class RollingStats:
+    """Running min/avg/max and half-window trend over one RingBuffer channel."""
+
+    def __init__(self, buffer, channel=0, track_min=True, track_max=True):
+        if len(buffer):
+            raise ValueError("RollingStats must be attached to an empty buffer")
+        self.buffer = buffer
+        self.channel = channel
+        self.size = buffer.size
+        self._values = buffer._data[channel]  # Slot = sequence % size
+        self._seq = 0  # Total number of values pushed
+        self._count = 0
+        self._full = False
+        self._sum = 0.0
+        self._old_sum = 0.0  # Sum of the older half (first count // 2 values)
+
+        # Monotonic deques of buffer slots, stored as fixed rings.
+        # Skipped when not needed to save 2 bytes per slot each.
+        size = self.size
+        self._min_q = array("H", [0] * size) if track_min else None
+        self._min_head = 0
+        self._min_len = 0
+        self._max_q = array("H", [0] * size) if track_max else None
+        self._max_head = 0
+        self._max_len = 0
+
+        buffer.attach(self)
+
+    def _at(self, index):
+        """Return the value at chronological index (0 = oldest)."""
+        return self._values[(self._seq - self._count + index) % self.size]
+
+    def _evict(self, evicted):
+        """Drop the oldest value before the buffer overwrites its slot."""
+        self._full = evicted is not None
+        if self._full:
+            self._sum -= evicted
+            self._old_sum -= evicted
+
+    def _add(self):
+        """Account for the value the buffer has just stored."""
+        size = self.size
+        slot = self._seq % size
+        value = self._values[slot]
+        full = self._full
+        if not full:
+            self._count += 1
+        self._seq += 1
+        self._sum += value
+
+        # The value that just crossed the midpoint joins the older half.
+        # When full, every append shifts the window by one; while filling,
+        # the midpoint only advances on even counts.
+        count = self._count
+        if (full or count % 2 == 0) and count >= 2:
+            self._old_sum += self._at(count // 2 - 1)
+
+        if self._min_q is not None:
+            self._push_min(slot, value, full)
+        if self._max_q is not None:
+            self._push_max(slot, value, full)
+
+        # Re-sum once per window to stop float drift from add/subtract pairs
+        if full and self._seq % size == 0:
+            self._resync()
+
+    def _push_min(self, slot, value, full):
+        """Maintain the increasing deque that tracks the window minimum."""
+        size = self.size
+        q = self._min_q
+        # Only the oldest entry can have slid out: it shared this slot
+        if full and self._min_len and q[self._min_head] == slot:
+            self._min_head = (self._min_head + 1) % size
+            self._min_len -= 1
+        # Drop entries that can never be the minimum again
+        while self._min_len:
+            tail = (self._min_head + self._min_len - 1) % size
+            if self._values[q[tail]] < value:
+                break
+            self._min_len -= 1
+        q[(self._min_head + self._min_len) % size] = slot
+        self._min_len += 1
+
+    def _push_max(self, slot, value, full):
+        """Maintain the decreasing deque that tracks the window maximum."""
+        size = self.size
+        q = self._max_q
+        if full and self._max_len and q[self._max_head] == slot:
+            self._max_head = (self._max_head + 1) % size
+            self._max_len -= 1
+        while self._max_len:
+            tail = (self._max_head + self._max_len - 1) % size
+            if self._values[q[tail]] > value:
+                break
+            self._max_len -= 1
+        q[(self._max_head + self._max_len) % size] = slot
+        self._max_len += 1
+
+    def _resync(self):
+        """Recompute the running sums from the stored window."""
+        total = 0.0
+        old = 0.0
+        mid = self._count // 2
+        for i in range(self._count):
+            value = self._at(i)
+            total += value
+            if i < mid:
+                old += value
+        self._sum = total
+        self._old_sum = old
+
+    @property
+    def count(self):
+        """Number of values currently in the window."""
+        return self._count
+
+    @property
+    def minimum(self):
+        """Smallest value in the window, or None when empty."""
+        if not self._count:
+            return None
+        return self._values[self._min_q[self._min_head]]
+
+    @property
+    def maximum(self):
+        """Largest value in the window, or None when empty."""
+        if not self._count:
+            return None
+        return self._values[self._max_q[self._max_head]]
+
+    @property
+    def mean(self):
+        """Average of the window, or None when empty."""
+        if not self._count:
+            return None
+        return self._sum / self._count
+
+    def trend(self):
+        """Return newer-half average minus older-half average, or None if < 2 values."""
+        count = self._count
+        if count < 2:
+            return None
+        mid = count // 2
+        old_avg = self._old_sum / mid
+        new_avg = (self._sum - self._old_sum) / (count - mid)
+        return new_avg - old_avg
+
+
+class AggregateStats:
+    """RollingStats-compatible view over a min/avg/max aggregate tier."""
+
+    def __init__(self, buffer, channel):
+        base = channel * 3  # Aggregate channels are laid out min, avg, max
+        self._min = RollingStats(buffer, base, track_max=False)
+        self._avg = RollingStats(buffer, base + 1, track_min=False, track_max=False)
+        self._max = RollingStats(buffer, base + 2, track_min=False)
+
+    @property
+    def count(self):
+        """Number of aggregate points currently in the window."""
+        return self._avg.count
+
+    @property
+    def minimum(self):
+        """Smallest value seen across the tier, or None when empty."""
+        return self._min.minimum
+
+    @property
+    def maximum(self):
+        """Largest value seen across the tier, or None when empty."""
+        return self._max.maximum
+
+    @property
+    def mean(self):
+        """Average of the tier's point averages, or None when empty."""
+        return self._avg.mean
+
+    def trend(self):
+        """Return the half-window trend of the point averages."""
+        return self._avg.trend()
+
+
+class TieredHistory:
+    """Raw samples plus progressively coarser min/avg/max rollup tiers.
+
+    `rollups` is a sequence of (points kept, points of the previous tier
+    folded into each point). With one sample per minute, the default keeps
+    2 hours of minutes, 24 hours of 10-minute points and 7 days of hours.
+    """
+
+    def __init__(self, channels, size=120, rollups=((144, 10), (168, 6))):
+        self.channels = channels
+        self._buffers = [RingBuffer(size, channels)]
+        self._stats = [tuple(RollingStats(self._buffers[0], ch) for ch in range(channels))]
+        self._factors = [1]
+
+        # Per-tier accumulators for the point currently being built
+        self._pending = [0]
+        self._acc_sum = [None]
+        self._acc_min = [None]
+        self._acc_max = [None]
+
+        for points, factor in rollups:
+            buffer = RingBuffer(points, channels * 3)
+            self._buffers.append(buffer)
+            self._stats.append(tuple(AggregateStats(buffer, ch) for ch in range(channels)))
+            self._factors.append(factor)
+            self._pending.append(0)
+            self._acc_sum.append(array("f", [0.0] * channels))
+            self._acc_min.append(array("f", [0.0] * channels))
+            self._acc_max.append(array("f", [0.0] * channels))
+
+    @property
+    def tiers(self):
+        """Number of tiers, including the raw one."""
+        return len(self._buffers)
+
+    def append(self, *values):
+        """Store one raw sample and fold it into every rollup tier."""
+        self._buffers[0].append(*values)
+        self._rollup(1, values, values, values)
+
+    def _rollup(self, tier, mins, avgs, maxs):
+        """Accumulate one point into `tier`, emitting it when complete."""
+        if tier >= len(self._buffers):
+            return
+
+        acc_sum = self._acc_sum[tier]
+        acc_min = self._acc_min[tier]
+        acc_max = self._acc_max[tier]
+        first = self._pending[tier] == 0
+        for ch in range(self.channels):
+            if first:
+                acc_sum[ch] = avgs[ch]
+                acc_min[ch] = mins[ch]
+                acc_max[ch] = maxs[ch]
+            else:
+                acc_sum[ch] += avgs[ch]
+                acc_min[ch] = min(acc_min[ch], mins[ch])
+                acc_max[ch] = max(acc_max[ch], maxs[ch])
+
+        self._pending[tier] += 1
+        factor = self._factors[tier]
+        if self._pending[tier] < factor:
+            return
+        self._pending[tier] = 0
+
+        # Runs at most once per `factor` samples, so a small list is fine here
+        point = []
+        for ch in range(self.channels):
+            point.append(acc_min[ch])
+            point.append(acc_sum[ch] / factor)
+            point.append(acc_max[ch])
+        self._buffers[tier].append(*point)
+        self._rollup(tier + 1, point[0::3], point[1::3], point[2::3])
+
+    def count(self, tier=0):
+        """Number of points currently stored in `tier`."""
+        return len(self._buffers[tier])
+
+    def stats(self, tier=0, channel=0):
+        """Return the RollingStats-like view for one channel of `tier`."""
+        return self._stats[tier][channel]
+
+    def last(self, n, tier=0, channel=0):
+        """Iterate the newest `n` values (point averages for rollups), oldest first."""
+        if tier:
+            channel = channel * 3 + 1
+        return self._buffers[tier].last(n, channel)
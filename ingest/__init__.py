@@ -0,0 +1,35 @@
+"""
+Log Ingestion
+=============
+
+Turns the CSV lines examples/data_logger.py prints over serial into a
+columnar store on a computer, instead of an ever-growing CSV file.
+
+    python -m ingest /dev/ttyACM0 --store clue_store --follow
+    python -m ingest data_log.csv --store clue_store --device kitchen
+    python -m ingest --store clue_store --info
+
+The source is read incrementally (a serial port, a file that is still being
+written with --follow, or "-" for stdin) and parsed by a tolerant streaming
+parser: headers, comments, REPL chatter, garbled and partial lines are
+skipped and counted.
+
+Rows are stored per device and per day. The current day of each device is
+kept as one uncompressed NumPy .npy file per column, which reads can
+memory-map. Once a device's data moves on to a later day, that day is sealed
+into one compressed .npz file (the layout of numpy.savez_compressed). The
+store remembers how far each file was read, so restarting the ingester on a
+file, or on a capture that has grown since, carries on where it stopped. A
+serial port or stdin is stored as it comes. Timestamps decide nothing: the
+logger's clock restarts at 2000-01-01 after every reset unless it is set.
+
+The store needs only the standard library; reads return NumPy arrays when
+NumPy is installed:
+
+    from ingest import ColumnStore
+    columns = ColumnStore("clue_store").read("kitchen", start="2025-11-01")
+    print(columns["temperature"].mean())
+"""
+
+from ingest.parser import LineParser, parse_timestamp, COLUMNS
+from ingest.store import ColumnStore
@@ -0,0 +1,185 @@
+"""
+Command-line ingester.
+
+    python -m ingest /dev/ttyACM0 --store clue_store --follow
+    python -m ingest data_log.csv --store clue_store --device kitchen
+    python -m ingest --store clue_store --info
+"""
+
+import argparse
+import os
+import sys
+import time
+import zlib
+
+from ingest.parser import LineParser
+from ingest.store import ColumnStore, safe_name
+
+READ_SIZE = 65536
+BATCH_ROWS = 1000  # Rows buffered before they are written
+FLUSH_SECONDS = 5.0  # Write buffered rows after this long with --follow
+CHECK_BYTES = 256  # Bytes before a saved file position that identify the file
+
+
+def file_check(path, offset):
+    """CRC of the CHECK_BYTES before `offset` in the file at `path`."""
+    start = max(0, offset - CHECK_BYTES)
+    with open(path, "rb") as f:
+        f.seek(start)
+        data = f.read(offset - start)
+    return zlib.crc32(data) if len(data) == offset - start else None
+
+
+class Ingester:
+    """Feeds a byte stream through the parser into the store."""
+
+    def __init__(self, store, device=None, default_device="clue", source=None):
+        self.store = store
+        self.device = device  # Fixed by --device; else from the stream
+        self.default_device = default_device
+        self.source = source  # File whose position is saved in the store (None: a stream)
+        self.parser = LineParser()
+        self.stored = 0
+        self.devices = set()  # Devices rows were stored for
+        self.resumed = 0  # Bytes of the file stored by earlier runs
+        self._pending = []
+        self._pending_device = None
+        self._position = None  # (offset, device line) just past the last buffered row
+        self._last_flush = time.monotonic()
+
+    def current_device(self):
+        return safe_name(self.device or self.parser.device or self.default_device)
+
+    def resume(self, stream):
+        """Seek `stream` (the source file) past what earlier runs stored.
+
+        Starts over if the file is shorter than before or its bytes before
+        the saved position differ (a new file under the same name).
+        """
+        saved = self.store.source_position(self.source)
+        if saved is None:
+            return
+        offset, device, check = saved
+        if file_check(self.source, offset) != check:
+            print("{} changed since it was last ingested; reading it from the start".format(
+                self.source))
+            return
+        stream.seek(offset)
+        self.parser.position = offset
+        self.parser.device = device
+        self.resumed = offset
+
+    def add(self, rows):
+        """Buffer new rows."""
+        for row in rows:
+            device = self.current_device()
+            if device != self._pending_device:
+                self.flush()
+                self._pending_device = device
+            self._pending.append(row)
+            self._position = (self.parser.position, self.parser.device)
+            if len(self._pending) >= BATCH_ROWS:
+                self.flush()
+
+    def flush(self):
+        if self._pending:
+            self.stored += self.store.append(self._pending_device, self._pending)
+            self.devices.add(self._pending_device)
+            self._pending = []
+            if self.source is not None:
+                offset, device = self._position
+                self.store.set_source_position(self.source, offset, device,
+                                               file_check(self.source, offset))
+        self._last_flush = time.monotonic()
+
+    def run(self, stream, follow=False):
+        """Read `stream` (binary) to the end, or forever with `follow`."""
+        if self.source is not None:
+            self.resume(stream)
+        while True:
+            data = stream.read1(READ_SIZE) if hasattr(stream, "read1") else stream.read(READ_SIZE)
+            if data:
+                self.add(self.parser.feed(data))
+            elif not follow:
+                break
+            else:
+                time.sleep(0.5)
+            if self._pending and time.monotonic() - self._last_flush >= FLUSH_SECONDS:
+                self.flush()
+        self.add(self.parser.finish())
+        self.flush()
+
+
+def print_info(store):
+    devices = store.devices()
+    if not devices:
+        print("No data in", store.root)
+    for device in devices:
+        days = store.days(device)
+        rows = 0
+        size = 0
+        for day, path in days.items():
+            rows += len(store.read_day(device, day, ("time",))["time"])
+            if not os.path.isdir(path):
+                size += os.path.getsize(path)
+                path = store.late_path(path)  # Rows for it since it was sealed
+            if path is not None:
+                size += sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+        last = store.last_time(device)
+        print("{}: {} rows in {} days ({}..{}), {:.1f} KB, last {}".format(
+            device, rows, len(days), list(days)[0], list(days)[-1], size / 1024,
+            time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(last)) if last is not None else "-"))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m ingest",
+                                     description="Ingest data_logger.py CSV into a columnar store")
+    parser.add_argument("source", nargs="?",
+                        help="serial port, CSV file, or - for stdin")
+    parser.add_argument("--store", required=True, help="store directory")
+    parser.add_argument("--device", help="device name (default: from the stream, else the file name)")
+    parser.add_argument("--follow", action="store_true",
+                        help="keep reading at the end (a file still being written)")
+    parser.add_argument("--seal", action="store_true",
+                        help="afterwards, compress every open day (including the newest)")
+    parser.add_argument("--info", action="store_true", help="summarize the store")
+    args = parser.parse_args(argv)
+
+    store = ColumnStore(args.store)
+    if args.source is not None:
+        source = None
+        if args.source == "-":
+            stream = sys.stdin.buffer
+            default_device = "stdin"
+        else:
+            stream = open(args.source, "rb", buffering=0)
+            default_device = os.path.splitext(os.path.basename(args.source))[0]
+            if os.path.isfile(args.source):
+                source = args.source  # Serial ports are not replayed
+        ingester = Ingester(store, args.device, default_device, source)
+        started = time.perf_counter()
+        try:
+            ingester.run(stream, args.follow)
+        except KeyboardInterrupt:
+            ingester.flush()
+        finally:
+            if stream is not sys.stdin.buffer:
+                stream.close()
+        wall = time.perf_counter() - started
+        if ingester.resumed:
+            print("Resumed after the first {} bytes, stored by an earlier run".format(
+                ingester.resumed))
+        print("Stored {} rows for {} in {:.2f} s; skipped {} other lines".format(
+            ingester.stored, ", ".join(sorted(ingester.devices)) or "-", wall,
+            ingester.parser.skipped))
+    if args.seal:
+        for device in store.devices():
+            for path in store.seal(device):
+                print("Sealed", path)
+    if args.info or (args.source is None and not args.seal):
+        print_info(store)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,100 @@
+"""
+Tolerant streaming parser for the data_logger.py CSV feed.
+
+Bytes go in as they arrive (any chunk size); complete rows come out. A line
+that is not a full, numeric row is skipped and counted rather than stopping
+the ingest: serial logs also carry the CSV header, "# ..." comments, the
+CircuitPython banner and tracebacks after a reload, and lines cut short or
+garbled by a reset.
+"""
+
+import calendar
+import math
+
+# (name, NumPy dtype) of each stored column, in CSV order
+COLUMNS = (
+    ("time", "<f8"),  # Unix seconds (UTC), from the CSV timestamp
+    ("uptime", "<u4"),  # Seconds since the logger started
+    ("temperature", "<f4"),  # C
+    ("humidity", "<f4"),  # %RH
+    ("pressure", "<f4"),  # hPa
+    ("altitude", "<f4"),  # m
+)
+
+DEVICE_PREFIX = "# device:"  # Printed by data_logger.py at start
+MAX_LINE = 512  # Longer "lines" are noise (e.g. binary junk without newlines)
+
+
+def parse_timestamp(text):
+    """'YYYY-MM-DD HH:MM:SS' (or with a 'T') as Unix seconds, read as UTC."""
+    text = text.strip()
+    if len(text) != 19 or text[4] != "-" or text[7] != "-" or text[10] not in " T":
+        raise ValueError("bad timestamp: " + repr(text))
+    fields = (text[0:4], text[5:7], text[8:10], text[11:13], text[14:16], text[17:19])
+    year, month, day, hour, minute, second = (int(field) for field in fields)
+    if not (1 <= month <= 12 and 1 <= day <= 31 and hour < 24 and minute < 60 and second < 61):
+        raise ValueError("bad timestamp: " + repr(text))
+    return float(calendar.timegm((year, month, day, hour, minute, second, 0, 0, 0)))
+
+
+class LineParser:
+    """Splits a byte stream into lines and parses them into rows."""
+
+    def __init__(self):
+        self.device = None  # Last "# device: <id>" seen in the stream
+        self.rows = 0  # Rows parsed
+        self.skipped = 0  # Non-empty lines that were not rows (incl. headers)
+        self.position = 0  # Stream offset just past the last line parsed
+        self._partial = b""
+
+    def feed(self, data):
+        """Parse `data` (bytes); yields the complete rows as tuples.
+
+        `device` and `position` are updated as the lines are parsed, so they
+        belong to the row just yielded.
+        """
+        lines = (self._partial + data).split(b"\n")
+        self._partial = lines.pop()
+        dropped = 0
+        if len(self._partial) > MAX_LINE:
+            dropped = len(self._partial)
+            self._partial = b""
+            self.skipped += 1
+        for line in lines:
+            self.position += len(line) + 1
+            row = self.parse_line(line)
+            if row is not None:
+                yield row
+        self.position += dropped
+
+    def finish(self):
+        """Parse a final line without a newline (end of a file)."""
+        line, self._partial = self._partial, b""
+        self.position += len(line)
+        row = self.parse_line(line)
+        if row is not None:
+            yield row
+
+    def parse_line(self, line):
+        """One row tuple in COLUMNS order, or None for anything else."""
+        text = line.decode("utf-8", "replace").strip()
+        if not text:
+            return None
+        if text.startswith(DEVICE_PREFIX):
+            self.device = text[len(DEVICE_PREFIX):].strip() or None
+            return None
+        fields = text.split(",")
+        if len(fields) != len(COLUMNS) or text.startswith("#"):
+            self.skipped += 1
+            return None
+        try:
+            row = (parse_timestamp(fields[0]), int(fields[1])) + tuple(
+                float(field) for field in fields[2:])
+        except ValueError:
+            self.skipped += 1
+            return None
+        if row[1] < 0 or any(math.isnan(value) or math.isinf(value) for value in row[2:]):
+            self.skipped += 1
+            return None
+        self.rows += 1
+        return row
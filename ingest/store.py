@@ -0,0 +1,426 @@
+"""
+Columnar store: one directory per device, one partition per day.
+
+    <root>/<device>/<YYYY-MM-DD>/<column>.npy   open day, appendable, mmap-able
+    <root>/<device>/<YYYY-MM-DD>.npz            sealed day, deflate-compressed
+    <root>/<device>/<YYYY-MM-DD>+<rows>/        late rows of a sealed day
+
+The .npy files have a fixed 128-byte header so appending rows only rewrites
+the shape in place. Data is written before the headers, so after a crash the
+smallest header row count across the columns is the last complete row; the
+rest is cut off when the partition is opened again.
+
+Rows for a day that is already sealed (after a reset the logger's clock is
+back at 2000-01-01, behind the newest day) go to an open partition next to
+it instead of unsealing the .npz for every batch. Reads append them to the
+sealed rows, and they are merged into the .npz the next time the device
+seals a day. <rows> is the sealed day's row count when the late partition
+was started: if a crash left it behind after a merge, the count no longer
+matches and it is removed.
+
+    <root>/sources.json                         where each ingested file stopped
+"""
+
+import ast
+import json
+import mmap
+import os
+import re
+import shutil
+import struct
+import sys
+import time
+import zipfile
+from array import array
+
+from ingest.parser import COLUMNS
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+NPY_MAGIC = b"\x93NUMPY\x01\x00"
+NPY_HEADER_SIZE = 128  # Magic, length and padded header dict
+TYPECODES = {"<f8": "d", "<f4": "f", "<u4": "I" if array("I").itemsize == 4 else "L"}
+SEALED_SUFFIX = ".npz"
+LATE_SEPARATOR = "+"
+SOURCES_FILE = "sources.json"
+DAY_FORMAT = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+
+
+def day_of(timestamp):
+    """'YYYY-MM-DD' (UTC) of a Unix timestamp."""
+    return time.strftime("%Y-%m-%d", time.gmtime(timestamp))
+
+
+def safe_name(name):
+    """A device name usable as a directory name."""
+    name = re.sub(r"[^A-Za-z0-9_.-]+", "_", name.strip()).strip("._")
+    return name or "unnamed"
+
+
+def npy_header(dtype, rows):
+    """The fixed-size .npy v1.0 header for a 1-D array of `rows` items."""
+    header = "{{'descr': '{}', 'fortran_order': False, 'shape': ({},), }}".format(dtype, rows)
+    space = NPY_HEADER_SIZE - len(NPY_MAGIC) - 2
+    header = header.ljust(space - 1) + "\n"
+    return NPY_MAGIC + struct.pack("<H", space) + header.encode("latin1")
+
+
+def parse_npy_header(data):
+    """(dtype, rows, header size) from the start of a .npy file."""
+    if data[:6] != NPY_MAGIC[:6]:
+        raise ValueError("not a .npy file")
+    major = data[6]
+    if major == 1:
+        length = struct.unpack_from("<H", data, 8)[0]
+        start = 10
+    else:
+        length = struct.unpack_from("<I", data, 8)[0]
+        start = 12
+    header = ast.literal_eval(bytes(data[start:start + length]).decode("latin1"))
+    if header["fortran_order"] or len(header["shape"]) != 1:
+        raise ValueError("only 1-D arrays are supported")
+    return header["descr"], header["shape"][0], start + length
+
+
+def _to_little_endian(values):
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values
+
+
+def _concatenate(dtype, pieces):
+    """One column from several days' values."""
+    if numpy is not None:
+        return numpy.concatenate(pieces) if pieces else numpy.empty(0, dtype)
+    values = array(TYPECODES[dtype])
+    for piece in pieces:
+        values.extend(piece)
+    return values
+
+
+def sealed_rows(path):
+    """Row count of a sealed day (reads only the start of one column)."""
+    with zipfile.ZipFile(path) as archive:
+        with archive.open(COLUMNS[0][0] + ".npy") as f:
+            return parse_npy_header(f.read(NPY_HEADER_SIZE))[1]
+
+
+def _from_bytes(dtype, data):
+    """array.array of `dtype` from little-endian bytes (copied)."""
+    values = array(TYPECODES[dtype])
+    values.frombytes(data)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+
+class Partition:
+    """One open (uncompressed, appendable) day of one device."""
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self.rows = self._recover()
+
+    def _column_path(self, name):
+        return os.path.join(self.path, name + ".npy")
+
+    def _recover(self):
+        """Create missing columns and cut every column to the complete rows."""
+        counts = []
+        for name, dtype in COLUMNS:
+            path = self._column_path(name)
+            if not os.path.exists(path):
+                counts.append(0)
+                continue
+            with open(path, "rb") as f:
+                head = f.read(NPY_HEADER_SIZE)
+            try:
+                descr, rows, size = parse_npy_header(head)
+            except (ValueError, SyntaxError, KeyError, struct.error):
+                rows, size, descr = 0, NPY_HEADER_SIZE, dtype
+            if descr != dtype or size != NPY_HEADER_SIZE:
+                raise ValueError("unexpected layout in " + path)
+            counts.append(rows)
+        rows = min(counts)
+        for name, dtype in COLUMNS:
+            path = self._column_path(name)
+            itemsize = array(TYPECODES[dtype]).itemsize
+            mode = "r+b" if os.path.exists(path) else "w+b"
+            with open(path, mode) as f:
+                f.write(npy_header(dtype, rows))
+                f.truncate(NPY_HEADER_SIZE + rows * itemsize)
+        return rows
+
+    def append(self, rows):
+        """Append row tuples (COLUMNS order): data first, then the headers."""
+        if not rows:
+            return
+        total = self.rows + len(rows)
+        for index, (name, dtype) in enumerate(COLUMNS):
+            values = _to_little_endian(array(TYPECODES[dtype], [row[index] for row in rows]))
+            with open(self._column_path(name), "r+b") as f:
+                f.seek(0, os.SEEK_END)
+                f.write(values.tobytes())
+        for name, dtype in COLUMNS:
+            with open(self._column_path(name), "r+b") as f:
+                f.write(npy_header(dtype, total))
+        self.rows = total
+
+    def last_time(self):
+        """Timestamp of the last row, or None if the partition is empty."""
+        if not self.rows:
+            return None
+        with open(self._column_path("time"), "rb") as f:
+            f.seek(NPY_HEADER_SIZE + (self.rows - 1) * 8)
+            return struct.unpack("<d", f.read(8))[0]
+
+    def seal(self):
+        """Compress into <day>.npz next to the directory and remove it."""
+        target = self.path.rstrip(os.sep) + SEALED_SUFFIX
+        partial = target + ".partial"
+        with zipfile.ZipFile(partial, "w", zipfile.ZIP_DEFLATED) as archive:
+            for name, _ in COLUMNS:
+                archive.write(self._column_path(name), name + ".npy")
+        os.replace(partial, target)
+        shutil.rmtree(self.path)
+        return target
+
+
+class ColumnStore:
+    """Device/day partitioned columns under `root`."""
+
+    def __init__(self, root):
+        self.root = root
+        self._open = {}  # device -> (day path, open Partition) of the newest day
+
+    # ---- Layout -----------------------------------------------------------
+
+    def devices(self):
+        """Device names in the store."""
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(name for name in os.listdir(self.root)
+                      if os.path.isdir(os.path.join(self.root, name)))
+
+    def days(self, device):
+        """{day: path} of every partition of `device`, oldest first."""
+        directory = os.path.join(self.root, safe_name(device))
+        found = {}
+        if os.path.isdir(directory):
+            for name in os.listdir(directory):
+                day = name[:-len(SEALED_SUFFIX)] if name.endswith(SEALED_SUFFIX) else name
+                # A directory left next to its sealed file by a crash is a leftover
+                if DAY_FORMAT.match(day) and (day not in found or name.endswith(SEALED_SUFFIX)):
+                    found[day] = os.path.join(directory, name)
+        return dict(sorted(found.items()))
+
+    # ---- Ingested files ---------------------------------------------------
+
+    def _read_sources(self):
+        try:
+            with open(os.path.join(self.root, SOURCES_FILE)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def source_position(self, source):
+        """(offset, device, check) saved for the file `source`, or None."""
+        entry = self._read_sources().get(os.path.abspath(source))
+        if entry is None:
+            return None
+        return entry["offset"], entry["device"], entry["check"]
+
+    def set_source_position(self, source, offset, device, check):
+        """Remember that `source` is stored up to byte `offset`.
+
+        `device` is the stream's device line in effect there and `check`
+        identifies the bytes before it, so a replaced file is noticed.
+        """
+        sources = self._read_sources()
+        sources[os.path.abspath(source)] = {"offset": offset, "device": device, "check": check}
+        os.makedirs(self.root, exist_ok=True)
+        path = os.path.join(self.root, SOURCES_FILE)
+        with open(path + ".partial", "w") as f:
+            json.dump(sources, f, indent=1, sort_keys=True)
+        os.replace(path + ".partial", path)
+
+    # ---- Writing ----------------------------------------------------------
+
+    def last_time(self, device):
+        """Newest stored timestamp of `device`, or None."""
+        days = self.days(device)
+        if not days:
+            return None
+        path = days[list(days)[-1]]
+        if os.path.isdir(path):
+            return self._partition(device, os.path.basename(path)).last_time()
+        late = self.late_path(path)
+        if late is not None:
+            last = Partition(late).last_time()
+            if last is not None:
+                return last
+        times = self._read_sealed(path, ("time",))["time"]
+        return times[-1] if len(times) else None
+
+    def _partition(self, device, day):
+        """The open partition that takes new rows of `day`."""
+        path = os.path.join(self.root, safe_name(device), day)
+        cached = self._open.get(device)
+        if cached is not None and cached[0] == path:
+            return cached[1]
+        sealed = path + SEALED_SUFFIX
+        if os.path.exists(sealed):
+            late = self.late_path(sealed)
+            if late is None:
+                late = path + LATE_SEPARATOR + str(sealed_rows(sealed))
+            partition = Partition(late)
+        else:
+            partition = Partition(path)
+        self._open[device] = (path, partition)
+        return partition
+
+    def late_path(self, sealed):
+        """The late-rows partition next to the sealed day `sealed`, or None.
+
+        One left behind by a crash after its rows were merged is removed.
+        """
+        directory, name = os.path.split(sealed[:-len(SEALED_SUFFIX)] + LATE_SEPARATOR)
+        for entry in os.listdir(directory):
+            if entry.startswith(name):
+                path = os.path.join(directory, entry)
+                if entry[len(name):] == str(sealed_rows(sealed)):
+                    return path
+                shutil.rmtree(path)
+        return None
+
+    def _merge_late(self, sealed):
+        """Rewrite the sealed day `sealed` with its late rows appended."""
+        late = self.late_path(sealed)
+        if late is None:
+            return None
+        late_rows = Partition(late).rows  # Also cuts off an incomplete row
+        partial = sealed + ".partial"
+        with zipfile.ZipFile(sealed) as old, \
+                zipfile.ZipFile(partial, "w", zipfile.ZIP_DEFLATED) as new:
+            for name, dtype in COLUMNS:
+                itemsize = array(TYPECODES[dtype]).itemsize
+                data = old.read(name + ".npy")
+                _, rows, size = parse_npy_header(data)
+                with open(os.path.join(late, name + ".npy"), "rb") as f:
+                    f.seek(NPY_HEADER_SIZE)
+                    extra = f.read(late_rows * itemsize)
+                new.writestr(name + ".npy", npy_header(dtype, rows + late_rows) +
+                             data[size:size + rows * itemsize] + extra)
+        os.replace(partial, sealed)
+        shutil.rmtree(late)
+        return sealed
+
+    def append(self, device, rows):
+        """Store rows (time-ordered tuples in COLUMNS order) for `device`.
+
+        Rows are split by day; every open day older than the newest stored
+        day is sealed, and rows for a sealed day are kept next to it until
+        the next seal. Returns the number of rows stored.
+        """
+        if not rows:
+            return 0
+        batch = []
+        day = day_of(rows[0][0])
+        for row in rows:
+            row_day = day_of(row[0])
+            if row_day != day:
+                self._partition(device, day).append(batch)
+                batch = []
+                day = row_day
+            batch.append(row)
+        self._partition(device, day).append(batch)
+        self.seal(device, before=list(self.days(device))[-1])
+        return len(rows)
+
+    def seal(self, device, before=None):
+        """Compress the open days of `device` older than `before` (default: all).
+
+        If that seals a day (or `before` is None), the late rows of sealed
+        days are merged into them too. Returns the paths written.
+        """
+        sealed = []
+        for day, path in self.days(device).items():
+            if os.path.isdir(path) and (before is None or day < before):
+                sealed.append(Partition(path).seal())
+        if not sealed and before is not None:
+            return sealed
+        self._open.pop(device, None)
+        for path in self.days(device).values():
+            if not os.path.isdir(path) and self._merge_late(path) is not None:
+                sealed.append(path)
+        return sealed
+
+    # ---- Reading ----------------------------------------------------------
+
+    def _read_open(self, path, columns=None):
+        """Columns of an open day, memory-mapped."""
+        result = {}
+        for name, dtype in COLUMNS:
+            if columns is not None and name not in columns:
+                continue
+            column_path = os.path.join(path, name + ".npy")
+            if numpy is not None:
+                result[name] = numpy.load(column_path, mmap_mode="r")
+                continue
+            with open(column_path, "rb") as f:
+                head = f.read(NPY_HEADER_SIZE)
+                _, rows, size = parse_npy_header(head)
+                if not rows or sys.byteorder == "big":
+                    f.seek(size)
+                    result[name] = _from_bytes(dtype, f.read(rows * array(TYPECODES[dtype]).itemsize))
+                    continue
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            view = memoryview(mapped)[size:]
+            result[name] = view[:rows * array(TYPECODES[dtype]).itemsize].cast(TYPECODES[dtype])
+        return result
+
+    def _read_sealed(self, path, columns=None):
+        """Columns of a sealed day (decompressed into memory)."""
+        result = {}
+        with zipfile.ZipFile(path) as archive:
+            for name, dtype in COLUMNS:
+                if columns is not None and name not in columns:
+                    continue
+                data = archive.read(name + ".npy")
+                descr, rows, size = parse_npy_header(data)
+                if numpy is not None:
+                    result[name] = numpy.frombuffer(data, dtype=descr, count=rows, offset=size)
+                else:
+                    result[name] = _from_bytes(descr, data[size:])
+        return result
+
+    def read_day(self, device, day, columns=None):
+        """{column: values} of one day of `device`.
+
+        Open days are memory-mapped (numpy.memmap, or a memoryview without
+        NumPy); sealed days are decompressed into memory, followed by their
+        late rows.
+        """
+        path = self.days(device)[day]
+        if os.path.isdir(path):
+            return self._read_open(path, columns)
+        result = self._read_sealed(path, columns)
+        late = self.late_path(path)
+        if late is None:
+            return result
+        extra = self._read_open(late, columns)
+        return {name: _concatenate(dtype, [result[name], extra[name]])
+                for name, dtype in COLUMNS if name in result}
+
+    def read(self, device, start=None, end=None, columns=None):
+        """{column: values} of `device` from day `start` to `end` (inclusive)."""
+        names = [name for name, _ in COLUMNS if columns is None or name in columns]
+        parts = [self.read_day(device, day, names) for day in self.days(device)
+                 if (start is None or day >= start) and (end is None or day <= end)]
+        return {name: _concatenate(dtype, [part[name] for part in parts])
+                for name, dtype in COLUMNS if name in names}
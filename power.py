@@ -0,0 +1,210 @@
+"""
+Power Scheduler
+===============
+
+Sleeps between samples and blanks the display when nobody is looking, so a
+battery-powered CLUE can last the whole storage window inside a fridge.
+
+- Light sleep (alarm.light_sleep_until_alarms) keeps the program and RAM
+  and resumes right after the call.
+- Deep sleep (alarm.exit_and_deep_sleep_until_alarms) powers down the CPU
+  and restarts the program on wake. State that must survive goes in
+  alarm.sleep_memory; the scheduler keeps a continuous clock there so the
+  caller's timestamps stay valid across restarts.
+
+While the display is awake the scheduler only uses time.sleep(), so the
+screen keeps updating. After `display_timeout` seconds without activity
+the backlight is dimmed and the board sleeps until the next sample, a
+button press or the proximity sensor's interrupt (a hand or a fridge door
+opening nearby) wakes it and the display again.
+
+If a pin alarm ends a deep sleep early, the scheduler cannot tell how long
+the board actually slept and assumes the full interval. Food-safety timers
+therefore run slightly fast, never slow.
+
+AdaptiveInterval picks how long to sleep: long while the temperature is
+steady and far from a threshold, short near the threshold or while it is
+changing. The long interval bounds how late a threshold crossing can be
+noticed.
+"""
+
+import time
+import alarm
+import board
+
+from snapshot import Snapshot
+
+# alarm.sleep_memory layout: the scheduler's clock first, callers after it
+CLOCK_MEMORY_SIZE = 32
+CLOCK_FORMAT = "<f"  # Continuous clock value at the planned wake time
+
+# Battery life model (rough CLUE figures; measure your own board to refine)
+BATTERY_MAH = 350  # Typical small LiPo
+ACTIVE_MA = 8.0  # CPU, I2C sensors and display controller running
+ACTIVE_SECONDS = 0.3  # Sensor read + render per sample
+BOOT_SECONDS = 1.5  # Extra awake time per deep-sleep wake (program restart)
+LIGHT_SLEEP_MA = 2.5  # Sensors and display controller still powered
+DEEP_SLEEP_MA = 1.0
+BACKLIGHT_MA = 25.0  # At full brightness
+
+
+def estimate_battery_hours(sample_interval, deep_sleep=False, awake_fraction=0.0):
+    """Estimated battery life in hours for one sample every `sample_interval` s."""
+    active = ACTIVE_SECONDS + (BOOT_SECONDS if deep_sleep else 0.0)
+    active = min(active, sample_interval)
+    sleep_ma = DEEP_SLEEP_MA if deep_sleep else LIGHT_SLEEP_MA
+    average_ma = (ACTIVE_MA * active + sleep_ma * (sample_interval - active)) / sample_interval
+    average_ma += BACKLIGHT_MA * awake_fraction
+    return BATTERY_MAH / average_ma
+
+
+def print_battery_estimates(intervals=(2, 10, 30, 60, 300), awake_fraction=0.01):
+    """Print estimated battery life for several sample intervals."""
+    print("Estimated battery life ({} mAh, display on {:.0%} of the time):".format(
+        BATTERY_MAH, awake_fraction))
+    for interval in intervals:
+        light = estimate_battery_hours(interval, False, awake_fraction)
+        deep = estimate_battery_hours(interval, True, awake_fraction)
+        print("  every {:4d}s: light sleep {:6.1f} h, deep sleep {:6.1f} h".format(
+            interval, light, deep))
+
+
+def enable_proximity_wake(apds, threshold):
+    """Make the APDS9960 pull its interrupt pin low when proximity >= threshold."""
+    apds.proximity_interrupt_threshold = (0, threshold, 1)
+    apds.enable_proximity_interrupt = True
+    apds.clear_interrupt()
+
+
+class PowerScheduler:
+    """Chooses between awake waits, light sleep and deep sleep."""
+
+    def __init__(self, display, deep_sleep=False, display_timeout=30.0,
+                 brightness=1.0, idle_brightness=0.0,
+                 wake_pins=(board.BUTTON_A, board.BUTTON_B), proximity=None,
+                 proximity_pin=None):
+        self.display = display
+        self.deep_sleep = deep_sleep
+        self.display_timeout = display_timeout
+        self.brightness = brightness
+        self.idle_brightness = idle_brightness
+        self.wake_pins = wake_pins
+        self.proximity = proximity  # APDS9960 set up with enable_proximity_wake()
+        self.proximity_pin = proximity_pin
+        self.before_deep_sleep = None  # Called just before a deep sleep
+
+        self._clock = Snapshot(CLOCK_FORMAT, alarm.sleep_memory, 0, CLOCK_MEMORY_SIZE)
+        self._offset = 0.0
+        self.woke_from_deep_sleep = False
+
+        wake_alarm = alarm.wake_alarm
+        if wake_alarm is not None:
+            saved = self._clock.load()
+            if saved is not None:
+                self._offset = saved[0] - time.monotonic()
+                self.woke_from_deep_sleep = True
+
+        # Start awake on power-up or when a person woke us; stay dark otherwise
+        self._awake_until = None
+        if wake_alarm is None or isinstance(wake_alarm, alarm.pin.PinAlarm):
+            self.note_activity()
+        else:
+            display.brightness = idle_brightness
+
+    def monotonic(self):
+        """Seconds on a clock that keeps counting across deep sleeps."""
+        return time.monotonic() + self._offset
+
+    @property
+    def display_awake(self):
+        """True while the backlight is on."""
+        return self._awake_until is not None
+
+    def note_activity(self):
+        """Someone is looking: turn the display on and restart the timeout."""
+        if self._awake_until is None:
+            self.display.brightness = self.brightness
+        self._awake_until = self.monotonic() + self.display_timeout
+
+    def update_display(self):
+        """Dim the display once the activity timeout has passed."""
+        if self._awake_until is not None and self.monotonic() >= self._awake_until:
+            self.display.brightness = self.idle_brightness
+            self._awake_until = None
+
+    def _pin_alarms(self):
+        """Fresh pin alarms for the buttons and the proximity interrupt."""
+        alarms = [alarm.pin.PinAlarm(pin, value=False, pull=True) for pin in self.wake_pins]
+        if self.proximity_pin is not None:
+            alarms.append(alarm.pin.PinAlarm(self.proximity_pin, value=False, pull=True))
+        return alarms
+
+    def sleep_until(self, deadline):
+        """Wait until `deadline` (on the monotonic() clock) as cheaply as possible.
+
+        Returns True if a button or the proximity sensor woke us early.
+        Does not return when deep sleep is used; the program restarts.
+        """
+        self.update_display()
+        remaining = deadline - self.monotonic()
+        if remaining <= 0:
+            return False
+
+        if self.display_awake:
+            time.sleep(remaining)
+            return False
+
+        # Re-arm the proximity interrupt so only a new approach wakes us
+        if self.proximity is not None:
+            self.proximity.clear_interrupt()
+
+        time_alarm = alarm.time.TimeAlarm(monotonic_time=time.monotonic() + remaining)
+        if self.deep_sleep:
+            self._clock.save(deadline)
+            if self.before_deep_sleep is not None:
+                self.before_deep_sleep()
+            alarm.exit_and_deep_sleep_until_alarms(time_alarm, *self._pin_alarms())
+
+        woke = alarm.light_sleep_until_alarms(time_alarm, *self._pin_alarms())
+        if isinstance(woke, alarm.pin.PinAlarm):
+            self.note_activity()
+            return True
+        return False
+
+
+class AdaptiveInterval:
+    """Sample interval from a signal's rate of change and distance to a threshold."""
+
+    def __init__(self, fast, slow, threshold, margin, fast_rate, smoothing=60.0):
+        self.fast = fast  # Seconds between samples near the threshold or when changing
+        self.slow = slow  # Seconds between samples when steady (maximum latency)
+        self.threshold = threshold
+        self.margin = margin  # Within this distance of the threshold counts as near
+        self.fast_rate = fast_rate  # Change per second that counts as changing
+        self.smoothing = smoothing  # Time constant (s) of the rate estimate
+        self.time = None  # Time of the last sample
+        self.value = None
+        self.rate = 0.0  # Smoothed change per second
+
+    def update(self, now, value):
+        """Add the sample `value` taken at `now`."""
+        if self.time is not None and now > self.time:
+            elapsed = now - self.time
+            weight = elapsed / (elapsed + self.smoothing)
+            self.rate += weight * ((value - self.value) / elapsed - self.rate)
+        self.time = now
+        self.value = value
+
+    def interval(self, urgent=False):
+        """Seconds until the next sample; `urgent` forces the fast rate."""
+        if urgent or self.value is None:
+            return self.fast
+        distance = abs(self.threshold - self.value)
+        if distance <= self.margin or abs(self.rate) >= self.fast_rate:
+            return self.fast
+        # Heading for the threshold: sample again before it gets within margin
+        approach = self.rate if self.value < self.threshold else -self.rate
+        interval = self.slow
+        if approach > 0:
+            interval = min(interval, (distance - self.margin) / approach)
+        return max(self.fast, interval)
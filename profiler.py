@@ -0,0 +1,113 @@
+"""
+Hot-Path Profiler
+=================
+
+Named timing spans for the main loop, accumulated into fixed-bucket
+histograms so the cost of each section (sensor reads, logging, label
+updates, display refresh, button handling) can be read off the serial
+console.
+
+Histograms are preallocated arrays with buckets on a 1-2-5 series from
+50 us to 1 s (plus an overflow bucket), so recording a span only stores
+counts. time.monotonic_ns() itself returns a long int on the board, but the
+profiler allocates nothing else. Percentiles are reported as the upper
+bound of the bucket they fall in.
+
+    profiler = Profiler(("sensors", "render"))
+    SENSORS = profiler.section("sensors")
+    profiler.start(SENSORS)
+    ...
+    profiler.stop(SENSORS)
+    profiler.report()
+"""
+
+import time
+from array import array
+
+# Bucket upper bounds in microseconds; the last bucket holds anything slower
+BUCKET_BOUNDS_US = (50, 100, 200, 500, 1000, 2000, 5000, 10000, 20000,
+                    50000, 100000, 200000, 500000, 1000000)
+BUCKETS = len(BUCKET_BOUNDS_US) + 1
+
+
+def _format_us(us):
+    """Short human-readable duration."""
+    if us >= 1000000:
+        return "{:.1f}s".format(us / 1000000)
+    if us >= 1000:
+        return "{:.1f}ms".format(us / 1000)
+    return "{}us".format(us)
+
+
+class Profiler:
+    """Per-section timing histograms with p50/p95/max summaries."""
+
+    def __init__(self, names, enabled=True):
+        self.names = tuple(names)
+        self.enabled = enabled
+        count = len(self.names)
+        self._bounds = array("L", BUCKET_BOUNDS_US)
+        self._counts = array("L", [0] * (count * BUCKETS))
+        self._samples = array("L", [0] * count)
+        self._max_us = array("L", [0] * count)
+        self._start = [0] * count
+
+    def section(self, name):
+        """Index of section `name`, for start() and stop()."""
+        return self.names.index(name)
+
+    def start(self, section):
+        """Begin timing `section`."""
+        if self.enabled:
+            self._start[section] = time.monotonic_ns()
+
+    def stop(self, section):
+        """End timing `section` and record the span."""
+        if not self.enabled:
+            return
+        elapsed_us = (time.monotonic_ns() - self._start[section]) // 1000
+        bounds = self._bounds
+        bucket = 0
+        while bucket < BUCKETS - 1 and elapsed_us > bounds[bucket]:
+            bucket += 1
+        self._counts[section * BUCKETS + bucket] += 1
+        self._samples[section] += 1
+        if elapsed_us > self._max_us[section]:
+            self._max_us[section] = elapsed_us
+
+    def percentile(self, section, fraction):
+        """Upper bucket bound (us) at `fraction` of the samples, or None."""
+        samples = self._samples[section]
+        if not samples:
+            return None
+        target = fraction * samples
+        seen = 0
+        for bucket in range(BUCKETS):
+            seen += self._counts[section * BUCKETS + bucket]
+            if seen >= target:
+                if bucket < BUCKETS - 1:
+                    return self._bounds[bucket]
+                break
+        return self._max_us[section]  # Overflow bucket: report the worst case
+
+    def report(self):
+        """Print p50/p95/max for every section that has samples."""
+        print("Profile ({} buckets, p50/p95 are bucket bounds):".format(BUCKETS))
+        print("  {:10s} {:>7s} {:>8s} {:>8s} {:>8s}".format("section", "count", "p50", "p95", "max"))
+        for section, name in enumerate(self.names):
+            samples = self._samples[section]
+            if not samples:
+                continue
+            print("  {:10s} {:7d} {:>8s} {:>8s} {:>8s}".format(
+                name, samples,
+                "<=" + _format_us(self.percentile(section, 0.50)),
+                "<=" + _format_us(self.percentile(section, 0.95)),
+                _format_us(self._max_us[section])))
+
+    def reset(self):
+        """Clear all histograms."""
+        for i in range(len(self._counts)):
+            self._counts[i] = 0
+        for i in range(len(self.names)):
+            self._samples[i] = 0
+            self._max_us[i] = 0
@@ -0,0 +1,33 @@
+"""
+Food-Safety Replay
+==================
+
+Runs recorded temperature traces through the food-safety state machine on
+a computer, to audit past fridge events against the logs:
+
+    python -m replay food_log.bin
+    python -m replay logs/ --csv transitions.csv
+    python -m replay --store clue_store --workers 8
+
+The decisions come from food_state.py, the module food_safety.py runs on
+the CLUE, with the same median filter (filters.py) and, with
+--food-time-constant, the same thermal lag estimate (thermal.py). Each
+trace reports every INITIAL/SAFE/WARNING/DISCARD/CHARGE transition with its
+time and the danger-zone time so far, and the total danger-zone time.
+Thousands of traces are replayed in parallel, one process per CPU.
+
+The logs hold one reading a minute while the device samples every 2-60
+seconds, so a replayed transition can be up to a minute later than on the
+device. Readings missing for 5 minutes or more count as the CLUE being off:
+that time is not counted, as on the device. A log time that goes back (the
+clock restarting at 2000-01-01 after a reset) is handled the same way;
+python -m replay --check replays such a log (replay/check.py).
+
+    from replay import replay, Settings
+    report = replay("test", times, temperatures, Settings(dwell=60))
+    for transition in report.transitions:
+        print(transition.time, transition.after)
+"""
+
+from replay.engine import (Settings, Transition, Report, replay, replay_source, replay_all,
+                           read_log, read_store)
@@ -0,0 +1,155 @@
+"""
+Command-line replay.
+
+    python -m replay food_log.bin
+    python -m replay logs/ --csv transitions.csv
+    python -m replay --store clue_store --device kitchen --start 2025-11-01
+    python -m replay --check
+"""
+
+import argparse
+import csv
+import os
+import sys
+import time
+
+from food_state import EVENT_MESSAGES, STATE_DISCARD, STATE_NAMES
+from replay.check import check_reset
+from replay.engine import Settings, replay_all
+
+LOG_SUFFIX = ".bin"
+
+
+def find_logs(paths):
+    """Log files named on the command line, and the *.bin files under directories."""
+    found = []
+    for path in paths:
+        if not os.path.isdir(path):
+            found.append(path)
+            continue
+        for directory, _, names in sorted(os.walk(path)):
+            found.extend(os.path.join(directory, name) for name in sorted(names)
+                         if name.endswith(LOG_SUFFIX))
+    return found
+
+
+def store_sources(root, device, start, end):
+    from ingest import ColumnStore
+
+    devices = [device] if device else ColumnStore(root).devices()
+    return [("store", root, name, start, end) for name in devices]
+
+
+def timestamp(seconds):
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(seconds))
+
+
+def duration(seconds):
+    minutes = int(seconds) // 60
+    return "{}h {:02d}m".format(minutes // 60, minutes % 60)
+
+
+def print_report(report, verbose):
+    if report.error:
+        print("{}: unreadable ({})".format(report.name, report.error))
+        return
+    if not report.samples:
+        print("{}: no readings".format(report.name))
+        return
+    print("{}: {} readings, {} .. {}, {} transitions, danger zone {}, now {}".format(
+        report.name, report.samples, timestamp(report.start), timestamp(report.end),
+        len(report.transitions), duration(report.danger_time), STATE_NAMES[report.final_state]))
+    if not verbose:
+        return
+    for start, end in report.gaps:
+        print("  {} .. {} no readings (off?)".format(timestamp(start), timestamp(end)))
+    for last, first in report.resets:
+        print("  {} .. {} clock reset".format(timestamp(last), timestamp(first)))
+    for transition in report.transitions:
+        print("  {} {:>7} -> {:7} danger {}  {}".format(
+            timestamp(transition.time), STATE_NAMES[transition.before],
+            STATE_NAMES[transition.after], duration(transition.danger_time),
+            EVENT_MESSAGES[transition.event]))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m replay",
+                                     description="Replay logged temperatures through the food-safety state machine")
+    parser.add_argument("logs", nargs="*", help="food_log.bin files, or directories of them")
+    parser.add_argument("--store", help="ingest store directory (python -m ingest)")
+    parser.add_argument("--device", help="device in the store (default: all)")
+    parser.add_argument("--start", help="first day (YYYY-MM-DD) from the store")
+    parser.add_argument("--end", help="last day (YYYY-MM-DD) from the store")
+    parser.add_argument("--csv", help="write every transition to this CSV file")
+    parser.add_argument("--workers", type=int, help="processes (default: one per CPU)")
+    parser.add_argument("--quiet", action="store_true", help="one summary line per trace")
+    parser.add_argument("--check", action="store_true",
+                        help="first check the replay of a log that spans a clock reset")
+    defaults = Settings()
+    parser.add_argument("--safe-temp", type=float, default=defaults.safe_temp)
+    parser.add_argument("--room-temp", type=float, default=defaults.room_temp)
+    parser.add_argument("--danger-limit", type=float, default=defaults.danger_limit,
+                        help="seconds (default: %(default)s)")
+    parser.add_argument("--max-storage-days", type=float, default=defaults.max_storage_days)
+    parser.add_argument("--median", type=int, default=defaults.median,
+                        help="samples (default: %(default)s)")
+    parser.add_argument("--smoothing", type=float, default=defaults.smoothing,
+                        help="seconds (default: %(default)s)")
+    parser.add_argument("--hysteresis", type=float, default=defaults.hysteresis)
+    parser.add_argument("--dwell", type=float, default=defaults.dwell,
+                        help="seconds (default: %(default)s)")
+    parser.add_argument("--food-time-constant", type=float,
+                        help="seconds; replay the thermal model's food estimate"
+                             " (logs made with THERMAL_MODEL = True)")
+    parser.add_argument("--gap", type=float, default=defaults.gap,
+                        help="seconds without readings that count as off (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    sources = [("log", path) for path in find_logs(args.logs)]
+    if args.store:
+        sources += store_sources(args.store, args.device, args.start, args.end)
+    if not sources and not args.check:
+        parser.error("no logs (give food_log.bin files, directories or --store)")
+    settings = Settings(args.safe_temp, args.room_temp, args.danger_limit,
+                        args.max_storage_days, args.median, args.smoothing, args.hysteresis,
+                        args.dwell, args.food_time_constant, args.gap)
+
+    if args.check:
+        mismatches = check_reset(settings, print)
+        print("Clock reset check: {} mismatches".format(mismatches))
+        if mismatches:
+            return 1
+        if not sources:
+            return 0
+
+    out = None
+    if args.csv:
+        out = open(args.csv, "w", newline="")
+        writer = csv.writer(out)
+        writer.writerow(("trace", "time", "from", "to", "danger_seconds", "event"))
+    started = time.perf_counter()
+    traces = readings = transitions = discards = unreadable = 0
+    try:
+        for report in replay_all(sources, settings, args.workers):
+            print_report(report, not args.quiet)
+            traces += 1
+            readings += report.samples
+            transitions += len(report.transitions)
+            discards += sum(1 for t in report.transitions if t.after == STATE_DISCARD)
+            unreadable += report.error is not None
+            if out is not None:
+                for t in report.transitions:
+                    writer.writerow((report.name, timestamp(t.time), STATE_NAMES[t.before],
+                                     STATE_NAMES[t.after], round(t.danger_time),
+                                     EVENT_MESSAGES[t.event]))
+    finally:
+        if out is not None:
+            out.close()
+    print("Replayed {} traces ({} readings) in {:.2f} s: {} transitions, {} DISCARD,"
+          " {} unreadable".format(traces, readings, time.perf_counter() - started,
+                                  transitions, discards, unreadable))
+    return 1 if unreadable else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,45 @@
+"""
+Check of the replay across a reset.
+
+The CLUE's clock restarts at 2000-01-01 after a reset or brown-out, so a
+food_log.bin can jump back in time. check_reset() replays a trace with such
+a jump in the middle of a WARNING and compares it with the same readings on
+one continuous clock: the transitions and danger-zone times must match.
+"""
+
+from replay.engine import LOG_INTERVAL, replay
+
+START = 1762000000  # 2025-11-01, Unix seconds
+RESET_START = 946684800  # 2000-01-01, where the clock restarts
+
+
+def reset_trace():
+    """(times, temps, continuous times): 30 min cold, 70 min warm, 30 min cold again."""
+    temps = [2.0] * 30 + [6.0] * 70 + [2.0] * 30
+    continuous = [START + i * LOG_INTERVAL for i in range(len(temps))]
+    reset_at = 60  # Halfway through the warm spell
+    times = continuous[:reset_at] + [RESET_START + 10 + i * LOG_INTERVAL
+                                     for i in range(len(temps) - reset_at)]
+    return times, temps, continuous
+
+
+def outcome(report):
+    """What a replay decided, without the log times."""
+    return ([(t.before, t.after, t.event, round(t.danger_time)) for t in report.transitions],
+            round(report.danger_time), report.final_state)
+
+
+def check_reset(settings, report):
+    """Replay the reset trace and its continuous twin; returns mismatches."""
+    times, temps, continuous = reset_trace()
+    result = replay("reset", times, temps, settings)
+    expected = outcome(replay("continuous", continuous, temps, settings))
+    actual = outcome(result)
+    mismatches = 0
+    if len(result.resets) != 1:
+        mismatches += 1
+        report("reset: {} clock resets found, expected 1".format(len(result.resets)))
+    if actual != expected:
+        mismatches += 1
+        report("reset: replay {} continuous {}".format(actual, expected))
+    return mismatches
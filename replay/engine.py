@@ -0,0 +1,237 @@
+"""
+Replay of recorded temperature traces through food_state.py.
+
+A trace is a list of (unix time, air temperature) readings. They go through
+the same steps as in food_safety.py's main loop: the optional thermal lag
+estimate, the median/exponential Smoother, then FoodSafetyMachine.update().
+"""
+
+import ast
+import os
+
+from filters import Smoother  # The firmware modules, from the repository root
+from food_state import (FoodSafetyMachine, EVENT_ENTERED, EVENT_RESET, STATE_SAFE,
+                        STATE_WARNING)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FOOD_SAFETY_PY = os.path.join(ROOT, "food_safety.py")
+
+
+def device_settings(path, names):
+    """{name: value} of the top-level constant assignments `names` in a firmware file.
+
+    The assignments are evaluated on their own, so the file's imports
+    (CircuitPython modules) are not needed.
+    """
+    with open(path) as f:
+        tree = ast.parse(f.read(), path)
+    body = [node for node in tree.body if isinstance(node, ast.Assign)
+            and len(node.targets) == 1 and isinstance(node.targets[0], ast.Name)
+            and node.targets[0].id in names]
+    namespace = {}
+    exec(compile(ast.Module(body=body, type_ignores=[]), path, "exec"), namespace)
+    missing = [name for name in names if name not in namespace]
+    if missing:
+        raise ValueError("{} has no {}".format(path, ", ".join(missing)))
+    return {name: namespace[name] for name in names}
+
+
+# food_safety.py settings, read from the firmware so a replay matches it
+_DEVICE = device_settings(FOOD_SAFETY_PY, (
+    "FOOD_SAFE_TEMP", "ROOM_TEMP", "DANGER_ZONE_LIMIT", "MAX_STORAGE_DAYS", "TEMP_MEDIAN",
+    "TEMP_SMOOTHING", "TEMP_HYSTERESIS", "TRANSITION_DWELL", "LOG_INTERVAL"))
+FOOD_SAFE_TEMP = _DEVICE["FOOD_SAFE_TEMP"]
+ROOM_TEMP = _DEVICE["ROOM_TEMP"]
+DANGER_ZONE_LIMIT = _DEVICE["DANGER_ZONE_LIMIT"]
+MAX_STORAGE_DAYS = _DEVICE["MAX_STORAGE_DAYS"]
+TEMP_MEDIAN = _DEVICE["TEMP_MEDIAN"]
+TEMP_SMOOTHING = _DEVICE["TEMP_SMOOTHING"]
+TEMP_HYSTERESIS = _DEVICE["TEMP_HYSTERESIS"]
+TRANSITION_DWELL = _DEVICE["TRANSITION_DWELL"]
+LOG_INTERVAL = _DEVICE["LOG_INTERVAL"]
+
+# A gap this long between readings means the CLUE was off or reset
+GAP_SECONDS = 5 * LOG_INTERVAL
+
+
+class Settings:
+    """Thresholds and filters a replay runs with (food_safety.py's by default)."""
+
+    def __init__(self, safe_temp=FOOD_SAFE_TEMP, room_temp=ROOM_TEMP,
+                 danger_limit=DANGER_ZONE_LIMIT, max_storage_days=MAX_STORAGE_DAYS,
+                 median=TEMP_MEDIAN, smoothing=TEMP_SMOOTHING, hysteresis=TEMP_HYSTERESIS,
+                 dwell=TRANSITION_DWELL, food_time_constant=None, gap=GAP_SECONDS):
+        self.safe_temp = safe_temp
+        self.room_temp = room_temp
+        self.danger_limit = danger_limit
+        self.max_storage_days = max_storage_days
+        self.median = median
+        self.smoothing = smoothing
+        self.hysteresis = hysteresis
+        self.dwell = dwell
+        self.food_time_constant = food_time_constant  # Seconds; None = no thermal model
+        self.gap = gap
+
+    def machine(self):
+        return FoodSafetyMachine(self.safe_temp, self.room_temp, self.danger_limit,
+                                 self.max_storage_days, self.hysteresis, self.dwell)
+
+
+class Transition:
+    """One state change: when, from and to which state, and why."""
+
+    __slots__ = ("time", "before", "after", "event", "danger_time")
+
+    def __init__(self, time, before, after, event, danger_time):
+        self.time = time  # Unix seconds of the reading that caused it
+        self.before = before  # STATE_*
+        self.after = after  # STATE_*
+        self.event = event  # EVENT_*
+        self.danger_time = danger_time  # Danger-zone seconds of the session so far
+
+
+class Report:
+    """Everything a replay found in one trace."""
+
+    def __init__(self, name):
+        self.name = name
+        self.samples = 0
+        self.start = None  # Unix seconds of the first and last readings
+        self.end = None
+        self.transitions = []
+        self.gaps = []  # (start, end) of readings missing for Settings.gap or longer
+        self.resets = []  # (last, first) log times around a jump back of the clock
+        self.danger_time = 0.0  # Danger-zone seconds over all monitoring sessions
+        self.final_state = None
+        self.error = None  # Why the trace could not be read
+
+
+def replay(name, times, temps, settings=None):
+    """Run the state machine over one trace; returns a Report.
+
+    Time the CLUE was off (a gap of settings.gap or more) is not counted,
+    as on the device: food_safety.py resumes from its snapshot and restarts
+    the filter and dwell timers. After a reset the log's clock restarts at
+    2000-01-01 and jumps back; that is handled like a gap, and the device's
+    clock carries on one LOG_INTERVAL after the last reading before it. The
+    device's clock during the replay is the log time minus all gaps so far,
+    plus the jumps back.
+    """
+    settings = settings or Settings()
+    report = Report(name)
+    if not len(times):
+        return report
+    if settings.food_time_constant:
+        from thermal import simulate_food
+
+        temps = simulate_food(times, temps, settings.food_time_constant)
+
+    machine = settings.machine()
+    smoother = Smoother(settings.median, settings.smoothing)
+    transitions = report.transitions
+    paused = 0.0  # Seconds of gaps so far
+    rewound = 0.0  # Seconds the log's clock jumped back at resets
+    session_danger = 0.0  # Danger time of the sessions already ended
+    previous = None
+    for t, temp in zip(times, temps):
+        t = float(t)
+        if previous is not None and (t < previous or t - previous >= settings.gap):
+            if t < previous:
+                report.resets.append((previous, t))
+                rewound += previous - t + LOG_INTERVAL
+            else:
+                report.gaps.append((previous, t))
+                paused += t - previous - LOG_INTERVAL
+            smoother.reset()
+            machine.reset_dwell()
+        previous = t
+
+        now = t - paused + rewound
+        before = machine.state
+        in_session = before in (STATE_SAFE, STATE_WARNING)
+        event = machine.update(now, smoother.update(now, float(temp)))
+        if event is None:
+            continue
+        if event == EVENT_RESET or event == EVENT_ENTERED:
+            danger = 0.0
+        else:
+            danger = machine.danger_time(now)
+        transitions.append(Transition(t, before, machine.state, event, danger))
+        if in_session and machine.state not in (STATE_SAFE, STATE_WARNING):
+            session_danger += danger
+
+    if machine.state in (STATE_SAFE, STATE_WARNING):
+        session_danger += machine.danger_time(previous - paused + rewound)
+    report.samples = len(times)
+    report.start = float(times[0])
+    report.end = previous
+    report.danger_time = session_danger
+    report.final_state = machine.state
+    return report
+
+
+def read_log(path):
+    """(times, temperatures) of a food_log.bin copied from CIRCUITPY."""
+    from datalog import read_records
+
+    times = []
+    temps = []
+    for record in read_records(path):
+        times.append(record[1])
+        temps.append(record[2])
+    return times, temps
+
+
+def read_store(root, device, start=None, end=None):
+    """(times, temperatures) of a device in an ingest store."""
+    from ingest import ColumnStore
+
+    columns = ColumnStore(root).read(device, start, end, ("time", "temperature"))
+    return columns["time"], columns["temperature"]
+
+
+def replay_source(source, settings=None):
+    """Read and replay one source: ("log", path) or ("store", root, device, start, end).
+
+    A trace that cannot be read gives a Report with `error` set, so one bad
+    file does not stop a batch.
+    """
+    kind = source[0]
+    if kind == "log":
+        name = source[1]
+    else:
+        name = "{}:{}".format(os.path.basename(os.path.normpath(source[1])), source[2])
+    try:
+        if kind == "log":
+            times, temps = read_log(source[1])
+        else:
+            times, temps = read_store(*source[1:])
+    except (OSError, ValueError, KeyError) as e:
+        report = Report(name)
+        report.error = str(e) or type(e).__name__
+        return report
+    return replay(name, times, temps, settings)
+
+
+def replay_all(sources, settings=None, workers=None):
+    """Replay many sources in a process pool; yields Reports in source order.
+
+    `workers` defaults to the number of CPUs; 1 replays in this process.
+    """
+    sources = list(sources)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, len(sources)))
+    if workers == 1:
+        for source in sources:
+            yield replay_source(source, settings)
+        return
+
+    import functools
+    import multiprocessing
+
+    work = functools.partial(replay_source, settings=settings)
+    chunk = max(1, len(sources) // (workers * 8))
+    with multiprocessing.Pool(workers) as pool:
+        for report in pool.imap(work, sources, chunk):
+            yield report
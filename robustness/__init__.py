@@ -0,0 +1,33 @@
+"""
+Food-Safety Robustness
+======================
+
+Monte Carlo evaluation of food_safety.py's thresholds, sample interval and
+filters against synthetic fridge traces:
+
+    python -m robustness --traces 100000
+    python -m robustness --safe-temp 4 3.5 --dwell 0 30 120 --interval 10 60
+    python -m robustness --traces 2000 --check 50
+
+Each trace is a day (--hours) in a fridge with compressor and defrost
+cycles, door openings, sometimes a power loss, and a sensor with bias,
+noise and spikes (scenarios.py). The food's own temperature is known, so
+every trace is either unsafe (over two hours above 4C) or not. Every
+configuration runs over the same traces, and the report gives per
+configuration:
+
+- false DISCARD: safe traces the device discarded
+- missed DISCARD: unsafe traces it did not
+- delay: how long after the food became unsafe the device said so
+
+The decisions are food_state.py's, vectorized across traces with NumPy
+(batch.py); --check compares them with the scalar code. Batches of traces
+run in a process pool, one process per CPU.
+
+Needs NumPy. The sample interval is fixed; food_safety.py samples faster
+near the threshold, so the slow interval is the worst case.
+"""
+
+from robustness.scenarios import Batch, REFERENCE_SAFE_TEMP, REFERENCE_DANGER_LIMIT
+from robustness.batch import Outcome, run
+from robustness.sweep import Config, Tally, configurations, evaluate, sweep
@@ -0,0 +1,95 @@
+"""
+Command-line robustness sweep.
+
+    python -m robustness --traces 100000
+    python -m robustness --safe-temp 4 3.5 --dwell 0 30 120 --interval 10 60
+    python -m robustness --traces 2000 --check 50
+"""
+
+import argparse
+import sys
+import time
+
+from replay.engine import Settings
+from robustness.check import check_batch
+from robustness.scenarios import Batch
+from robustness.sweep import BATCH_SIZE, configurations, sweep
+
+# food_safety.py samples every 2 to 60 seconds; 10 stands in for the fast
+# rate (--interval 2 works, about five times slower)
+INTERVALS = (10, 60)
+
+
+def duration(seconds):
+    if seconds != seconds:  # NaN
+        return "-"
+    return "{:.0f}m".format(seconds / 60)
+
+
+def print_table(results, traces, hours):
+    safe = results[0][1].safe
+    print("{} traces: {} safe, {} unsafe (food > 4C for 2 hours)".format(
+        traces, safe, traces - safe))
+    print("{:>6} {:>6} {:>5} {:>3} {:>5} {:>5} {:>6} | {:>7} {:>7} {:>6} {:>8}".format(
+        "safe", "limit", "every", "med", "hyst", "dwell", "food", "false", "missed", "delay",
+        "warn/day"))
+    for config, tally in results:
+        print("{:>5g}C {:>5g}s {:>4g}s {:>3} {:>4g}C {:>4g}s {:>6} | {:>7.2%} {:>7.2%} {:>6} {:>8.2f}".format(
+            config.safe_temp, config.danger_limit, config.interval, config.median,
+            config.hysteresis, config.dwell,
+            "{:g}s".format(config.food_time_constant) if config.food_time_constant else "-",
+            tally.false_rate(), tally.missed_rate(), duration(tally.mean_delay()),
+            tally.warnings / traces / hours * 24))
+
+
+def main(argv=None):
+    defaults = Settings()
+    parser = argparse.ArgumentParser(prog="python -m robustness",
+                                     description="False and missed DISCARD rates of food-safety settings")
+    parser.add_argument("--traces", type=int, default=10000, help="(default: %(default)s)")
+    parser.add_argument("--hours", type=float, default=24, help="per trace (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, help="processes (default: one per CPU)")
+    parser.add_argument("--check", type=int, metavar="N",
+                        help="first compare N traces with the scalar food_state.py")
+    parser.add_argument("--safe-temp", type=float, nargs="+", default=[defaults.safe_temp])
+    parser.add_argument("--danger-limit", type=float, nargs="+", default=[defaults.danger_limit],
+                        help="seconds")
+    parser.add_argument("--interval", type=float, nargs="+", default=list(INTERVALS),
+                        help="seconds between samples (default: %(default)s)")
+    parser.add_argument("--median", type=int, nargs="+", default=[1, defaults.median],
+                        help="samples (default: %(default)s)")
+    parser.add_argument("--hysteresis", type=float, nargs="+", default=[defaults.hysteresis])
+    parser.add_argument("--dwell", type=float, nargs="+", default=[0, defaults.dwell, 120],
+                        help="seconds (default: %(default)s)")
+    parser.add_argument("--food-time-constant", type=float, nargs="+", default=[0],
+                        help="seconds, 0 = no thermal model (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    configs = configurations(safe_temp=args.safe_temp, danger_limit=args.danger_limit,
+                             interval=args.interval, median=args.median,
+                             hysteresis=args.hysteresis, dwell=args.dwell,
+                             food_time_constant=args.food_time_constant)
+
+    if args.check:
+        count = min(args.check, BATCH_SIZE, args.traces)
+        print("Checking {} traces x {} configurations against food_state.py...".format(
+            count, len(configs)))
+        mismatches = check_batch(Batch(count, args.hours, (args.seed, 0)), configs, count, print)
+        print("{} mismatches".format(mismatches))
+        if mismatches:
+            return 1
+
+    def progress(done, total):
+        print("\r{}/{} batches".format(done, total), end="", file=sys.stderr, flush=True)
+
+    started = time.perf_counter()
+    results = sweep(configs, args.traces, args.hours, args.seed, args.workers, progress)
+    print(file=sys.stderr)
+    print("{} configurations in {:.1f} s".format(len(configs), time.perf_counter() - started))
+    print_table(results, args.traces, args.hours)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
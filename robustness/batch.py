@@ -0,0 +1,223 @@
+"""
+The food-safety decisions for many traces at once.
+
+The same steps as replay.replay() (thermal.simulate_food, filters.Smoother,
+food_state.FoodSafetyMachine) with samples down axis 0 and one column per
+trace. None is NaN. The results are those of the scalar code to the last
+bit (check.py compares them).
+"""
+
+import math
+
+import numpy
+
+from food_state import STATE_INITIAL, STATE_SAFE, STATE_WARNING, STATE_DISCARD, STATE_CHARGE
+
+
+class Outcome:
+    """Per-trace results of one configuration."""
+
+    def __init__(self, size):
+        self.discarded = numpy.zeros(size, bool)
+        self.discard_time = numpy.full(size, numpy.nan)  # First DISCARD
+        self.warnings = numpy.zeros(size, numpy.int64)  # SAFE -> WARNING changes
+        self.state = numpy.full(size, STATE_INITIAL, numpy.int8)  # At the end
+
+
+def food_estimate(times, readings, time_constant):
+    """thermal.simulate_food() down every column."""
+    food = numpy.empty_like(readings)
+    food[0] = readings[0]
+    for i in range(1, len(times)):
+        target = (readings[i - 1] + readings[i]) / 2
+        food[i] = target + (food[i - 1] - target) * math.exp(-(times[i] - times[i - 1]) / time_constant)
+    return food
+
+
+def median_filter(readings, size):
+    """Smoother's median (the upper one for an even count) over the last `size` rows."""
+    size = max(1, size)
+    if size == 1:
+        return readings.copy()
+    middle = size // 2
+    result = numpy.empty_like(readings)
+    # The window is not full yet for the first rows
+    for i in range(min(size - 1, len(readings))):
+        result[i] = numpy.sort(readings[:i + 1], axis=0)[(i + 1) // 2]
+    if len(readings) >= size:
+        # Odd-even transposition sort of the window's rows (min/max pick
+        # elements, so the median is exactly one of the samples)
+        count = len(readings) - size + 1
+        window = [readings[i:i + count] for i in range(size)]
+        for step in range(size):
+            for i in range(step % 2, size - 1, 2):
+                window[i], window[i + 1] = (numpy.minimum(window[i], window[i + 1]),
+                                            numpy.maximum(window[i], window[i + 1]))
+        result[size - 1:] = window[middle]
+    return result
+
+
+def smooth(times, values, time_constant):
+    """Smoother's exponential smoothing down every column."""
+    result = values.copy()
+    for i in range(1, len(times)):
+        elapsed = times[i] - times[i - 1]
+        if elapsed > 0:
+            result[i] = result[i - 1] + elapsed / (elapsed + time_constant) * (values[i] - result[i - 1])
+    return result
+
+
+def filtered(times, readings, settings):
+    """The temperatures FoodSafetyMachine.update() gets, (samples, traces)."""
+    if settings.food_time_constant:
+        readings = food_estimate(times, readings, settings.food_time_constant)
+    values = median_filter(readings, settings.median)
+    if settings.smoothing > 0:
+        values = smooth(times, values, settings.smoothing)
+    return values
+
+
+def dwell(times, condition, seconds):
+    """filters.Dwell.check() at every row: (fired, last_false).
+
+    last_false is the row of the last check where `condition` did not hold
+    (-1 for none), so Dwell.since is times[last_false + 1] and
+    Dwell.last_clear is times[last_false].
+    """
+    rows = numpy.arange(len(times), dtype=numpy.int32)[:, None]
+    last_false = numpy.maximum.accumulate(numpy.where(condition, numpy.int32(-1), rows), axis=0)
+    since = times[numpy.minimum(last_false + 1, len(times) - 1)]  # Only used where it held
+    return condition & (times[:, None] - since >= seconds), last_false
+
+
+def next_true(mask):
+    """Row of the first True at or after every row, len(mask) for none (one extra row)."""
+    rows = len(mask)
+    found = numpy.where(mask, numpy.arange(rows, dtype=numpy.int32)[:, None], numpy.int32(rows))
+    result = numpy.empty((rows + 1, mask.shape[1]), numpy.int32)
+    result[rows] = rows
+    result[:rows] = numpy.minimum.accumulate(found[::-1], axis=0)[::-1]
+    return result
+
+
+def first_row(times, guess, holds):
+    """First row at or after which holds(rows) is True, near a searchsorted() guess.
+
+    holds() must stay True once it is; len(times) is returned for never.
+    The guess can be off by a row where rounding differs from the scalar
+    code's expression, so step to the exact row.
+    """
+    last = len(times) - 1
+    for _ in range(2):
+        earlier = numpy.maximum(guess - 1, 0)
+        guess = numpy.where((guess > 0) & holds(earlier), earlier, guess)
+    for _ in range(2):
+        guess = numpy.where((guess <= last) & ~holds(numpy.minimum(guess, last)), guess + 1, guess)
+    return guess
+
+
+def run(times, readings, settings):
+    """Run the state machine over every column of `readings`; returns an Outcome.
+
+    Every threshold check depends only on the temperatures, so the dwell
+    timers are worked out for all rows at once. Then each trace jumps from
+    one state change to the next: one loop iteration per state change.
+    """
+    temps = filtered(times, readings, settings)
+    rows, size = temps.shape
+    outcome = Outcome(size)
+    state = outcome.state
+    warm, warm_last_false = dwell(times, temps > settings.safe_temp, settings.dwell)
+    warm = next_true(warm)
+    cold = next_true(dwell(times, temps <= settings.safe_temp - settings.hysteresis,
+                           settings.dwell)[0])
+    room = next_true(dwell(times, temps >= settings.room_temp, settings.dwell)[0])
+    del temps
+    storage_limit = settings.max_storage_days * 86400
+    danger_limit = settings.danger_limit
+
+    fridge_entry = numpy.full(size, numpy.nan)
+    danger_start = numpy.full(size, numpy.nan)
+    danger_total = numpy.zeros(size)
+    position = numpy.zeros(size, numpy.int64)  # First row not checked yet
+    active = numpy.arange(size)  # Traces with rows left
+    while len(active):
+        at = position[active]
+        current = state[active]
+        next_cold = cold[at, active]
+        next_warm = warm[at, active]
+        next_room = room[at, active]
+
+        # Row of the first change out of the current state (rows for none),
+        # taking the changes in the order the scalar code checks them
+        row = numpy.where((current == STATE_INITIAL) | (current == STATE_CHARGE), next_cold, rows)
+        row = numpy.where(current == STATE_DISCARD, next_room, row)
+        stored = numpy.full(len(active), rows)
+        safe = (current == STATE_SAFE).nonzero()[0]
+        if len(safe):
+            entry = fridge_entry[active[safe]]
+            stored[safe] = numpy.maximum(at[safe], first_row(
+                times, numpy.searchsorted(times, entry + storage_limit),
+                lambda r: times[r] - entry > storage_limit))
+            row[safe] = numpy.minimum(numpy.minimum(stored[safe], next_warm[safe]), next_room[safe])
+        limit = numpy.full(len(active), rows)
+        warning = (current == STATE_WARNING).nonzero()[0]
+        if len(warning):
+            start = danger_start[active[warning]]
+            total = danger_total[active[warning]]
+            limit[warning] = numpy.maximum(at[warning], first_row(
+                times, numpy.searchsorted(times, start - total + danger_limit),
+                lambda r: times[r] - start + total >= danger_limit))
+            row[warning] = numpy.minimum(numpy.minimum(limit[warning], next_cold[warning]),
+                                         next_room[warning])
+
+        found = row < rows
+        position[active] = numpy.where(found, row + 1, rows)
+        keep = found.nonzero()[0]
+        active = active[keep]
+        row = row[keep]
+        now = times[row]
+        current = current[keep]
+        before = current.copy()
+
+        entered = current == STATE_INITIAL
+        chosen = active[entered]
+        state[chosen] = STATE_SAFE
+        fridge_entry[chosen] = now[entered]
+        danger_start[chosen] = numpy.nan
+        danger_total[chosen] = 0.0
+
+        safe = before == STATE_SAFE
+        expired = safe & (row == stored[keep])
+        warmed = safe & ~expired & (row == next_warm[keep])
+        state[active[expired]] = STATE_DISCARD
+        state[active[safe & ~expired & ~warmed]] = STATE_CHARGE
+        chosen = active[warmed]
+        state[chosen] = STATE_WARNING
+        # Counted from the last sample below the threshold, as Dwell.last_clear
+        last_false = warm_last_false[row[warmed], chosen]
+        danger_start[chosen] = times[numpy.where(last_false >= 0, last_false, last_false + 1)]
+        outcome.warnings[chosen] += 1
+
+        warning = before == STATE_WARNING
+        limited = warning & (row == limit[keep])
+        cooled = warning & ~limited & (row == next_cold[keep])
+        state[active[limited]] = STATE_DISCARD
+        state[active[warning & ~limited & ~cooled]] = STATE_CHARGE
+        chosen = active[cooled]
+        state[chosen] = STATE_SAFE
+        danger_total[chosen] = now[cooled] - danger_start[chosen] + danger_total[chosen]
+        danger_start[chosen] = numpy.nan
+
+        state[active[before == STATE_DISCARD]] = STATE_CHARGE
+
+        chosen = active[before == STATE_CHARGE]
+        state[chosen] = STATE_INITIAL
+        fridge_entry[chosen] = numpy.nan
+        danger_start[chosen] = numpy.nan
+        danger_total[chosen] = 0.0
+
+        first = (expired | limited) & ~outcome.discarded[active]
+        outcome.discarded[active[first]] = True
+        outcome.discard_time[active[first]] = now[first]
+    return outcome
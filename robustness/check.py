@@ -0,0 +1,35 @@
+"""
+Parity check against the scalar code.
+
+Runs the first traces of a batch one by one through replay.replay() (and so
+food_state.py, filters.py and thermal.py) and compares every outcome with
+the vectorized one.
+"""
+
+import math
+
+from food_state import STATE_DISCARD, EVENT_WARNING
+from replay.engine import replay
+from robustness.batch import run
+
+
+def check_batch(batch, configs, count, report):
+    """Compare the first `count` traces of `batch` for every config; returns mismatches."""
+    mismatches = 0
+    for config in configs:
+        times, readings = batch.readings(config.interval, 0, count)
+        outcome = run(times, readings, config)
+        for j in range(readings.shape[1]):
+            result = replay(str(j), times.tolist(), readings[:, j].tolist(), config)
+            discards = [t.time for t in result.transitions if t.after == STATE_DISCARD]
+            expected = (bool(discards), discards[0] if discards else None,
+                        sum(1 for t in result.transitions if t.event == EVENT_WARNING),
+                        result.final_state)
+            discard_time = float(outcome.discard_time[j])
+            actual = (bool(outcome.discarded[j]), None if math.isnan(discard_time) else discard_time,
+                      int(outcome.warnings[j]), int(outcome.state[j]))
+            if expected != actual:
+                mismatches += 1
+                if mismatches <= 10:
+                    report("{} trace {}: scalar {} vectorized {}".format(config, j, expected, actual))
+    return mismatches
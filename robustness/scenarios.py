@@ -0,0 +1,146 @@
+"""
+Synthetic fridge traces with known food temperatures.
+
+Each batch of traces is simulated on a fine time grid (STEP seconds, time
+along axis 0, one column per trace). The fridge air approaches a target:
+the setpoint plus compressor cycling and defrost cycles, room temperature
+while the door is open, and room temperature much more slowly during a
+power loss. The food follows the air with its own time constant; that noise-
+free food temperature is the ground truth. The CLUE sees the air, sampled
+at a fixed interval, with a calibration bias, noise and occasional spikes.
+"""
+
+import math
+
+import numpy
+
+STEP = 15.0  # Seconds between points of the simulated air and food temperatures
+HOUR = 3600.0
+DAY = 86400.0
+
+# The exposure that should lead to DISCARD, whatever the device's settings
+REFERENCE_SAFE_TEMP = 4.0  # C
+REFERENCE_DANGER_LIMIT = 7200.0  # Seconds above it
+
+# Fridge (uniform ranges are (low, high))
+SETPOINT = (1.0, 3.0)  # C
+ROOM = (19.0, 26.0)  # C
+COMPRESSOR_SWING = (0.2, 0.8)  # C, half the peak-to-peak of the cycle
+COMPRESSOR_PERIOD = (30 * 60.0, 60 * 60.0)
+AIR_TIME_CONSTANT = 300.0  # Seconds for the air to settle with the door closed
+DOOR_TIME_CONSTANT = 60.0  # ...while the door is open
+DOORS_PER_DAY = 12.0  # Mean (Poisson)
+DOOR_SECONDS = (5.0, 90.0)
+DEFROST_PERIOD = (6 * HOUR, 12 * HOUR)
+DEFROST_SECONDS = (10 * 60.0, 25 * 60.0)
+DEFROST_RISE = (1.0, 4.0)  # C above the setpoint
+POWER_LOSS_CHANCE = 0.25  # Per trace
+POWER_LOSS_SECONDS = (0.5 * HOUR, 8 * HOUR)
+POWER_LOSS_TIME_CONSTANT = 4 * HOUR  # The closed cabinet warms slowly
+FOOD_TIME_CONSTANT = (30 * 60.0, 3 * HOUR)
+
+# Sensor
+SENSOR_BIAS = 0.2  # C, standard deviation of what calibration left over
+SENSOR_NOISE = (0.05, 0.3)  # C, standard deviation
+SPIKE_CHANCE = 0.001  # Per reading
+SPIKE_SIZE = (2.0, 6.0)  # C, either sign
+
+
+class Batch:
+    """Simulated air temperatures and the ground truth for `size` traces."""
+
+    def __init__(self, size, hours, seed):
+        self.size = size
+        self.duration = hours * HOUR
+        self.seed = seed if isinstance(seed, tuple) else (seed,)
+        generator = numpy.random.default_rng(self.seed)
+        self.bias = generator.normal(0.0, SENSOR_BIAS, size)
+        self.noise = generator.uniform(*SENSOR_NOISE, size)
+        self.air, self.exposure, self.exceeded = simulate(size, self.duration, generator)
+        # Exposure over the reference limit: the food should be discarded
+        self.unsafe = self.exposure >= REFERENCE_DANGER_LIMIT
+
+    def readings(self, interval, first=0, stop=None):
+        """(times, readings) the CLUE takes every `interval` seconds.
+
+        Readings are (samples, traces) for traces first..stop-1. The same
+        interval and traces give the same noise, so configurations that share
+        an interval see identical readings.
+        """
+        air = self.air[:, first:stop]
+        times = numpy.arange(0.0, self.duration, interval)
+        position = times / STEP
+        index = numpy.minimum(position.astype(numpy.int64), len(air) - 2)
+        fraction = (position - index)[:, None]
+        air = air[index] * (1.0 - fraction) + air[index + 1] * fraction
+
+        generator = numpy.random.default_rng(self.seed + (int(interval * 1000), first))
+        readings = air + self.bias[first:stop] + generator.standard_normal(air.shape) * self.noise[first:stop]
+        spikes = generator.random(air.shape) < SPIKE_CHANCE
+        sizes = generator.uniform(*SPIKE_SIZE, air.shape) * generator.choice((-1.0, 1.0), air.shape)
+        readings += numpy.where(spikes, sizes, 0.0)
+        return times, readings
+
+
+def door_fraction(size, steps, generator):
+    """(steps, size) fraction of every step the door was open."""
+    duration = steps * STEP
+    counts = generator.poisson(DOORS_PER_DAY * duration / DAY, size)
+    trace = numpy.repeat(numpy.arange(size), counts)
+    start = generator.uniform(0.0, duration, len(trace))
+    end = start + generator.uniform(*DOOR_SECONDS, len(trace))
+    fraction = numpy.zeros((steps, size))
+    first = (start // STEP).astype(numpy.int64)
+    for j in range(int(math.ceil(DOOR_SECONDS[1] / STEP)) + 1):
+        i = first + j
+        overlap = numpy.minimum(end, (i + 1) * STEP) - numpy.maximum(start, i * STEP)
+        keep = (i < steps) & (overlap > 0)
+        numpy.add.at(fraction, (i[keep], trace[keep]), overlap[keep] / STEP)
+    return numpy.minimum(fraction, 1.0)
+
+
+def simulate(size, duration, generator):
+    """(air, exposure, exceeded): air temperatures on the STEP grid, seconds the
+    food spent above REFERENCE_SAFE_TEMP, and when it passed
+    REFERENCE_DANGER_LIMIT (NaN if never)."""
+    steps = int(math.ceil(duration / STEP)) + 1
+    t = (numpy.arange(steps) * STEP)[:, None]
+
+    def uniform(bounds):
+        return generator.uniform(bounds[0], bounds[1], size)
+
+    setpoint = uniform(SETPOINT)
+    room = uniform(ROOM)
+    target = setpoint + uniform(COMPRESSOR_SWING) * numpy.sin(
+        2 * math.pi * t / uniform(COMPRESSOR_PERIOD) + uniform((0.0, 2 * math.pi)))
+
+    defrost_period = uniform(DEFROST_PERIOD)
+    defrosting = (t + uniform((0.0, 1.0)) * defrost_period) % defrost_period < uniform(DEFROST_SECONDS)
+    target += defrosting * uniform(DEFROST_RISE)
+
+    door = door_fraction(size, steps, generator)
+    target += door * (room - target)
+    decay = numpy.where(door > 0, math.exp(-STEP / DOOR_TIME_CONSTANT),
+                        math.exp(-STEP / AIR_TIME_CONSTANT))
+
+    lost = generator.random(size) < POWER_LOSS_CHANCE
+    loss_start = uniform((0.0, duration))
+    loss_end = numpy.where(lost, loss_start + uniform(POWER_LOSS_SECONDS), -1.0)
+    off = (t >= loss_start) & (t < loss_end)
+    target = numpy.where(off, room, target)
+    decay = numpy.where(off, math.exp(-STEP / POWER_LOSS_TIME_CONSTANT), decay)
+
+    food_decay = numpy.exp(-STEP / uniform(FOOD_TIME_CONSTANT))
+    air = numpy.empty((steps, size))
+    air[0] = setpoint
+    food = setpoint.copy()
+    exposure = numpy.zeros(size)
+    exceeded = numpy.full(size, numpy.nan)
+    for i in range(1, steps):
+        air[i] = target[i] + (air[i - 1] - target[i]) * decay[i]
+        mean = (air[i - 1] + air[i]) * 0.5
+        food = mean + (food - mean) * food_decay
+        exposure += (food > REFERENCE_SAFE_TEMP) * STEP
+        newly = (exposure >= REFERENCE_DANGER_LIMIT) & numpy.isnan(exceeded)
+        exceeded[newly] = i * STEP
+    return air, exposure, exceeded
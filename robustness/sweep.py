@@ -0,0 +1,130 @@
+"""
+Sweeps of food-safety configurations over batches of synthetic traces.
+"""
+
+import functools
+import itertools
+import os
+
+import numpy
+
+from replay.engine import Settings
+from robustness.batch import run
+from robustness.scenarios import Batch
+
+BATCH_SIZE = 1000  # Traces simulated together
+CHUNK_READINGS = 1 << 22  # Readings per run() (bounds its memory to a few 100 MB)
+
+
+class Config(Settings):
+    """replay.Settings plus the sample interval."""
+
+    def __init__(self, interval=60, **settings):
+        settings.setdefault("gap", float("inf"))  # The CLUE never stops sampling
+        super().__init__(**settings)
+        self.interval = interval
+
+    def __str__(self):
+        return ("safe {}C limit {}s every {}s median {} hysteresis {}C dwell {}s{}".format(
+            self.safe_temp, self.danger_limit, self.interval, self.median, self.hysteresis,
+            self.dwell, " food {}s".format(self.food_time_constant)
+            if self.food_time_constant else ""))
+
+
+def configurations(**choices):
+    """Every combination of the given choices: configurations(dwell=(0, 30), median=(1, 5))."""
+    names = sorted(choices)
+    return [Config(**dict(zip(names, values)))
+            for values in itertools.product(*(choices[name] for name in names))]
+
+
+class Tally:
+    """Outcome counts of one configuration."""
+
+    def __init__(self):
+        self.safe = 0  # Traces that did not need discarding...
+        self.unsafe = 0  # ...and those that did
+        self.false_discards = 0
+        self.missed_discards = 0
+        self.delay = 0.0  # Sum of DISCARD time - unsafe time, over detected unsafe traces
+        self.detected = 0
+        self.warnings = 0  # SAFE -> WARNING changes over all traces
+
+    def add(self, other):
+        for name, value in vars(other).items():
+            setattr(self, name, getattr(self, name) + value)
+
+    def count(self, batch, outcome, first=0, stop=None):
+        """Add the outcome of traces first..stop-1 of `batch`."""
+        unsafe = batch.unsafe[first:stop]
+        exceeded = batch.exceeded[first:stop]
+        discarded = outcome.discarded
+        self.safe += int((~unsafe).sum())
+        self.unsafe += int(unsafe.sum())
+        self.false_discards += int((discarded & ~unsafe).sum())
+        self.missed_discards += int((unsafe & ~discarded).sum())
+        detected = unsafe & discarded
+        self.detected += int(detected.sum())
+        self.delay += float((outcome.discard_time[detected] - exceeded[detected]).sum())
+        self.warnings += int(outcome.warnings.sum())
+
+    def false_rate(self):
+        return self.false_discards / self.safe if self.safe else 0.0
+
+    def missed_rate(self):
+        return self.missed_discards / self.unsafe if self.unsafe else 0.0
+
+    def mean_delay(self):
+        return self.delay / self.detected if self.detected else numpy.nan
+
+
+def evaluate(index, configs, size, hours, seed):
+    """Tallies of every config over batch `index` (one process pool task)."""
+    batch = Batch(size, hours, (seed, index))
+    tallies = [Tally() for _ in configs]
+    for interval in sorted({config.interval for config in configs}):
+        samples = len(numpy.arange(0.0, batch.duration, interval))
+        width = max(1, CHUNK_READINGS // samples)
+        for first in range(0, size, width):
+            stop = min(size, first + width)
+            times, readings = batch.readings(interval, first, stop)
+            for config, tally in zip(configs, tallies):
+                if config.interval == interval:
+                    tally.count(batch, run(times, readings, config), first, stop)
+    return tallies
+
+
+def sweep(configs, traces, hours=24, seed=0, workers=None, progress=None):
+    """Tallies of every config over `traces` synthetic traces.
+
+    Batches run in a process pool of `workers` (default: one per CPU; 1 runs
+    in this process). progress(done, total) is called after each batch.
+    """
+    batches = [(index, min(BATCH_SIZE, traces - start))
+               for index, start in enumerate(range(0, traces, BATCH_SIZE))]
+    totals = [Tally() for _ in configs]
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, len(batches)))
+
+    def collect(results):
+        for done, tallies in enumerate(results, 1):
+            for total, tally in zip(totals, tallies):
+                total.add(tally)
+            if progress is not None:
+                progress(done, len(batches))
+
+    tasks = [functools.partial(evaluate, index, configs, size, hours, seed)
+             for index, size in batches]
+    if workers == 1:
+        collect(task() for task in tasks)
+    else:
+        import multiprocessing
+
+        with multiprocessing.Pool(workers) as pool:
+            collect(pool.imap_unordered(_call, tasks))
+    return list(zip(configs, totals))
+
+
+def _call(task):
+    return task()
@@ -0,0 +1,162 @@
+"""
+Environmental Sensor Sampling
+=============================
+
+One read of the CLUE's environmental sensors per sample.
+
+clue.temperature, clue.pressure and clue.altitude each start their own
+I2C transfer to the BMP280, and the driver reads the temperature again
+before every pressure or altitude read to compensate it. Reading all three
+costs five BMP280 transfers and gives values from different instants.
+
+Sampler reads the pressure once. That read also yields the compensated
+temperature of the same measurement, kept by adafruit_bmp280 as t_fine.
+Humidity comes from the SHT3x in one more transfer. Altitude and sea-level
+pressure are then derived from the sample's pressure and a reference
+pressure, using the same formula as adafruit_bmp280.
+
+Acquisition profiles set how both chips measure and how often update()
+takes a sample, trading measurement time and current against noise:
+
+- fridge-lowpower: forced mode, 1x oversampling, one sample a minute. The
+  BMP280 sleeps between samples; food in a fridge changes slowly.
+- room: forced mode, 4x pressure oversampling, a sample every 2 seconds.
+- weather-precision: normal mode (continuous, 1 s standby), 16x pressure
+  oversampling and a 16x IIR filter for trend detection.
+
+Without a profile the chips keep the driver defaults (normal mode with
+16x pressure oversampling, measuring continuously).
+
+    sampler = Sampler(clue._pressure, clue._humidity)
+    sampler.use("room")
+    if sampler.update(time.monotonic()):
+        print(sampler.temperature, sampler.pressure, sampler.altitude)
+"""
+
+import math
+
+SEA_LEVEL_PRESSURE = 1013.25  # Standard atmosphere, hPa
+
+# adafruit_bmp280 register values
+MODE_SLEEP = 0x00
+MODE_FORCE = 0x01
+MODE_NORMAL = 0x03
+OVERSCAN_X1 = 0x01
+OVERSCAN_X2 = 0x02
+OVERSCAN_X4 = 0x03
+OVERSCAN_X16 = 0x05
+IIR_FILTER_DISABLE = 0x00
+IIR_FILTER_X16 = 0x04
+STANDBY_TC_1000 = 0x05
+
+# adafruit_sht31d repeatability (higher is less noisy but slower)
+REP_LOW = "Low"
+REP_MED = "Medium"
+REP_HIGH = "High"
+
+SHT3X_MEASUREMENT_MS = {REP_LOW: 4.5, REP_MED: 6.5, REP_HIGH: 15.5}  # Datasheet maximum
+
+
+def pressure_altitude(pressure, reference=SEA_LEVEL_PRESSURE):
+    """Altitude in meters for `pressure`, relative to `reference` (hPa)."""
+    return 44330 * (1.0 - math.pow(pressure / reference, 0.1903))
+
+
+def sea_level_pressure(pressure, altitude):
+    """Pressure reduced to sea level from a station at `altitude` meters."""
+    return pressure / math.pow(1.0 - altitude / 44330, 5.255)
+
+
+class Profile:
+    """Sensor configuration and sampling interval for one kind of use."""
+
+    def __init__(self, name, interval, mode, overscan_pressure, overscan_temperature,
+                 iir_filter=IIR_FILTER_DISABLE, standby_period=STANDBY_TC_1000,
+                 repeatability=REP_HIGH):
+        self.name = name
+        self.interval = interval  # Seconds between samples in update()
+        self.mode = mode
+        self.overscan_pressure = overscan_pressure
+        self.overscan_temperature = overscan_temperature
+        self.iir_filter = iir_filter
+        self.standby_period = standby_period  # Normal mode only
+        self.repeatability = repeatability
+
+
+PROFILES = {}
+for _profile in (
+        Profile("fridge-lowpower", 60, MODE_FORCE, OVERSCAN_X1, OVERSCAN_X1,
+                repeatability=REP_LOW),
+        Profile("room", 2, MODE_FORCE, OVERSCAN_X4, OVERSCAN_X1,
+                repeatability=REP_MED),
+        Profile("weather-precision", 5, MODE_NORMAL, OVERSCAN_X16, OVERSCAN_X2,
+                IIR_FILTER_X16, STANDBY_TC_1000, REP_HIGH)):
+    PROFILES[_profile.name] = _profile
+
+
+class Sampler:
+    """Temperature, pressure and humidity from one read of each chip.
+
+    `bmp280` and `sht3x` are adafruit_bmp280 and adafruit_sht31d drivers.
+    adafruit_clue has no public accessor for the ones it creates, so the
+    callers pass its private clue._pressure and clue._humidity; check them
+    when updating adafruit_clue. A second driver for the same chip from
+    board.I2C() would fight the clue's over the chip's settings.
+    """
+
+    def __init__(self, bmp280, sht3x, reference_pressure=SEA_LEVEL_PRESSURE):
+        self.bmp280 = bmp280
+        self.sht3x = sht3x
+        self.reference_pressure = reference_pressure
+        self.profile = None  # Driver defaults until use() is called
+        self.temperature = None  # Celsius (BMP280, as clue.temperature)
+        self.pressure = None  # hPa
+        self.humidity = None  # %RH
+        self._last_read = None
+
+    def use(self, name):
+        """Configure both chips for acquisition profile `name`."""
+        profile = PROFILES[name]
+        if profile is self.profile:
+            return
+        bmp280 = self.bmp280
+        bmp280.mode = MODE_SLEEP  # Config writes are ignored in normal mode
+        bmp280.overscan_pressure = profile.overscan_pressure
+        bmp280.overscan_temperature = profile.overscan_temperature
+        bmp280.iir_filter = profile.iir_filter
+        bmp280.standby_period = profile.standby_period
+        bmp280.mode = profile.mode
+        self.sht3x.repeatability = profile.repeatability
+        self.profile = profile
+        self._last_read = None  # Sample with the new settings on the next update()
+
+    def measurement_ms(self):
+        """Worst-case sensor time per sample in milliseconds."""
+        repeatability = REP_HIGH if self.profile is None else self.profile.repeatability
+        return self.bmp280.measurement_time_max + SHT3X_MEASUREMENT_MS[repeatability]
+
+    def update(self, now):
+        """Take a sample if the profile's interval has passed; True if one was taken."""
+        if (self._last_read is not None and self.profile is not None
+                and now - self._last_read < self.profile.interval):
+            return False
+        self.read()
+        self._last_read = now
+        return True
+
+    def read(self):
+        """Take a new sample."""
+        bmp280 = self.bmp280
+        self.pressure = bmp280.pressure
+        # The pressure read measured the temperature first for compensation
+        self.temperature = bmp280._t_fine / 5120.0
+        self.humidity = self.sht3x.relative_humidity
+
+    @property
+    def altitude(self):
+        """Altitude in meters from the sample's pressure."""
+        return pressure_altitude(self.pressure, self.reference_pressure)
+
+    def sea_level_pressure(self, altitude):
+        """The sample's pressure reduced to sea level, for a known altitude."""
+        return sea_level_pressure(self.pressure, altitude)
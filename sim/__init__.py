@@ -0,0 +1,27 @@
+"""
+CLUE Simulator
+==============
+
+Runs the firmware in this repository on a computer with CPython, unmodified.
+
+Fake versions of the CircuitPython modules the firmware imports (board,
+displayio, terminalio, keypad, alarm, microcontroller, supervisor, storage,
+digitalio, rtc, usb_cdc, adafruit_clue, adafruit_display_text) live in
+sim/circuitpython/ and read a virtual clock and scripted sensor traces.
+time.sleep() skips ahead instead of waiting, so days of simulated time take
+seconds:
+
+    python -m sim food_safety.py --scenario fridge --days 4 --quiet
+
+or from Python:
+
+    from sim import run, traces
+    simulation = run("food_safety.py", 2 * traces.DAY, traces.fridge(days=2), quiet=True)
+    print(simulation.screen())
+
+Nothing is drawn; Simulation.screen() lists the visible label text.
+"""
+
+from sim.clock import VirtualClock, SimulationEnd
+from sim.traces import Trace, Sensors
+from sim.runtime import Simulation, run
@@ -0,0 +1,77 @@
+"""
+Command-line simulator.
+
+    python -m sim code.py --hours 2 --press A@30 --press B@60:1.5
+    python -m sim food_safety.py --scenario excursion --days 2 --quiet
+"""
+
+import argparse
+import sys
+import time
+
+from sim import traces
+from sim.runtime import Simulation
+
+PIN_NAMES = {"A": "BUTTON_A", "B": "BUTTON_B"}
+
+
+def parse_press(text):
+    """'A@30' or 'B@60:1.5' -> ('BUTTON_B', 60.0, 1.5)."""
+    button, _, rest = text.partition("@")
+    at, _, held = rest.partition(":")
+    try:
+        return PIN_NAMES[button.upper()], float(at), float(held or 0.1)
+    except (KeyError, ValueError):
+        raise argparse.ArgumentTypeError("expected A@seconds[:held], got " + repr(text))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m sim", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("program", help="firmware file to run, e.g. code.py")
+    parser.add_argument("--boot", help="run this file first, e.g. boot.py")
+    length = parser.add_mutually_exclusive_group()
+    length.add_argument("--seconds", type=float)
+    length.add_argument("--hours", type=float)
+    length.add_argument("--days", type=float)
+    parser.add_argument("--scenario", choices=sorted(traces.SCENARIOS), default="room",
+                        help="sensor traces (default: room)")
+    parser.add_argument("--press", type=parse_press, action="append", default=[],
+                        metavar="A@SECONDS[:HELD]", help="press a button at a simulated time")
+    parser.add_argument("--read-only", action="store_true",
+                        help="CIRCUITPY read-only for code, as without boot.py")
+    parser.add_argument("--root", help="directory used as CIRCUITPY (default: temporary)")
+    parser.add_argument("--quiet", action="store_true", help="hide the firmware's serial output")
+    args = parser.parse_args(argv)
+
+    if args.seconds is not None:
+        duration = args.seconds
+    elif args.hours is not None:
+        duration = args.hours * traces.HOUR
+    elif args.days is not None:
+        duration = args.days * traces.DAY
+    else:
+        duration = traces.HOUR
+
+    simulation = Simulation(traces.SCENARIOS[args.scenario](), duration, args.press,
+                            root=args.root, writable=not args.read_only, quiet=args.quiet)
+    start = time.perf_counter()
+    with simulation:
+        simulation.run(args.program, args.boot)
+    wall = time.perf_counter() - start
+
+    simulated = simulation.clock.now
+    print("-" * 50)
+    print("Simulated {:.0f} s in {:.2f} s wall ({:.0f}x real time)".format(
+        simulated, wall, simulated / wall if wall else float("inf")))
+    print("Boots: {}  light sleeps: {}  deep sleeps: {}".format(
+        simulation.boots, simulation.light_sleeps, simulation.deep_sleeps))
+    print("Display refreshes: {}  label writes: {}".format(
+        simulation.refreshes, simulation.label_writes))
+    print("Screen: " + " | ".join(simulation.screen()))
+    if args.quiet and simulation.console.lines:
+        print("Last serial line: " + simulation.console.lines[-1])
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,306 @@
+"""Simulated `adafruit_clue`: sensors read the simulation's traces.
+
+The sensor objects mirror the driver attributes the firmware touches
+(clue._pressure is the BMP280, clue._humidity the SHT3x, clue._sensor the
+APDS9960). Simulated I2C transactions are counted per chip in
+Simulation.sensor_reads; like adafruit_bmp280, a pressure or altitude read
+also reads the temperature for compensation and leaves it in _t_fine.
+The BMP280 temperature includes the board's self-heating (sim/runtime.py).
+"""
+
+import math
+
+import board
+from sim import runtime
+
+
+_OVERSCANS = (0, 1, 2, 4, 8, 16)  # BMP280 samples per OVERSCAN_* setting
+
+
+def _read(name, chip, transactions=1):
+    simulation = runtime.current
+    simulation.sensor_reads[chip] += transactions
+    return simulation.sensors.read(name, simulation.clock.now)
+
+
+class _BMP280:
+    """Pressure and temperature sensor."""
+
+    def __init__(self):
+        self.sea_level_pressure = 1013.25
+        self.mode = 0x03  # MODE_NORMAL
+        self.overscan_pressure = 0x05  # OVERSCAN_X16
+        self.overscan_temperature = 0x02  # OVERSCAN_X2
+        self.iir_filter = 0x00  # IIR_FILTER_DISABLE
+        self.standby_period = 0x00  # STANDBY_TC_0_5
+        self._t_fine = None
+
+    @property
+    def temperature(self):
+        self._read_temperature()
+        return self._t_fine / 5120.0
+
+    @property
+    def pressure(self):
+        self._read_temperature()
+        return _read("pressure", "bmp280")
+
+    def _read_temperature(self):
+        temperature = _read("temperature", "bmp280") + runtime.current.heating_offset()
+        self._t_fine = temperature * 5120.0
+
+    @property
+    def altitude(self):
+        return 44330 * (1.0 - math.pow(self.pressure / self.sea_level_pressure, 0.1903))
+
+    @property
+    def measurement_time_typical(self):
+        """Milliseconds per forced-mode measurement (typical)."""
+        return self._measurement_time(1, 2, 0.5)
+
+    @property
+    def measurement_time_max(self):
+        """Milliseconds per forced-mode measurement (maximum)."""
+        return self._measurement_time(1.25, 2.3, 0.575)
+
+    def _measurement_time(self, base, per_sample, pressure_extra):
+        time_ms = base
+        if self.overscan_temperature:
+            time_ms += per_sample * _OVERSCANS[self.overscan_temperature]
+        if self.overscan_pressure:
+            time_ms += per_sample * _OVERSCANS[self.overscan_pressure] + pressure_extra
+        return time_ms
+
+
+class _SHT31D:
+    """Humidity and temperature sensor."""
+
+    def __init__(self):
+        self.heater = False
+        self.repeatability = "High"
+        self.mode = "Single"
+
+    @property
+    def relative_humidity(self):
+        return _read("humidity", "sht31d")
+
+    @property
+    def temperature(self):
+        return _read("temperature", "sht31d")
+
+
+class _APDS9960:
+    """Proximity, light, color and gesture sensor."""
+
+    def __init__(self):
+        self.enable_proximity = False
+        self.enable_color = False
+        self.enable_gesture = False
+        self.proximity_interrupt_threshold = (0, 0, 1)
+        self._interrupt = False
+
+    @property
+    def enable_proximity_interrupt(self):
+        return self._interrupt
+
+    @enable_proximity_interrupt.setter
+    def enable_proximity_interrupt(self, enable):
+        self._interrupt = enable
+        threshold = self.proximity_interrupt_threshold[1] if enable else None
+        runtime.current.proximity_threshold = threshold
+
+    def clear_interrupt(self):
+        pass
+
+    @property
+    def proximity(self):
+        return int(_read("proximity", "apds9960"))
+
+    @property
+    def color_data(self):
+        return tuple(int(v) for v in _read("color", "apds9960"))
+
+    @property
+    def color_data_ready(self):
+        return True
+
+    def gesture(self):
+        return 0
+
+
+class _Pixel:
+    """The single NeoPixel."""
+
+    def __init__(self):
+        self.brightness = 1.0
+        self.auto_write = True
+        self._color = (0, 0, 0)
+
+    def fill(self, color):
+        if isinstance(color, int):
+            color = ((color >> 16) & 0xFF, (color >> 8) & 0xFF, color & 0xFF)
+        self._color = tuple(color)
+
+    def __setitem__(self, index, color):
+        self.fill(color)
+
+    def __getitem__(self, index):
+        return self._color
+
+    def __len__(self):
+        return 1
+
+    def show(self):
+        pass
+
+    def deinit(self):
+        pass
+
+
+class _Button:
+    """Button pin as adafruit_clue holds it (a DigitalInOut with pull-up)."""
+
+    def __init__(self, pin):
+        self.pin = pin
+        self.released = False
+
+    @property
+    def value(self):
+        return not runtime.current.button_down(self.pin.name)
+
+    def deinit(self):
+        self.released = True
+
+
+class Clue:
+    """The Adafruit CLUE's on-board hardware."""
+
+    def __init__(self):
+        self._pressure = _BMP280()
+        self._humidity = _SHT31D()
+        self._sensor = _APDS9960()
+        self._a = _Button(board.BUTTON_A)
+        self._b = _Button(board.BUTTON_B)
+        self._white_leds = False
+        self._red_led = False
+        self._pixel = _Pixel()
+
+    @property
+    def temperature(self):
+        return self._pressure.temperature
+
+    @property
+    def pressure(self):
+        return self._pressure.pressure
+
+    @property
+    def altitude(self):
+        return self._pressure.altitude
+
+    @property
+    def sea_level_pressure(self):
+        return self._pressure.sea_level_pressure
+
+    @sea_level_pressure.setter
+    def sea_level_pressure(self, value):
+        self._pressure.sea_level_pressure = value
+
+    @property
+    def humidity(self):
+        return self._humidity.relative_humidity
+
+    @property
+    def proximity(self):
+        self._sensor.enable_proximity = True
+        return self._sensor.proximity
+
+    @property
+    def color(self):
+        self._sensor.enable_color = True
+        return self._sensor.color_data
+
+    @property
+    def gesture(self):
+        self._sensor.enable_gesture = True
+        return self._sensor.gesture()
+
+    @property
+    def acceleration(self):
+        return _read("acceleration", "lsm6ds")
+
+    @property
+    def gyro(self):
+        return _read("gyro", "lsm6ds")
+
+    @property
+    def magnetic(self):
+        return _read("magnetic", "lis3mdl")
+
+    @property
+    def sound_level(self):
+        return _read("sound_level", "microphone")
+
+    def loud_sound(self, sound_threshold=200):
+        return self.sound_level > sound_threshold
+
+    def shake(self, shake_threshold=30, avg_count=10, total_delay=0.1):
+        x, y, z = self.acceleration
+        return math.sqrt(x * x + y * y + z * z) > shake_threshold
+
+    @property
+    def button_a(self):
+        return not self._a.value
+
+    @property
+    def button_b(self):
+        return not self._b.value
+
+    @property
+    def were_pressed(self):
+        pressed = set()
+        if self.button_a:
+            pressed.add("A")
+        if self.button_b:
+            pressed.add("B")
+        return pressed
+
+    touch_0 = False
+    touch_1 = False
+    touch_2 = False
+
+    @property
+    def white_leds(self):
+        return self._white_leds
+
+    @white_leds.setter
+    def white_leds(self, value):
+        self._white_leds = value
+
+    @property
+    def red_led(self):
+        return self._red_led
+
+    @red_led.setter
+    def red_led(self, value):
+        self._red_led = value
+
+    @property
+    def pixel(self):
+        return self._pixel
+
+    @property
+    def display(self):
+        return board.DISPLAY
+
+    def play_tone(self, frequency, duration):
+        import time
+        time.sleep(duration)
+
+    def start_tone(self, frequency):
+        pass
+
+    def stop_tone(self):
+        pass
+
+
+clue = Clue()
@@ -0,0 +1,60 @@
+"""Simulated `adafruit_display_text.label`.
+
+Text and color writes are counted in Simulation.label_writes whether or not
+the value changed, like the real Label, which re-lays out its glyphs on every
+text assignment.
+"""
+
+from sim import runtime
+from displayio import Group
+
+
+class Label(Group):
+    """A line (or lines) of text in a bitmap font."""
+
+    def __init__(self, font, *, text="", color=0xFFFFFF, background_color=None,
+                 line_spacing=1.25, anchor_point=None, anchored_position=None,
+                 scale=1, x=0, y=0, padding_top=0, padding_bottom=0, padding_left=0,
+                 padding_right=0, **kwargs):
+        super().__init__(scale=scale, x=x, y=y)
+        self.font = font
+        self._text = text
+        self._color = color
+        self.background_color = background_color
+        self.line_spacing = line_spacing
+        self.anchor_point = anchor_point
+        self.anchored_position = anchored_position
+
+    @property
+    def text(self):
+        return self._text
+
+    @text.setter
+    def text(self, value):
+        runtime.current.label_writes += 1
+        self._text = str(value)
+
+    @property
+    def color(self):
+        return self._color
+
+    @color.setter
+    def color(self, value):
+        runtime.current.label_writes += 1
+        self._color = value
+
+    @property
+    def bounding_box(self):
+        """(x, y, width, height) of the unscaled text."""
+        glyph_width, glyph_height = self.font.get_bounding_box()
+        lines = self._text.split("\n")
+        width = glyph_width * max(len(line) for line in lines)
+        return (0, -glyph_height // 2, width, glyph_height * len(lines))
+
+    @property
+    def width(self):
+        return self.bounding_box[2]
+
+    @property
+    def height(self):
+        return self.bounding_box[3]
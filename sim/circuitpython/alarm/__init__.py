@@ -0,0 +1,17 @@
+"""Simulated `alarm`: light sleep skips ahead, deep sleep restarts the program."""
+
+from sim import runtime
+from alarm import pin, time
+
+sleep_memory = runtime.current.sleep_memory
+wake_alarm = runtime.current.wake_alarm
+
+
+def light_sleep_until_alarms(*alarms):
+    """Skip ahead to the first alarm and return it."""
+    return runtime.current.light_sleep(alarms)
+
+
+def exit_and_deep_sleep_until_alarms(*alarms, preserve_dios=()):
+    """End the program; it restarts when the first alarm fires."""
+    runtime.current.deep_sleep(alarms)
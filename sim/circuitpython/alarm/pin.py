@@ -0,0 +1,11 @@
+"""Simulated `alarm.pin`."""
+
+
+class PinAlarm:
+    """Fires when a pin reaches `value` (button presses, sensor interrupts)."""
+
+    def __init__(self, pin, value, edge=False, pull=False):
+        self.pin = pin
+        self.value = value
+        self.edge = edge
+        self.pull = pull
@@ -0,0 +1,13 @@
+"""Simulated `alarm.time`."""
+
+
+class TimeAlarm:
+    """Fires at a time.monotonic() value."""
+
+    def __init__(self, *, monotonic_time=None, epoch_time=None):
+        if (monotonic_time is None) == (epoch_time is None):
+            raise ValueError("give exactly one of monotonic_time and epoch_time")
+        if monotonic_time is None:
+            import time
+            monotonic_time = time.monotonic() + epoch_time - time.time()
+        self.monotonic_time = monotonic_time
@@ -0,0 +1,59 @@
+"""Simulated `board` for the Adafruit CLUE nRF52840."""
+
+from sim import runtime
+from displayio import Display
+
+
+class Pin:
+    """A named microcontroller pin."""
+
+    def __init__(self, name):
+        self.name = name
+
+    def __repr__(self):
+        return "board." + self.name
+
+
+_PINS = ("A0", "A1", "A2", "A3", "A4", "A5", "A6", "A7", "D0", "D1", "D2", "D3",
+         "D4", "D5", "D6", "D7", "D8", "D9", "D10", "D11", "D12", "D13", "D14",
+         "D15", "D16", "D17", "D18", "D19", "D20", "SCL", "SDA", "SCK", "MOSI",
+         "MISO", "TX", "RX", "BUTTON_A", "BUTTON_B", "NEOPIXEL", "SPEAKER",
+         "MICROPHONE_CLOCK", "MICROPHONE_DATA", "WHITE_LEDS", "PROXIMITY_LIGHT_INTERRUPT",
+         "ACCELEROMETER_GYRO_INTERRUPT", "TFT_BACKLIGHT", "TFT_CS", "TFT_DC", "TFT_RESET",
+         "TFT_SCK", "TFT_MOSI", "L")
+
+for _name in _PINS:
+    globals()[_name] = Pin(_name)
+LED = L
+
+board_id = "clue_nrf52840_express"
+
+
+class _I2C:
+    """Placeholder bus; the fake sensors do not talk to it."""
+
+    def try_lock(self):
+        return True
+
+    def unlock(self):
+        pass
+
+    def scan(self):
+        return [0x1C, 0x39, 0x44, 0x6A, 0x77]
+
+    def deinit(self):
+        pass
+
+
+_i2c = _I2C()
+
+
+def I2C():
+    """The board's shared I2C bus."""
+    return _i2c
+
+
+STEMMA_I2C = I2C
+
+DISPLAY = Display()
+runtime.current.display = DISPLAY
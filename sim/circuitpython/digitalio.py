@@ -0,0 +1,57 @@
+"""Simulated `digitalio`: button pins read the scripted presses."""
+
+from sim import runtime
+
+
+class Direction:
+    INPUT = "INPUT"
+    OUTPUT = "OUTPUT"
+
+
+class Pull:
+    UP = "UP"
+    DOWN = "DOWN"
+
+
+class DriveMode:
+    PUSH_PULL = "PUSH_PULL"
+    OPEN_DRAIN = "OPEN_DRAIN"
+
+
+class DigitalInOut:
+    """A digital pin; BUTTON_A/BUTTON_B read low while pressed."""
+
+    def __init__(self, pin):
+        self.pin = pin
+        self.direction = Direction.INPUT
+        self.pull = None
+        self.drive_mode = DriveMode.PUSH_PULL
+        self._value = False
+
+    def switch_to_input(self, pull=None):
+        self.direction = Direction.INPUT
+        self.pull = pull
+
+    def switch_to_output(self, value=False, drive_mode=DriveMode.PUSH_PULL):
+        self.direction = Direction.OUTPUT
+        self._value = value
+        self.drive_mode = drive_mode
+
+    @property
+    def value(self):
+        if self.direction == Direction.INPUT and self.pin.name in ("BUTTON_A", "BUTTON_B"):
+            return not runtime.current.button_down(self.pin.name)
+        return self._value
+
+    @value.setter
+    def value(self, value):
+        self._value = value
+
+    def deinit(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.deinit()
@@ -0,0 +1,217 @@
+"""Simulated `displayio`: groups, bitmaps, palettes, tile grids and the display.
+
+Only the object model is emulated; nothing is drawn. Display.refresh() is
+counted in Simulation.refreshes, and like the real library a layer can only
+be in one group at a time. With auto_refresh off and a target frame rate,
+refresh() waits for the next frame like the real one, and skips the frame
+(returning False) when the previous call was more than a frame ago.
+"""
+
+from sim import runtime
+
+
+class Group:
+    """Ordered collection of layers with a shared position and scale."""
+
+    def __init__(self, *, scale=1, x=0, y=0):
+        self.scale = scale
+        self.x = x
+        self.y = y
+        self.hidden = False
+        self._layers = []
+        self._in_group = False
+
+    def _claim(self, layer):
+        if getattr(layer, "_in_group", False):
+            raise ValueError("Layer already in a group")
+        layer._in_group = True
+
+    def append(self, layer):
+        self._claim(layer)
+        self._layers.append(layer)
+
+    def insert(self, index, layer):
+        self._claim(layer)
+        self._layers.insert(index, layer)
+
+    def pop(self, index=-1):
+        layer = self._layers.pop(index)
+        layer._in_group = False
+        return layer
+
+    def remove(self, layer):
+        self._layers.remove(layer)
+        layer._in_group = False
+
+    def index(self, layer):
+        return self._layers.index(layer)
+
+    def sort(self, key=None, reverse=False):
+        self._layers.sort(key=key, reverse=reverse)
+
+    def __len__(self):
+        return len(self._layers)
+
+    def __getitem__(self, index):
+        return self._layers[index]
+
+    def __setitem__(self, index, layer):
+        self._claim(layer)
+        self._layers[index]._in_group = False
+        self._layers[index] = layer
+
+    def __delitem__(self, index):
+        self.pop(index)
+
+    def __iter__(self):
+        return iter(list(self._layers))
+
+    def __contains__(self, layer):
+        return layer in self._layers
+
+
+class Bitmap:
+    """2D array of palette indices."""
+
+    def __init__(self, width, height, value_count):
+        if value_count < 1:
+            raise ValueError("value_count must be at least 1")
+        self.width = width
+        self.height = height
+        self.value_count = value_count
+        self._data = bytearray(width * height) if value_count <= 256 else [0] * (width * height)
+
+    def _index(self, index):
+        if isinstance(index, tuple):
+            x, y = index
+            return y * self.width + x
+        return index
+
+    def __getitem__(self, index):
+        return self._data[self._index(index)]
+
+    def __setitem__(self, index, value):
+        if not 0 <= value < self.value_count:
+            raise ValueError("value out of range")
+        self._data[self._index(index)] = value
+
+    def fill(self, value):
+        for i in range(len(self._data)):
+            self._data[i] = value
+
+
+class Palette:
+    """Colors for bitmap indices."""
+
+    def __init__(self, color_count, *, dither=False):
+        self._colors = [0] * color_count
+        self._transparent = [False] * color_count
+        self.dither = dither
+
+    def __len__(self):
+        return len(self._colors)
+
+    def __getitem__(self, index):
+        return self._colors[index]
+
+    def __setitem__(self, index, color):
+        if isinstance(color, (tuple, list)):
+            color = (color[0] << 16) | (color[1] << 8) | color[2]
+        self._colors[index] = color
+
+    def make_transparent(self, index):
+        self._transparent[index] = True
+
+    def make_opaque(self, index):
+        self._transparent[index] = False
+
+    def is_transparent(self, index):
+        return self._transparent[index]
+
+
+class TileGrid:
+    """A grid of bitmap tiles drawn with a pixel shader."""
+
+    def __init__(self, bitmap, *, pixel_shader, width=1, height=1, tile_width=None,
+                 tile_height=None, default_tile=0, x=0, y=0):
+        self.bitmap = bitmap
+        self.pixel_shader = pixel_shader
+        self.width = width
+        self.height = height
+        self.tile_width = bitmap.width if tile_width is None else tile_width
+        self.tile_height = bitmap.height if tile_height is None else tile_height
+        self.x = x
+        self.y = y
+        self.hidden = False
+        self.flip_x = False
+        self.flip_y = False
+        self.transpose_xy = False
+        self._tiles = [default_tile] * (width * height)
+        self._in_group = False
+
+    def __getitem__(self, index):
+        if isinstance(index, tuple):
+            index = index[1] * self.width + index[0]
+        return self._tiles[index]
+
+    def __setitem__(self, index, tile):
+        if isinstance(index, tuple):
+            index = index[1] * self.width + index[0]
+        self._tiles[index] = tile
+
+
+class Display:
+    """The CLUE's 240x240 ST7789 display."""
+
+    def __init__(self, width=240, height=240):
+        self.width = width
+        self.height = height
+        self.rotation = 0
+        self._brightness = 1.0
+        self._auto_refresh = True
+        self._first_manual_refresh = False
+        self._last_refresh = 0.0  # Clock time of the last frame drawn
+        self._last_refresh_call = 0.0
+        self.root_group = None
+
+    @property
+    def brightness(self):
+        return self._brightness
+
+    @brightness.setter
+    def brightness(self, value):
+        runtime.current.update_heating()  # The backlight warms the board
+        self._brightness = value
+
+    @property
+    def auto_refresh(self):
+        return self._auto_refresh
+
+    @auto_refresh.setter
+    def auto_refresh(self, value):
+        self._auto_refresh = value
+        self._first_manual_refresh = not value
+
+    def show(self, group):
+        self.root_group = group
+
+    def refresh(self, *, target_frames_per_second=None, minimum_frames_per_second=0):
+        clock = runtime.current.clock
+        if target_frames_per_second is not None and not self._first_manual_refresh:
+            frame = 1 / target_frames_per_second
+            since_frame = clock.now - self._last_refresh
+            if minimum_frames_per_second > 0 and since_frame > 1 / minimum_frames_per_second:
+                raise RuntimeError("Below minimum frame rate")
+            since_call = clock.now - self._last_refresh_call
+            self._last_refresh_call = clock.now
+            if since_call > frame:
+                return False  # Late: skip the frame to catch up
+            clock.advance_to(clock.now + frame - since_frame % frame)
+        self._first_manual_refresh = False
+        self._last_refresh = clock.now
+        runtime.current.refreshes += 1
+        return True
+
+
+def release_displays():
+    pass
@@ -0,0 +1,85 @@
+"""Simulated `keypad`: key events come from Simulation.press() scripts."""
+
+from sim import runtime
+
+
+class Event:
+    """A key transition."""
+
+    def __init__(self, key_number=0, pressed=True):
+        self.key_number = key_number
+        self.pressed = pressed
+        self.timestamp = 0
+
+    @property
+    def released(self):
+        return not self.pressed
+
+    def __eq__(self, other):
+        return (self.key_number, self.pressed) == (other.key_number, other.pressed)
+
+    def __repr__(self):
+        kind = "pressed" if self.pressed else "released"
+        return "<Event: key_number {} {}>".format(self.key_number, kind)
+
+
+class EventQueue:
+    """Transitions of the scripted presses, released as simulated time passes."""
+
+    def __init__(self, transitions):
+        self._transitions = transitions
+        self._next = 0
+        self.overflowed = False
+
+    def _due(self):
+        if self._next < len(self._transitions):
+            when = self._transitions[self._next][0]
+            return when <= runtime.current.clock.now
+        return False
+
+    def get_into(self, event):
+        if not self._due():
+            return False
+        when, key, pressed = self._transitions[self._next]
+        self._next += 1
+        event.key_number = key
+        event.pressed = pressed
+        event.timestamp = int(when * 1000) % (1 << 29)
+        return True
+
+    def get(self):
+        event = Event()
+        return event if self.get_into(event) else None
+
+    def clear(self):
+        while self._due():
+            self._next += 1
+
+    def __len__(self):
+        count = 0
+        now = runtime.current.clock.now
+        for when, _, _ in self._transitions[self._next:]:
+            if when > now:
+                break
+            count += 1
+        return count
+
+    def __bool__(self):
+        return self._due()
+
+
+class Keys:
+    """Individual keys, one per pin."""
+
+    def __init__(self, pins, *, value_when_pressed, pull=True, interval=0.02,
+                 max_events=64, debounce_threshold=1):
+        simulation = runtime.current
+        names = [pin.name for pin in pins]
+        self.key_count = len(names)
+        self.events = EventQueue(simulation.key_transitions(names, simulation.clock.now))
+
+    def reset(self):
+        pass
+
+    def deinit(self):
+        self.events = EventQueue([])
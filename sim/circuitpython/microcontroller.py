@@ -0,0 +1,30 @@
+"""Simulated `microcontroller`: nvm survives resets within one simulation."""
+
+from sim import runtime
+
+nvm = runtime.current.nvm
+
+
+class _Processor:
+    frequency = 64000000
+    uid = bytes(8)
+    voltage = 3.3
+
+    @property
+    def temperature(self):
+        simulation = runtime.current
+        return simulation.sensors.read("temperature", simulation.clock.now) + 2.0
+
+
+cpu = _Processor()
+cpus = (cpu,)
+
+
+def reset():
+    """Restart the program (nvm, sleep memory and files are kept)."""
+    raise runtime.Reset()
+
+
+def delay_us(delay):
+    import time
+    time.sleep(delay / 1000000)
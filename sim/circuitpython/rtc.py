@@ -0,0 +1,21 @@
+"""Simulated `rtc`: the real-time clock follows the virtual clock."""
+
+import time
+
+
+class RTC:
+    """The board's real-time clock."""
+
+    @property
+    def datetime(self):
+        return time.localtime()
+
+    @datetime.setter
+    def datetime(self, value):
+        pass
+
+    calibration = 0
+
+
+def set_time_source(source):
+    pass
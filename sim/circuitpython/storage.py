@@ -0,0 +1,26 @@
+"""Simulated `storage`: remount() decides whether code may write to CIRCUITPY."""
+
+from sim import runtime
+
+
+class _Mount:
+    @property
+    def readonly(self):
+        return not runtime.current.writable
+
+
+def remount(mount_path, readonly=False, *, disable_concurrent_write_protection=False):
+    """readonly=False lets code write (and the host computer only read)."""
+    runtime.current.writable = not readonly
+
+
+def getmount(mount_path):
+    return _Mount()
+
+
+def disable_usb_drive():
+    pass
+
+
+def enable_usb_drive():
+    pass
@@ -0,0 +1,23 @@
+"""Simulated `supervisor`."""
+
+from sim import runtime as _sim
+
+
+def ticks_ms():
+    """Milliseconds of simulated time, wrapping at 2**29."""
+    return _sim.current.clock.ticks_ms()
+
+
+class _Runtime:
+    serial_connected = True
+    usb_connected = True
+    serial_bytes_available = 0
+    autoreload = True
+
+
+runtime = _Runtime()
+
+
+def reload():
+    """Restart the program."""
+    raise _sim.Reset()
@@ -0,0 +1,26 @@
+"""Simulated `terminalio` with the built-in 6x12 font."""
+
+
+class _Glyph:
+    def __init__(self, codepoint):
+        self.bitmap = None
+        self.tile_index = codepoint
+        self.width = 6
+        self.height = 12
+        self.dx = 0
+        self.dy = 0
+        self.shift_x = 6
+        self.shift_y = 0
+
+
+class _BuiltinFont:
+    """Fixed-width font: every glyph is 6x12 pixels."""
+
+    def get_bounding_box(self):
+        return (6, 12)
+
+    def get_glyph(self, codepoint):
+        return _Glyph(codepoint)
+
+
+FONT = _BuiltinFont()
@@ -0,0 +1,32 @@
+"""Simulated `usb_cdc`: bytes written to the data port are kept in Simulation.usb_data."""
+
+from sim import runtime
+
+
+class _Serial:
+    connected = True
+
+    def write(self, data):
+        runtime.current.usb_data += data
+        return len(data)
+
+    def read(self, size=1):
+        return b""
+
+    def flush(self):
+        pass
+
+
+console = _Serial()
+_data = _Serial()
+
+
+def enable(*, console=True, data=False):
+    """Only valid in boot.py on a CLUE; here it takes effect at once."""
+    runtime.current.usb_data_enabled = data
+
+
+def __getattr__(name):
+    if name == "data":
+        return _data if runtime.current.usb_data_enabled else None
+    raise AttributeError(name)
@@ -0,0 +1,79 @@
+"""
+Virtual Clock
+=============
+
+Simulated time for running firmware on a computer.
+
+time.sleep() advances the clock instantly instead of waiting, so a main loop
+that sleeps 2 seconds per tick runs as fast as its Python code allows. Every
+clock read (monotonic, monotonic_ns, time, supervisor.ticks_ms) is derived
+from one value, `now`, in seconds since the simulation started.
+
+time.monotonic() restarts from zero after a simulated deep sleep, like the
+real board, while `now` keeps counting.
+"""
+
+import time as _time
+
+EPOCH = 1761955200  # 2025-11-01 00:00:00 UTC, value of time.time() at now == 0
+TICKS_PERIOD = 1 << 29  # supervisor.ticks_ms() wraps at 2**29
+
+
+class SimulationEnd(BaseException):
+    """Raised by sleep() once the clock reaches the simulation's end.
+
+    Derived from BaseException so firmware `except Exception` blocks do not
+    swallow it.
+    """
+
+
+class VirtualClock:
+    """Simulated time that only moves when the firmware sleeps."""
+
+    def __init__(self, end=None, epoch=EPOCH):
+        self.now = 0.0
+        self.end = end  # Seconds; sleep() raises SimulationEnd past this
+        self.epoch = epoch
+        self.boot = 0.0  # Value of `now` when the board last started
+        self.slept = 0.0  # Total simulated seconds spent in sleep()
+        self.sleeps = 0
+
+    def monotonic(self):
+        """Seconds since the board started (time.monotonic)."""
+        return self.now - self.boot
+
+    def monotonic_ns(self):
+        """Nanoseconds since the board started (time.monotonic_ns)."""
+        return int((self.now - self.boot) * 1000000000)
+
+    def time(self):
+        """Seconds since the Unix epoch (time.time)."""
+        return int(self.epoch + self.now)
+
+    def localtime(self, secs=None):
+        """struct_time for `secs`, or for the simulated wall clock."""
+        return _time.gmtime(self.time() if secs is None else secs)
+
+    def ticks_ms(self):
+        """Wrapping millisecond counter (supervisor.ticks_ms)."""
+        return int(self.now * 1000) % TICKS_PERIOD
+
+    def advance_to(self, when):
+        """Move the clock forward to `when`, stopping at the end."""
+        if self.end is not None and when >= self.end:
+            self.now = max(self.now, self.end)
+            raise SimulationEnd()
+        if when > self.now:
+            self.now = when
+
+    def sleep(self, seconds):
+        """Skip ahead `seconds` instead of waiting (time.sleep)."""
+        if seconds < 0:
+            raise ValueError("sleep length must be non-negative")
+        self.sleeps += 1
+        self.slept += seconds
+        self.advance_to(self.now + seconds)
+
+    def restart(self):
+        """Start a new boot: monotonic() counts from zero again."""
+        self.boot = self.now
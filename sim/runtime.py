@@ -0,0 +1,477 @@
+"""
+Simulation Runtime
+==================
+
+Runs unmodified firmware files under CPython against fake CircuitPython
+modules (sim/circuitpython/), a virtual clock and scripted sensor traces.
+
+Simulation.install() puts the fake modules first on sys.path and points
+time.monotonic, time.monotonic_ns, time.sleep, time.time and time.localtime
+at the virtual clock. Simulation.run() executes a file as __main__ until the
+clock reaches `duration`, restarting it after a simulated deep sleep or
+reset with nvm, sleep memory and files kept, like the real board.
+
+Files opened at the top level of CIRCUITPY (e.g. "/env_log.bin") are mapped
+into `root`, a scratch directory by default, and writes fail with EROFS
+while the drive is read-only for code (see boot.py and storage.remount).
+
+The board warms its own BMP280. Temperature traces are raw readings with the
+display on and the CPU awake, as the board is calibrated; the fake BMP280
+adds the difference between the board's self-heating now and that, so a
+dark display and sleeping CPU read colder (self_heating=False turns this
+off). The heating follows the display brightness and light or deep sleep
+with the board's time constant, using the figures thermal.py assumes.
+"""
+
+import builtins
+import collections
+import errno
+import importlib.machinery
+import io
+import math
+import os
+import shutil
+import sys
+import tempfile
+import time
+import types
+
+from sim.clock import VirtualClock, SimulationEnd
+from sim.traces import Sensors
+
+SIM_DIR = os.path.dirname(os.path.abspath(__file__))
+MODULES_DIR = os.path.join(SIM_DIR, "circuitpython")
+
+NVM_SIZE = 8192  # microcontroller.nvm on the nRF52840
+SLEEP_MEMORY_SIZE = 256  # alarm.sleep_memory on the nRF52840
+PROXIMITY_STEP = 0.25  # Seconds between proximity checks while asleep
+
+# Self-heating of the BMP280 in degrees C (as in thermal.py)
+HEATING_IDLE = 0.5  # Board powered, CPU asleep, display dark
+HEATING_DISPLAY = 2.6  # Extra at full display brightness
+HEATING_AWAKE = 0.4  # Extra while the CPU is awake
+HEATING_CALIBRATED = HEATING_IDLE + HEATING_DISPLAY + HEATING_AWAKE  # Included in the traces
+HEATING_TIME_CONSTANT = 600.0  # Seconds for the board to settle after a change
+
+AWAKE, LIGHT_SLEEP, DEEP_SLEEP = "awake", "light sleep", "deep sleep"
+
+current = None  # The installed Simulation; the fake modules read it
+
+
+class DeepSleep(BaseException):
+    """Raised by alarm.exit_and_deep_sleep_until_alarms() to restart the program."""
+
+    def __init__(self, wake_time, wake_alarm):
+        super().__init__(wake_time, wake_alarm)
+        self.wake_time = wake_time
+        self.wake_alarm = wake_alarm
+
+
+class Reset(BaseException):
+    """Raised by microcontroller.reset() and supervisor.reload()."""
+
+
+class _CachedLoader(importlib.machinery.SourceFileLoader):
+    """Source loader that compiles each file once per simulation.
+
+    A deep sleep reloads every firmware module; without the cache a
+    multi-day deep-sleep run spends most of its time compiling.
+    """
+
+    def __init__(self, fullname, path, cache):
+        super().__init__(fullname, path)
+        self._cache = cache
+
+    def get_code(self, fullname):
+        path = self.get_filename(fullname)
+        code = self._cache.get(path)
+        if code is None:
+            code = self._cache[path] = super().get_code(fullname)
+        return code
+
+
+class _CodeCacheFinder:
+    """Meta path finder that gives fake and firmware modules a _CachedLoader."""
+
+    def __init__(self, simulation):
+        self.simulation = simulation
+
+    def find_spec(self, fullname, path=None, target=None):
+        spec = importlib.machinery.PathFinder.find_spec(fullname, path)
+        if (spec is not None and isinstance(spec.loader, importlib.machinery.SourceFileLoader)
+                and self.simulation.is_code(spec.origin)):
+            spec.loader = _CachedLoader(fullname, spec.origin, self.simulation._code)
+        return spec
+
+
+class _Console(io.TextIOBase):
+    """stdout replacement that keeps the last lines printed by the firmware."""
+
+    def __init__(self, lines, echo):
+        self.lines = collections.deque(maxlen=lines)
+        self.echo = echo
+        self._partial = ""
+
+    def writable(self):
+        return True
+
+    def write(self, text):
+        if self.echo is not None:
+            self.echo.write(text)
+        *complete, self._partial = (self._partial + text).split("\n")
+        self.lines.extend(complete)
+        return len(text)
+
+
+class Simulation:
+    """One simulated CLUE: clock, sensors, buttons, storage and run loop."""
+
+    def __init__(self, sensors=None, duration=None, presses=(), root=None,
+                 writable=True, quiet=False, boot_time=0.0, console_lines=200,
+                 self_heating=True):
+        self.clock = VirtualClock(duration)
+        self.sensors = sensors if sensors is not None else Sensors()
+        self.presses = []  # (time, pin name, seconds held)
+        for press in presses:
+            self.press(*press)
+        self._own_root = root is None
+        self.root = tempfile.mkdtemp(prefix="circuitpy-") if root is None else root
+        self.writable = writable
+        self.quiet = quiet
+        self.boot_time = boot_time
+        self.console = _Console(console_lines, None)
+
+        self.nvm = bytearray(NVM_SIZE)
+        self.sleep_memory = bytearray(SLEEP_MEMORY_SIZE)
+        self.wake_alarm = None
+        self.display = None  # board.DISPLAY of the current boot
+        self.proximity_threshold = None  # Set by the fake APDS9960 interrupt setup
+        self.usb_data_enabled = False  # usb_cdc.enable(data=True) in boot.py
+        self.usb_data = bytearray()  # Written to usb_cdc.data (telemetry.py frames)
+
+        self.boots = 0
+        self.deep_sleeps = 0
+        self.light_sleeps = 0
+        self.refreshes = 0
+        self.label_writes = 0
+        self.sensor_reads = collections.Counter()  # I2C transactions per chip
+
+        self.self_heating = self_heating
+        self.activity = AWAKE
+        self.heating = HEATING_CALIBRATED  # Board settled as when calibrated
+        self._heating_time = 0.0
+
+        self._saved = None
+        self._code_dirs = [MODULES_DIR]  # Modules from here are reloaded on restart
+        self._code = {}  # Compiled code objects by file path
+        self._finder = _CodeCacheFinder(self)
+
+    # ---- Buttons ----------------------------------------------------------
+
+    def press(self, pin, at, seconds=0.1):
+        """Press `pin` (e.g. "BUTTON_A") at simulated time `at` for `seconds`."""
+        self.presses.append((float(at), pin, float(seconds)))
+        self.presses.sort()
+
+    def button_down(self, pin, t=None):
+        """True while `pin` is held down at time `t` (default now)."""
+        if t is None:
+            t = self.clock.now
+        return any(name == pin and at <= t < at + held for at, name, held in self.presses)
+
+    def key_transitions(self, pins, since):
+        """(time, key number, pressed) for every press of `pins` after `since`."""
+        transitions = []
+        for at, name, held in self.presses:
+            if name in pins and at >= since:
+                key = pins.index(name)
+                transitions.append((at, key, True))
+                transitions.append((at + held, key, False))
+        transitions.sort()
+        return transitions
+
+    # ---- Sleep and alarms --------------------------------------------------
+
+    def _pin_wake(self, pin, start, limit):
+        """Earliest time in (start, limit] a pin alarm on `pin` fires, or None."""
+        if pin == "PROXIMITY_LIGHT_INTERRUPT":
+            if self.proximity_threshold is None:
+                return None
+            t = start + PROXIMITY_STEP
+            while t <= limit:
+                if self.sensors.read("proximity", t) >= self.proximity_threshold:
+                    return t
+                t += PROXIMITY_STEP
+            return None
+        for at, name, _ in self.presses:
+            if name == pin and start < at <= limit:
+                return at
+        return None
+
+    def next_alarm(self, alarms):
+        """(time, alarm) for whichever alarm fires first."""
+        now = self.clock.now
+        limit = self.clock.end if self.clock.end is not None else float("inf")
+        best = (limit, None)
+        for wake in alarms:
+            monotonic_time = getattr(wake, "monotonic_time", None)
+            if monotonic_time is not None:
+                when = max(now, self.clock.boot + monotonic_time)
+            else:
+                when = self._pin_wake(wake.pin.name, now, min(limit, best[0]))
+            if when is not None and when < best[0]:
+                best = (when, wake)
+        if best[1] is None and best[0] == float("inf"):
+            raise RuntimeError("sleeping with no alarm that can fire")
+        return best
+
+    def light_sleep(self, alarms):
+        """alarm.light_sleep_until_alarms(): skip ahead to the first alarm."""
+        self.light_sleeps += 1
+        when, wake = self.next_alarm(alarms)
+        self.set_activity(LIGHT_SLEEP)
+        try:
+            self.clock.advance_to(when)
+        finally:
+            self.set_activity(AWAKE)
+        return wake
+
+    def deep_sleep(self, alarms):
+        """alarm.exit_and_deep_sleep_until_alarms(): restart at the first alarm."""
+        self.deep_sleeps += 1
+        when, wake = self.next_alarm(alarms)
+        raise DeepSleep(when, wake)
+
+    # ---- Self-heating -------------------------------------------------------
+
+    def update_heating(self):
+        """Bring the board's self-heating up to now; call before any change."""
+        now = self.clock.now
+        elapsed = now - self._heating_time
+        self._heating_time = now
+        if elapsed <= 0:
+            return
+        steady = HEATING_IDLE
+        if self.activity != DEEP_SLEEP and self.display is not None:
+            steady += HEATING_DISPLAY * self.display.brightness
+        if self.activity == AWAKE:
+            steady += HEATING_AWAKE
+        self.heating = steady + (self.heating - steady) * math.exp(-elapsed / HEATING_TIME_CONSTANT)
+
+    def set_activity(self, activity):
+        """The CPU goes to sleep or wakes (AWAKE, LIGHT_SLEEP or DEEP_SLEEP)."""
+        self.update_heating()
+        self.activity = activity
+
+    def heating_offset(self):
+        """Degrees C the BMP280 reads above its trace (negative when cooler)."""
+        if not self.self_heating:
+            return 0.0
+        self.update_heating()
+        return self.heating - HEATING_CALIBRATED
+
+    # ---- Filesystem ---------------------------------------------------------
+
+    def circuitpy_path(self, path):
+        """Host path for a top-level CIRCUITPY path, or None if not one."""
+        if not isinstance(path, str) or not path.startswith("/"):
+            return None
+        name = path[1:]
+        if not name or "/" in name:
+            return None
+        return os.path.join(self.root, name)
+
+    def _check_writable(self, path):
+        if not self.writable:
+            raise OSError(errno.EROFS, "Read-only filesystem", path)
+
+    def _patch_files(self):
+        """Wrap open() and a few os functions to use the CIRCUITPY root."""
+        real_open, real_stat = builtins.open, os.stat
+        real_remove, real_rename, real_listdir = os.remove, os.rename, os.listdir
+        mapped = self.circuitpy_path
+
+        def sim_open(file, mode="r", *args, **kwargs):
+            host = mapped(file)
+            if host is not None:
+                if any(flag in mode for flag in "wax+"):
+                    self._check_writable(file)
+                file = host
+            return real_open(file, mode, *args, **kwargs)
+
+        def sim_stat(path, *args, **kwargs):
+            host = mapped(path)
+            return real_stat(host if host is not None else path, *args, **kwargs)
+
+        def sim_remove(path, *args, **kwargs):
+            host = mapped(path)
+            if host is not None:
+                self._check_writable(path)
+                path = host
+            return real_remove(path, *args, **kwargs)
+
+        def sim_rename(src, dst, *args, **kwargs):
+            host_src, host_dst = mapped(src), mapped(dst)
+            if host_src is not None or host_dst is not None:
+                self._check_writable(src)
+            return real_rename(host_src or src, host_dst or dst, *args, **kwargs)
+
+        def sim_listdir(path="."):
+            if path == "/":
+                return real_listdir(self.root)
+            return real_listdir(path)
+
+        builtins.open, os.stat = sim_open, sim_stat
+        os.remove, os.rename, os.listdir = sim_remove, sim_rename, sim_listdir
+        return (real_open, real_stat, real_remove, real_rename, real_listdir)
+
+    # ---- Install / run ------------------------------------------------------
+
+    def install(self):
+        """Activate the fake modules, virtual clock and CIRCUITPY mapping."""
+        global current
+        if current is not None:
+            raise RuntimeError("another simulation is installed")
+        current = self
+        clock = self.clock
+        self._saved = (time.monotonic, time.monotonic_ns, time.sleep, time.time,
+                       time.localtime, sys.stdout, list(sys.path), self._patch_files())
+        time.monotonic = clock.monotonic
+        time.monotonic_ns = clock.monotonic_ns
+        time.sleep = clock.sleep
+        time.time = clock.time
+        time.localtime = clock.localtime
+        self.console.echo = None if self.quiet else sys.stdout
+        sys.stdout = self.console
+        sys.path.insert(0, MODULES_DIR)
+        sys.meta_path.insert(0, self._finder)
+        return self
+
+    def uninstall(self):
+        """Restore the real time functions, open() and sys.path."""
+        global current
+        if current is not self:
+            return
+        (time.monotonic, time.monotonic_ns, time.sleep, time.time, time.localtime,
+         sys.stdout, sys.path[:], files) = self._saved
+        builtins.open, os.stat, os.remove, os.rename, os.listdir = files
+        sys.meta_path.remove(self._finder)
+        self._forget_modules()
+        current = None
+        if self._own_root:
+            shutil.rmtree(self.root, ignore_errors=True)
+
+    def __enter__(self):
+        return self.install()
+
+    def __exit__(self, *exc):
+        self.uninstall()
+
+    def is_code(self, path):
+        """True for files under the fake module or firmware directories."""
+        if not path:
+            return False
+        if path.startswith(SIM_DIR + os.sep) and not path.startswith(MODULES_DIR + os.sep):
+            return False  # The simulator itself (firmware next to sim/)
+        return any(path.startswith(directory + os.sep) for directory in self._code_dirs)
+
+    def _forget_modules(self):
+        """Unload the fake and firmware modules (RAM is lost on restart)."""
+        for name, module in list(sys.modules.items()):
+            if self.is_code(getattr(module, "__file__", None)):
+                del sys.modules[name]
+
+    def _compile(self, path):
+        """Code object for a firmware file (compiled once, like the cached imports)."""
+        code = self._code.get(path)
+        if code is None:
+            with io.open_code(path) as source:
+                code = self._code[path] = compile(source.read(), path, "exec")
+        return code
+
+    def _add_firmware_dir(self, path):
+        """Let the file at `path` import its sibling modules."""
+        directory = os.path.dirname(path)
+        if directory not in self._code_dirs:
+            self._code_dirs.append(directory)
+        if directory not in sys.path:
+            sys.path.insert(1, directory)
+        return directory
+
+    def _exec(self, path):
+        """Run one file as __main__."""
+        path = os.path.abspath(path)
+        exec(self._compile(path), {"__name__": "__main__", "__file__": path,
+                                   "__builtins__": builtins})
+
+    def load(self, path):
+        """Import firmware file `path` as a module; its __main__ block does not run.
+
+        The module is not added to sys.modules, so code.py does not replace
+        the standard library's `code` module.
+        """
+        path = os.path.abspath(path)
+        self._add_firmware_dir(path)
+        module = types.ModuleType(os.path.splitext(os.path.basename(path))[0])
+        module.__file__ = path
+        exec(self._compile(path), module.__dict__)
+        return module
+
+    def run(self, path, boot=None):
+        """Run firmware file `path` (after `boot`, e.g. boot.py) until the end.
+
+        Returns when the clock reaches `duration` or the program finishes.
+        """
+        self._add_firmware_dir(os.path.abspath(path))
+        try:
+            while True:
+                self.boots += 1
+                self.display = None
+                try:
+                    if boot is not None:
+                        self._exec(boot)
+                    self._exec(path)
+                    return self  # Program finished ("Code done running")
+                except DeepSleep as sleep:
+                    self._forget_modules()
+                    self.set_activity(DEEP_SLEEP)
+                    self.clock.advance_to(sleep.wake_time)
+                    self.set_activity(AWAKE)
+                    self.clock.advance_to(sleep.wake_time + self.boot_time)
+                    self.clock.restart()
+                    self.wake_alarm = sleep.wake_alarm
+                except Reset:
+                    self._forget_modules()
+                    self.clock.advance_to(self.clock.now + self.boot_time)
+                    self.clock.restart()
+                    self.wake_alarm = None
+        except SimulationEnd:
+            return self
+
+    # ---- Inspection ---------------------------------------------------------
+
+    def screen(self):
+        """Text of every visible label on the display, top to bottom."""
+        found = []
+
+        def walk(group, hidden):
+            for item in group:
+                if hidden or getattr(item, "hidden", False):
+                    continue
+                if hasattr(item, "text"):
+                    if item.text:
+                        found.append((item.y, item.x, item.text))
+                elif hasattr(item, "__iter__"):
+                    walk(item, hidden)
+
+        if self.display is not None and self.display.root_group is not None:
+            walk(self.display.root_group, False)
+        return [text for _, _, text in sorted(found, key=lambda entry: entry[:2])]
+
+
+def run(path, duration, sensors=None, presses=(), boot=None, **options):
+    """Run `path` for `duration` simulated seconds and return the Simulation."""
+    simulation = Simulation(sensors, duration, presses, **options)
+    with simulation:
+        simulation.run(path, boot)
+    return simulation
@@ -0,0 +1,186 @@
+"""
+Sensor Traces
+=============
+
+Scripted sensor readings for the simulator.
+
+A trace maps simulated time (seconds) to a value. Traces are piecewise
+linear between (time, value) points, with optional Gaussian noise from a
+seeded generator so every run is reproducible. Sensors bundles one trace (or
+constant) per CLUE sensor; the fake adafruit_clue reads it at the current
+simulated time.
+
+Values are raw sensor readings, before the firmware's calibration offsets
+(TEMP_OFFSET = -3.5 means a raw 5.5C reads as 2.0C in food_safety.py).
+Temperatures are read with the display on and the CPU awake; the fake BMP280
+adds the change in self-heating when they are not (see sim/runtime.py).
+"""
+
+import math
+import random
+
+MINUTE = 60
+HOUR = 3600
+DAY = 86400
+
+
+class Trace:
+    """Piecewise-linear signal over simulated time."""
+
+    def __init__(self, points, noise=0.0, seed=0):
+        if not points:
+            raise ValueError("a trace needs at least one point")
+        self.times = [float(t) for t, _ in points]
+        self.values = [float(v) for _, v in points]
+        if any(b < a for a, b in zip(self.times, self.times[1:])):
+            raise ValueError("trace times must be in order")
+        self.noise = noise
+        self._random = random.Random(seed)
+        self._index = 0  # Segment of the last lookup (time mostly moves forward)
+
+    def at(self, t):
+        """Noise-free value at time `t`."""
+        times = self.times
+        if t <= times[0]:
+            return self.values[0]
+        if t >= times[-1]:
+            return self.values[-1]
+        i = self._index
+        if not times[i] <= t:
+            i = 0
+        while times[i + 1] < t:
+            i += 1
+        self._index = i
+        t0, t1 = times[i], times[i + 1]
+        v0, v1 = self.values[i], self.values[i + 1]
+        if t1 == t0:
+            return v1
+        return v0 + (v1 - v0) * (t - t0) / (t1 - t0)
+
+    def __call__(self, t):
+        """Value at time `t`, with noise."""
+        value = self.at(t)
+        if self.noise:
+            value += self._random.gauss(0.0, self.noise)
+        return value
+
+
+def constant(value, noise=0.0, seed=0):
+    """A trace that stays at `value`."""
+    return Trace(((0, value),), noise, seed)
+
+
+def approach(start, target, time_constant, t0=0.0, duration=None, step=None):
+    """(time, value) points for an exponential approach from start to target.
+
+    Models a thermal mass settling to a new ambient temperature.
+    """
+    if duration is None:
+        duration = 5 * time_constant
+    if step is None:
+        step = time_constant / 4
+    points = []
+    t = 0.0
+    while t < duration:
+        points.append((t0 + t, target + (start - target) * math.exp(-t / time_constant)))
+        t += step
+    points.append((t0 + duration, target + (start - target) * math.exp(-duration / time_constant)))
+    return points
+
+
+class Sensors:
+    """Readings for every CLUE sensor as traces or constants."""
+
+    def __init__(self, temperature=24.5, humidity=38.1, pressure=1013.25,
+                 proximity=0, light=120, color=(40, 40, 40, 120),
+                 acceleration=(0.0, 0.0, 9.81), gyro=(0.0, 0.0, 0.0),
+                 magnetic=(20.0, 0.0, -40.0), sound_level=50.0):
+        self.temperature = temperature
+        self.humidity = humidity
+        self.pressure = pressure
+        self.proximity = proximity
+        self.light = light
+        self.color = color
+        self.acceleration = acceleration
+        self.gyro = gyro
+        self.magnetic = magnetic
+        self.sound_level = sound_level
+
+    def read(self, name, t):
+        """Value of sensor `name` at time `t`."""
+        source = getattr(self, name)
+        if callable(source):
+            return source(t)
+        return source
+
+
+def room(temperature=24.5, humidity=38.1, pressure=1013.25, seed=0):
+    """A desk at room temperature with small sensor noise."""
+    return Sensors(temperature=constant(temperature, 0.05, seed),
+                   humidity=constant(humidity, 0.2, seed + 1),
+                   pressure=constant(pressure, 0.05, seed + 2))
+
+
+def weather_front(days=2, drop=12.0, seed=0):
+    """Room conditions while a low-pressure front passes (pressure dip)."""
+    end = days * DAY
+    pressure = Trace(((0, 1018.0), (end * 0.4, 1018.0 - drop),
+                      (end * 0.7, 1018.0 - drop), (end, 1012.0)), 0.05, seed + 2)
+    humidity = Trace(((0, 35.0), (end * 0.5, 65.0), (end, 45.0)), 0.2, seed + 1)
+    return Sensors(temperature=constant(24.5, 0.05, seed), humidity=humidity,
+                   pressure=pressure)
+
+
+def fridge(days=4, fridge_temp=5.5, room_temp=25.5, placed_at=10 * MINUTE,
+           door_openings=(), excursion=None, removed=True, seed=0):
+    """Leftovers placed in a fridge, with optional door openings and a spoiling excursion.
+
+    door_openings: (time, seconds open) pairs; the container warms a little.
+    excursion: (time, duration, temperature) the fridge runs warm (e.g. a
+        power cut), or None.
+    removed: take the container out and let it reach room temperature at the end.
+    Temperatures are raw readings (the firmware subtracts 3.5C).
+    """
+    end = days * DAY
+    points = [(0, room_temp)]
+    points += approach(room_temp, fridge_temp, 20 * MINUTE, placed_at)
+
+    events = [(t, "door", seconds) for t, seconds in door_openings]
+    if excursion is not None:
+        events.append((excursion[0], "warm", excursion[1:]))
+    for t, kind, detail in sorted(events):
+        if t <= points[-1][0]:
+            continue
+        points.append((t, fridge_temp))
+        if kind == "door":
+            peak = fridge_temp + min(4.0, detail / 30.0)
+            points.append((t + detail, peak))
+            points += approach(peak, fridge_temp, 10 * MINUTE, t + detail, 40 * MINUTE)
+        else:
+            length, warm_temp = detail
+            points += approach(fridge_temp, warm_temp, 30 * MINUTE, t, length)
+            warm = points[-1][1]
+            points += approach(warm, fridge_temp, 20 * MINUTE, t + length)
+
+    if removed and end - 2 * HOUR > points[-1][0]:
+        points.append((end - 2 * HOUR, fridge_temp))
+        points += approach(fridge_temp, room_temp, 20 * MINUTE, end - 2 * HOUR, 2 * HOUR)
+
+    return Sensors(temperature=Trace(points, 0.05, seed),
+                   humidity=constant(45.0, 0.5, seed + 1),
+                   pressure=constant(1013.25, 0.05, seed + 2))
+
+
+def daily_door_openings(days, per_day=6, seconds=20, first=8 * HOUR, spacing=2 * HOUR):
+    """Regular door openings: `per_day` times a day from `first` o'clock."""
+    return tuple((day * DAY + first + i * spacing, seconds)
+                 for day in range(days) for i in range(per_day))
+
+
+SCENARIOS = {
+    "room": room,
+    "weather": weather_front,
+    "fridge": lambda: fridge(door_openings=daily_door_openings(4)),
+    "excursion": lambda: fridge(days=2, door_openings=daily_door_openings(2),
+                                excursion=(DAY, 4 * HOUR, 14.0)),
+}
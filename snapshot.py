@@ -0,0 +1,88 @@
+"""
+Crash-Safe State Snapshots
+==========================
+
+Double-buffered, checksummed snapshots of a small fixed-format record in
+nonvolatile memory (microcontroller.nvm by default).
+
+Two slots are written alternately, each with a sequence number and a
+checksum, so a reset or brown-out in the middle of a write always leaves
+the previous snapshot intact. load() returns the newest valid slot.
+
+By default the record owns all of `storage` from `offset`; pass `length`
+to share the storage with other records (e.g. in alarm.sleep_memory).
+Pass slots=1 for RAM such as alarm.sleep_memory, which a reset does not
+keep anyway, to halve the space it takes.
+
+The slots are placed in different halves of nvm, which on the nRF52840
+are separate flash pages, to spread erase wear. Every save to nvm erases a
+page, and internal flash is rated for about 10,000 erase cycles per page:
+saving every 5 minutes wears it out in about 70 days. Save on changes plus
+a heartbeat of hours (food_safety.py budgets about 20 saves a day).
+alarm.sleep_memory is RAM and has no such limit.
+"""
+
+import struct
+
+from datalog import checksum16
+
+TRAILER_FORMAT = "<IH"  # Sequence number, checksum
+
+
+class Snapshot:
+    """Snapshot of one struct-formatted record in two (or one) slots."""
+
+    def __init__(self, payload_format, storage=None, offset=0, length=None, slots=2):
+        if storage is None:
+            import microcontroller
+            storage = microcontroller.nvm
+        self.storage = storage
+        self.payload_format = payload_format
+        self._payload_size = struct.calcsize(payload_format)
+        self.slot_size = self._payload_size + struct.calcsize(TRAILER_FORMAT)
+
+        if length is None:
+            length = len(storage) - offset
+        step = length // slots
+        if step < self.slot_size:
+            raise ValueError("storage too small for {} snapshot slots".format(slots))
+        self._slots = tuple(offset + i * step for i in range(slots))
+        self._buffer = bytearray(self.slot_size)
+        self._seq = 0
+        self._next_slot = 0
+
+    def _read(self, slot):
+        """Return (seq, values) from one slot, or None if invalid."""
+        start = self._slots[slot]
+        buf = self._buffer
+        buf[:] = self.storage[start:start + self.slot_size]
+        seq, check = struct.unpack_from(TRAILER_FORMAT, buf, self._payload_size)
+        if check != checksum16(buf, 0, self._payload_size + 4):
+            return None
+        return seq, struct.unpack_from(self.payload_format, buf, 0)
+
+    def load(self):
+        """Return the newest valid snapshot's values, or None if there is none."""
+        best = None
+        for slot in range(len(self._slots)):
+            entry = self._read(slot)
+            if entry is not None and (best is None or entry[0] > best[1][0]):
+                best = (slot, entry)
+        if best is None:
+            return None
+        slot, (seq, values) = best
+        self._seq = seq
+        self._next_slot = (slot + 1) % len(self._slots)  # Never overwrite the snapshot we trust
+        return values
+
+    def save(self, *values):
+        """Write a new snapshot into the older slot."""
+        buf = self._buffer
+        self._seq += 1
+        struct.pack_into(self.payload_format, buf, 0, *values)
+        struct.pack_into("<I", buf, self._payload_size, self._seq)
+        struct.pack_into("<H", buf, self._payload_size + 4,
+                         checksum16(buf, 0, self._payload_size + 4))
+        start = self._slots[self._next_slot]
+        self.storage[start:start + self.slot_size] = buf
+        self._next_slot = (self._next_slot + 1) % len(self._slots)
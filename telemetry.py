@@ -0,0 +1,283 @@
+"""
+Binary Telemetry
+================
+
+Compact sensor records over USB serial instead of printed text lines.
+
+Each record is packed with struct as fixed-point integers at the sensors'
+resolution (0.01C, 0.01 %RH, 1 Pa), followed by a CRC-16/CCITT, then
+COBS-framed: the frame holds no zero bytes and ends with one, so a reader
+can join the stream at any point and a damaged frame is dropped without
+losing the next one. A record type and a wrapping sequence number lead
+every record, so the decoder can tell what it got and count lost frames.
+
+    Record            Text line   Frame   Ratio
+    code.py              ~51 B    18 B    2.8x
+    weather station      ~77 B    21 B    3.7x
+
+Altitude is not sent: it follows from the pressure (sensors.pressure_altitude).
+
+Frames go to the second USB serial port (usb_cdc.data) that boot.py
+enables, so the REPL and print() stay on the console port. On a computer
+the data port is the CLUE's second /dev/ttyACM* (or COM) port:
+
+    python3 telemetry.py /dev/ttyACM1                # CSV on stdout
+    python3 telemetry.py /dev/ttyACM1 --sea-level 1021.4 > weather.csv
+
+The module only needs `struct`, so Decoder also works on a computer:
+
+    decoder = Decoder()
+    for record in decoder.feed(data):
+        print(record)
+"""
+
+import struct
+
+# Record types and their struct formats (type and sequence number first)
+RECORD_ENV = 1  # code.py: uptime s, temperature, humidity, pressure
+RECORD_WEATHER = 2  # weather_station.py: the above, heading, forecast
+RECORD_FORMATS = {
+    RECORD_ENV: "<BBIhHI",
+    RECORD_WEATHER: "<BBIhHIHB",
+}
+MAX_RECORD = max(struct.calcsize(f) for f in RECORD_FORMATS.values())
+MAX_FRAME = MAX_RECORD + 2 + MAX_RECORD // 254 + 2  # CRC, COBS overhead, delimiter
+
+# examples/weather_station.py get_weather_forecast() texts, by code
+FORECASTS = (
+    "Collecting data...",
+    "Clear & stable",
+    "Clear, changing",
+    "Improving",
+    "Deteriorating",
+    "Partly cloudy",
+    "Storm warning!",
+    "Rain likely",
+    "Clearing up",
+)
+
+
+def _crc_table():
+    table = []
+    for byte in range(256):
+        crc = byte << 8
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x1021) if crc & 0x8000 else (crc << 1)
+        table.append(crc & 0xFFFF)
+    return tuple(table)
+
+
+CRC_TABLE = _crc_table()
+
+
+def crc16(buf, start, end):
+    """CRC-16/CCITT-FALSE of buf[start:end]."""
+    crc = 0xFFFF
+    table = CRC_TABLE
+    for i in range(start, end):
+        crc = ((crc << 8) & 0xFFFF) ^ table[(crc >> 8) ^ buf[i]]
+    return crc
+
+
+def cobs_encode(src, length, dst):
+    """COBS-encode src[:length] into dst, add the 0 delimiter; returns the frame length."""
+    code_at = 0
+    out = 1
+    code = 1
+    for i in range(length):
+        byte = src[i]
+        if byte:
+            dst[out] = byte
+            out += 1
+            code += 1
+        if not byte or code == 0xFF:
+            dst[code_at] = code
+            code_at = out
+            out += 1
+            code = 1
+    dst[code_at] = code
+    dst[out] = 0
+    return out + 1
+
+
+def cobs_decode(frame):
+    """Decode one frame (without its delimiter); returns bytes, or None if malformed."""
+    out = bytearray()
+    i = 0
+    length = len(frame)
+    while i < length:
+        code = frame[i]
+        if code == 0 or i + code > length:
+            return None
+        out += frame[i + 1:i + code]
+        i += code
+        if code < 0xFF and i < length:
+            out.append(0)
+    return bytes(out)
+
+
+def _fixed(value, scale, low, high):
+    """value * scale as an integer, clamped to the field's range."""
+    value = int(round(value * scale))
+    return low if value < low else high if value > high else value
+
+
+def open_port():
+    """The USB data port boot.py enables, or None."""
+    try:
+        import usb_cdc
+    except ImportError:
+        return None
+    return usb_cdc.data
+
+
+class TelemetryWriter:
+    """Packs, checks and frames records into preallocated buffers."""
+
+    def __init__(self, port):
+        self.port = port  # Anything with write(), e.g. usb_cdc.data
+        self.sequence = 0
+        self.sent = 0  # Frames written
+        self.bytes = 0  # Bytes written
+        self._record = bytearray(MAX_RECORD + 2)
+        self._frame = bytearray(MAX_FRAME)
+        self._view = memoryview(self._frame)
+
+    def _send(self, record_type, *fields):
+        record = self._record
+        fmt = RECORD_FORMATS[record_type]
+        size = struct.calcsize(fmt)
+        struct.pack_into(fmt, record, 0, record_type, self.sequence, *fields)
+        struct.pack_into("<H", record, size, crc16(record, 0, size))
+        length = cobs_encode(record, size + 2, self._frame)
+        self.port.write(self._view[:length])
+        self.sequence = (self.sequence + 1) & 0xFF
+        self.sent += 1
+        self.bytes += length
+
+    def send_env(self, uptime, temperature, humidity, pressure):
+        """One code.py reading: seconds, C, %RH, hPa."""
+        self._send(RECORD_ENV, int(uptime) & 0xFFFFFFFF,
+                   _fixed(temperature, 100, -32768, 32767), _fixed(humidity, 100, 0, 65535),
+                   _fixed(pressure, 100, 0, 0xFFFFFFFF))
+
+    def send_weather(self, uptime, temperature, humidity, pressure, heading, forecast):
+        """One weather station reading; heading in degrees, forecast a FORECASTS code."""
+        self._send(RECORD_WEATHER, int(uptime) & 0xFFFFFFFF,
+                   _fixed(temperature, 100, -32768, 32767), _fixed(humidity, 100, 0, 65535),
+                   _fixed(pressure, 100, 0, 0xFFFFFFFF), _fixed(heading % 360, 100, 0, 35999),
+                   forecast)
+
+
+def decode_record(data):
+    """(type, sequence, fields...) of a decoded frame in sensor units, or None.
+
+    RECORD_ENV: uptime, temperature, humidity, pressure (s, C, %RH, hPa)
+    RECORD_WEATHER: the same, heading (degrees), forecast (FORECASTS code)
+    """
+    if data is None or len(data) < 4:
+        return None
+    fmt = RECORD_FORMATS.get(data[0])
+    if fmt is None or len(data) != struct.calcsize(fmt) + 2:
+        return None
+    size = len(data) - 2
+    if struct.unpack_from("<H", data, size)[0] != crc16(data, 0, size):
+        return None
+    fields = struct.unpack_from(fmt, data, 0)
+    record = (fields[0], fields[1], fields[2], fields[3] / 100, fields[4] / 100, fields[5] / 100)
+    if fields[0] == RECORD_WEATHER:
+        record += (fields[6] / 100, fields[7])
+    return record
+
+
+class Decoder:
+    """Splits a byte stream into frames and decodes them."""
+
+    def __init__(self):
+        self.records = 0  # Records decoded
+        self.bad = 0  # Frames dropped (damaged, unknown type, too long)
+        self.lost = 0  # Records missing by sequence number, not counted as bad
+        self._partial = bytearray()
+        self._sequence = None  # Next expected sequence number
+        self._bad_since = 0  # Frames dropped since the last record
+
+    def feed(self, data):
+        """Decode `data` (bytes, any chunk size); yields the complete records."""
+        partial = self._partial
+        partial += data
+        start = 0
+        while True:
+            end = partial.find(b"\x00", start)
+            if end < 0:
+                break
+            frame = bytes(partial[start:end])
+            start = end + 1
+            if not frame:
+                continue
+            record = decode_record(cobs_decode(frame)) if len(frame) <= MAX_FRAME else None
+            if record is None:
+                self.bad += 1
+                self._bad_since += 1
+                continue
+            if self._sequence is not None:
+                # A dropped frame also leaves a gap in the sequence; count it once
+                self.lost += max(0, ((record[1] - self._sequence) & 0xFF) - self._bad_since)
+            self._sequence = (record[1] + 1) & 0xFF
+            self._bad_since = 0
+            self.records += 1
+            yield record
+        del partial[:start]
+        if len(partial) > MAX_FRAME:
+            # Junk without delimiters (e.g. text on the wrong port)
+            del partial[:]
+            self.bad += 1
+            self._bad_since += 1
+
+
+def main(argv=None):
+    import argparse
+    import sys
+    from sensors import pressure_altitude
+
+    parser = argparse.ArgumentParser(description="Decode CLUE telemetry frames into CSV")
+    parser.add_argument("source", help="USB data serial port or a captured file; - for stdin")
+    parser.add_argument("--sea-level", type=float, default=1013.25,
+                        help="sea-level pressure (hPa) for the altitude (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    stream = sys.stdin.buffer if args.source == "-" else open(args.source, "rb", buffering=0)
+    decoder = Decoder()
+    header = None
+    try:
+        while True:
+            data = stream.read1(4096) if hasattr(stream, "read1") else stream.read(4096)
+            if not data:
+                break
+            for record in decoder.feed(data):
+                columns = "uptime_sec,temperature_c,humidity_pct,pressure_hpa,altitude_m"
+                if record[0] == RECORD_WEATHER:
+                    columns += ",heading_deg,forecast"
+                if columns != header:
+                    print(columns)
+                    header = columns
+                line = "{},{:.2f},{:.2f},{:.2f},{:.1f}".format(
+                    record[2], record[3], record[4], record[5],
+                    pressure_altitude(record[5], args.sea_level))
+                if record[0] == RECORD_WEATHER:
+                    forecast = record[7]
+                    line += ',{:.2f},"{}"'.format(
+                        record[6], FORECASTS[forecast] if forecast < len(FORECASTS) else forecast)
+                print(line, flush=True)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if stream is not sys.stdin.buffer:
+            stream.close()
+    print("{} records, {} damaged frames, {} lost".format(
+        decoder.records, decoder.bad, decoder.lost), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    import sys
+    sys.exit(main())
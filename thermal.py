@@ -0,0 +1,229 @@
+"""
+Thermal Lag Model
+=================
+
+Estimates the temperature inside the food from the CLUE's sensor reading.
+
+The BMP280 sits in the air next to the nRF52840 and the display, so it
+reads warmer than its surroundings, and the air changes much faster than
+the food does. The calibration (calibration.py) covers the first effect, but
+only for the way the board ran while it was calibrated: display on, CPU
+awake. ThermalModel handles both, step by step:
+
+1. Self-heating: the board warms the sensor by
+   idle + display * brightness + awake * CPU duty cycle  (degrees C),
+   approached with the board's own time constant, so dimming the display
+   or sleeping longer does not shift the reading.
+2. Air temperature = sensor reading - self-heating.
+3. Food temperature follows the air as a first-order lag with the food's
+   time constant (about 20 min to a few hours depending on the container).
+
+The food time constant can be fitted from a run with a reference probe in
+the food. Log with food_safety.py (THERMAL_MODEL = True, so the log holds
+air temperatures), save the probe readings as CSV ("unix time,temperature"
+per line), then on a computer:
+
+    python3 thermal.py food_log.bin probe.csv --log-start "2025-11-01 14:05"
+
+Nothing sets the CLUE's clock, so the log's times count from 2000-01-01 at
+power-up. --log-start is when (local time, or unix seconds) the first logged
+reading was taken, e.g. noted when the CLUE went into the fridge; the log is
+shifted to it. Use a log of one run without resets: a reset restarts the
+clock. For example, six hours from putting leftovers in the fridge, with
+a probe logging every minute (the log's first reading at 2000-01-01 00:00:05):
+
+    $ python3 thermal.py food_log.bin probe.csv --log-start "2025-11-01 14:05"
+    Log: 360 readings over 6.0 h, probe: 360 readings
+    Default FOOD_TIME_CONSTANT 1200 s: RMS error 2.14C
+    Fitted  FOOD_TIME_CONSTANT 2715 s (45 min): RMS error 0.05C
+
+Everything except the command line uses plain Python and runs on the CLUE.
+"""
+
+import math
+
+# Self-heating in degrees C, fitted to TEMP_OFFSET = -3.5 (desk, display on)
+SELF_HEATING_IDLE = 0.5  # Board powered, CPU asleep, display dark
+SELF_HEATING_DISPLAY = 2.6  # Extra at full display brightness
+SELF_HEATING_AWAKE = 0.4  # Extra with the CPU always awake
+BOARD_TIME_CONSTANT = 600.0  # Seconds for the board to settle after a change
+FOOD_TIME_CONSTANT = 1200.0  # Seconds; short (conservative) until fitted
+
+
+def lag_step(value, target, elapsed, time_constant):
+    """First-order lag of `value` towards `target` over `elapsed` seconds."""
+    if time_constant <= 0:
+        return target
+    return target + (value - target) * math.exp(-elapsed / time_constant)
+
+
+class ThermalModel:
+    """Self-heating correction and first-order food temperature estimate."""
+
+    def __init__(self, food_time_constant=FOOD_TIME_CONSTANT,
+                 board_time_constant=BOARD_TIME_CONSTANT, idle=SELF_HEATING_IDLE,
+                 display=SELF_HEATING_DISPLAY, awake=SELF_HEATING_AWAKE):
+        self.food_time_constant = food_time_constant
+        self.board_time_constant = board_time_constant
+        self.idle = idle
+        self.display = display
+        self.awake = awake
+        self.time = None  # Time of the last update
+        self.heating = None  # Current self-heating, degrees C
+        self.air = None  # Latest air temperature estimate
+        self.food = None  # Latest food temperature estimate
+
+    def steady_heating(self, display_level, awake_duty):
+        """Self-heating once the board has settled at these duty cycles."""
+        return self.idle + self.display * display_level + self.awake * awake_duty
+
+    def update(self, now, sensor_temp, display_level, awake_duty):
+        """Add a raw sensor reading taken at `now`; returns the food estimate.
+
+        display_level: display brightness (0-1) since the last update.
+        awake_duty: fraction of the time the CPU was awake since then.
+        """
+        steady = self.steady_heating(display_level, awake_duty)
+        if self.time is None:
+            # Assume everything has settled at the first reading
+            self.heating = steady
+            self.air = sensor_temp - steady
+            self.food = self.air
+        else:
+            elapsed = max(0.0, now - self.time)
+            self.heating = lag_step(self.heating, steady, elapsed, self.board_time_constant)
+            self.air = sensor_temp - self.heating
+            self.food = lag_step(self.food, self.air, elapsed, self.food_time_constant)
+        self.time = now
+        return self.food
+
+
+def simulate_food(times, air, time_constant, start=None):
+    """Food estimates at `times` for an air temperature series."""
+    food = air[0] if start is None else start
+    estimates = [food]
+    for i in range(1, len(times)):
+        # Air changes linearly between readings: use the interval's mean
+        target = (air[i - 1] + air[i]) / 2
+        food = lag_step(food, target, times[i] - times[i - 1], time_constant)
+        estimates.append(food)
+    return estimates
+
+
+def fit_error(times, air, probe_times, probe, time_constant):
+    """RMS difference (C) between the model and probe readings."""
+    estimates = simulate_food(times, air, time_constant, probe[0])
+    total = 0.0
+    count = 0
+    j = 0
+    for t, measured in zip(probe_times, probe):
+        if t < times[0] or t > times[-1]:
+            continue
+        while times[j + 1] < t:
+            j += 1
+        span = times[j + 1] - times[j]
+        fraction = (t - times[j]) / span if span else 0.0
+        estimate = estimates[j] + (estimates[j + 1] - estimates[j]) * fraction
+        total += (estimate - measured) ** 2
+        count += 1
+    if not count:
+        raise ValueError("no probe readings inside the logged time span")
+    return math.sqrt(total / count)
+
+
+def fit_time_constant(times, air, probe_times, probe, shortest=60.0, longest=6 * 3600.0):
+    """(time constant, RMS error) that best maps the air series onto the probe."""
+    # Golden-section search on log(time constant)
+    low = math.log(shortest)
+    high = math.log(longest)
+    ratio = (math.sqrt(5) - 1) / 2
+
+    def error(log_tau):
+        return fit_error(times, air, probe_times, probe, math.exp(log_tau))
+
+    a = high - ratio * (high - low)
+    b = low + ratio * (high - low)
+    error_a = error(a)
+    error_b = error(b)
+    for _ in range(40):
+        if error_a < error_b:
+            high, b, error_b = b, a, error_a
+            a = high - ratio * (high - low)
+            error_a = error(a)
+        else:
+            low, a, error_a = a, b, error_b
+            b = low + ratio * (high - low)
+            error_b = error(b)
+    if error_a < error_b:
+        return math.exp(a), error_a
+    return math.exp(b), error_b
+
+
+def read_probe_csv(path):
+    """(times, temperatures) from 'unix time,temperature' lines."""
+    times = []
+    temps = []
+    with open(path) as f:
+        for line in f:
+            fields = line.strip().split(",")
+            try:
+                times.append(float(fields[0]))
+                temps.append(float(fields[1]))
+            except (IndexError, ValueError):
+                continue  # Header or blank line
+    return times, temps
+
+
+def parse_start(text):
+    """Unix seconds from unix seconds or a local 'YYYY-MM-DD HH:MM[:SS]' time."""
+    try:
+        return float(text)
+    except ValueError:
+        import datetime
+        return datetime.datetime.fromisoformat(text).timestamp()
+
+
+def main(argv=None):
+    import argparse
+    from datalog import read_records
+
+    parser = argparse.ArgumentParser(
+        description="Fit the food time constant from a CLUE log and reference probe readings")
+    parser.add_argument("log", help="food_log.bin copied from CIRCUITPY")
+    parser.add_argument("probe", help="CSV of unix time,temperature from a probe in the food")
+    parser.add_argument("--log-start", type=parse_start,
+                        help="when the first logged reading was taken: local "
+                             "'YYYY-MM-DD HH:MM[:SS]' or unix seconds (default: the log's own "
+                             "times, only right if the CLUE's clock was set)")
+    args = parser.parse_args(argv)
+
+    records = list(read_records(args.log))
+    if len(records) < 2:
+        parser.error("the log has fewer than two records")
+    times = [float(record[1]) for record in records]
+    air = [record[2] for record in records]
+    if any(times[i] < times[i - 1] for i in range(1, len(times))):
+        parser.error("the log's clock goes back (the CLUE was reset); fit a log of one run")
+    if args.log_start is not None:
+        shift = args.log_start - times[0]
+        times = [t + shift for t in times]
+    probe_times, probe = read_probe_csv(args.probe)
+    if not probe:
+        parser.error("no readings in " + args.probe)
+    if max(probe_times) < times[0] or min(probe_times) > times[-1]:
+        parser.error("the probe readings do not overlap the log; "
+                     "pass --log-start with the time the log started")
+
+    tau, rms = fit_time_constant(times, air, probe_times, probe)
+    print("Log: {} readings over {:.1f} h, probe: {} readings".format(
+        len(times), (times[-1] - times[0]) / 3600, len(probe)))
+    print("Default FOOD_TIME_CONSTANT {:.0f} s: RMS error {:.2f}C".format(
+        FOOD_TIME_CONSTANT, fit_error(times, air, probe_times, probe, FOOD_TIME_CONSTANT)))
+    print("Fitted  FOOD_TIME_CONSTANT {:.0f} s ({:.0f} min): RMS error {:.2f}C".format(
+        tau, tau / 60, rms))
+    return 0
+
+
+if __name__ == "__main__":
+    import sys
+    sys.exit(main())
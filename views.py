@@ -0,0 +1,60 @@
+"""
+Dirty-Checked Label Views
+=========================
+
+Thin view-model layer between the display update functions and the
+adafruit_display_text labels.
+
+Every Label.text assignment re-lays out the glyphs and marks the label's
+area dirty for the next SPI transfer, even when the text is identical.
+GroupView remembers the last text and color written to each label of a
+display group and only touches the Label when a value actually changes.
+UpdateCounter tallies real writes and skipped ones per tick, so the saved
+display traffic can be measured.
+"""
+
+
+class UpdateCounter:
+    """Per-tick tally of label writes that were issued or skipped."""
+
+    def __init__(self):
+        self.updates = 0
+        self.skipped = 0
+        self.total_updates = 0
+        self.total_skipped = 0
+
+    def start_tick(self):
+        """Fold the previous tick into the totals and reset the tick counts."""
+        self.total_updates += self.updates
+        self.total_skipped += self.skipped
+        self.updates = 0
+        self.skipped = 0
+
+
+class GroupView:
+    """Caches the rendered text and color of every label in a group."""
+
+    def __init__(self, group, counter):
+        self.group = group
+        self.counter = counter
+        self._text = [getattr(item, "text", None) for item in group]
+        self._color = [getattr(item, "color", None) for item in group]
+
+    def set(self, index, text, color=None):
+        """Write text (and optionally color) to label `index` if it changed."""
+        counter = self.counter
+        if self._text[index] != text:
+            self.group[index].text = text
+            self._text[index] = text
+            counter.updates += 1
+        else:
+            counter.skipped += 1
+
+        if color is None:
+            return
+        if self._color[index] != color:
+            self.group[index].color = color
+            self._color[index] = color
+            counter.updates += 1
+        else:
+            counter.skipped += 1